@@ -0,0 +1,10 @@
+"""Benchmarks for the hot paths of the visualization library.
+
+Each module is runnable on its own from the visualization directory.
+benchmarks.suite times all the hot paths together, failing on regressions
+against the stored baseline.json.
+
+Typical use case:
+python -m benchmarks.bench_parsing --size 1024
+python -m benchmarks.suite --scales 1k 100k
+"""
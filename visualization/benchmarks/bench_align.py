@@ -0,0 +1,77 @@
+"""Times Block.align, cold and memoized, against the two justify calls it
+replaces, on random blocks with dozens of loops.
+
+Typical use case:
+python -m benchmarks.bench_align --loops 12 24 48
+"""
+
+# for timing the runs
+import argparse
+import random
+import timeit
+
+# the implementation under test
+import mapping
+from mapping import Block
+from mapping.elements.loops import For, ParFor
+from mapping.elements.stores import Store
+
+# the dims the random loops iterate over
+DIMS: str = "CKMNPQRS"
+
+
+def random_block(loops: int, rng: random.Random) -> Block:
+    """A level 0 block of random loops"""
+    block: Block = Block(Store(0, ("A", "B", "Z")))
+    block.children = [
+        rng.choice((For, ParFor))(rng.choice(DIMS), 0, rng.choice((1, 2, 4, 8)))
+        for _ in range(loops)
+    ]
+
+    return block
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loops", type=int, nargs="+", default=[12, 24, 48])
+    parser.add_argument("--pairs", type=int, default=200, help="block pairs per size")
+    args: argparse.Namespace = parser.parse_args()
+
+    rng: random.Random = random.Random(0)
+    for loops in args.loops:
+        pairs: list[tuple[Block, Block]] = [
+            (random_block(loops, rng), random_block(loops, rng))
+            for _ in range(args.pairs)
+        ]
+
+        def justify() -> None:
+            for ours, theirs in pairs:
+                ours.justify(theirs)
+                theirs.justify(ours)
+
+        def align_cold() -> None:
+            mapping._alignment.cache_clear()
+            for ours, theirs in pairs:
+                ours.align(theirs)
+
+        def align_warm() -> None:
+            for ours, theirs in pairs:
+                ours.align(theirs)
+
+        # per pair timings, in microseconds
+        results: dict[str, float] = {
+            name: min(timeit.repeat(run, number=1, repeat=3)) / args.pairs * 1e6
+            for name, run in (
+                ("justify x2", justify),
+                ("align cold", align_cold),
+                ("align memoized", align_warm),
+            )
+        }
+        print(
+            f"{loops:>3} loops: "
+            + ", ".join(f"{name} {time:,.1f}us" for name, time in results.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
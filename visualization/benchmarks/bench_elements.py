@@ -0,0 +1,77 @@
+"""Measures the memory held by parsed mappings and the throughput of element
+equality, with and without element interning.
+
+The population is testdata.txt repeated --scale times.
+
+Typical use case:
+python -m benchmarks.bench_elements --scale 10000
+"""
+
+# for measuring
+import argparse
+import gc
+import io
+import time
+import tracemalloc
+
+# the implementation under test
+import mapping.elements
+import parsing
+from mapping import Mapping
+
+# reuses the seed printout of the parsing benchmark
+from benchmarks.bench_parsing import SEED_PATH
+
+
+def flatten(mapping: Mapping) -> list:
+    """Every element of the mapping, outermost first"""
+    return [element for block in mapping.blocks for element in block.flatten()]
+
+
+def run(printout: str, intern: bool) -> None:
+    """Parses the printout and reports its footprint and equality speed"""
+    mapping.elements.INTERN = intern
+    gc.collect()
+
+    # memory held by the parsed mappings
+    tracemalloc.start()
+    mappings: list[Mapping] = parsing.parse(io.StringIO(printout))
+    held: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # compares every element of each mapping against the next mapping's
+    pairs: list[tuple] = [
+        (left, right)
+        for first, second in zip(mappings, mappings[1:])
+        for left, right in zip(flatten(first), flatten(second))
+    ]
+    start: float = time.perf_counter()
+    equal: int = sum(left == right for left, right in pairs)
+    elapsed: float = time.perf_counter() - start
+
+    # distinct elements, now that elements are hashable
+    distinct: int = len({element for each in mappings for element in flatten(each)})
+
+    print(
+        f"intern={intern!s:>5}: {len(mappings)} mappings hold "
+        f"{held / (1 << 20):,.1f} MiB, "
+        f"{len(pairs) / elapsed:,.0f} comparisons/s ({equal} equal), "
+        f"{distinct} distinct elements"
+    )
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=10000, help="seed repetitions")
+    args: argparse.Namespace = parser.parse_args()
+
+    # the seed printout, newline terminated so it can be repeated
+    with open(SEED_PATH) as seed:
+        printout: str = (seed.read().rstrip("\n") + "\n") * args.scale
+
+    for intern in (False, True):
+        run(printout, intern)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measures what a Follower poll costs as the followed printout grows. A
+poll after the same number of new records should take as long whatever
+the printout's size.
+
+Each size is caught up with once, untimed, then a fixed batch of records
+is appended --appends times, and every poll after an append is timed.
+
+Typical use case:
+python -m benchmarks.bench_follow --sizes 10000 100000 1000000 --append 1000
+"""
+
+# for timing the runs
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+# the implementation under test
+import synthetic
+from following import Follower
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000], help="records"
+    )
+    parser.add_argument("--append", type=int, default=1000, help="records per append")
+    parser.add_argument("--appends", type=int, default=10, help="appends timed")
+    args: argparse.Namespace = parser.parse_args()
+
+    # the records appended, the same for every size
+    batch: bytes = b"".join(synthetic.dump_records(args.append, seed=1))
+
+    for size in args.sizes:
+        path: str = os.path.join(tempfile.gettempdir(), f"timeloop_follow_{size}.txt")
+        synthetic.write_dump(path, size, seed=0)
+
+        follower: Follower = Follower(path, k=10)
+        start: float = time.perf_counter()
+        follower.poll()
+        catch_up: float = time.perf_counter() - start
+
+        polls: list[float] = []
+        for _ in range(args.appends):
+            with open(path, "ab") as printout:
+                printout.write(batch)
+
+            start = time.perf_counter()
+            follower.poll()
+            polls.append(time.perf_counter() - start)
+
+        os.remove(path)
+        print(
+            f"{size:>9} records ({follower.offset / (1 << 20):.0f} MiB): "
+            f"catch up {catch_up:.2f}s, "
+            f"poll of {args.append} new {statistics.median(polls) * 1e3:.1f}ms, "
+            f"idle poll {timed_idle(follower) * 1e6:.0f}us"
+        )
+
+
+def timed_idle(follower: Follower, polls: int = 100) -> float:
+    """The time a poll with nothing new takes"""
+    start: float = time.perf_counter()
+    for _ in range(polls):
+        follower.poll()
+
+    return (time.perf_counter() - start) / polls
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measures how long importing a module takes with python -X importtime, and
+fails if it is over budget or pulls in a module it should load lazily.
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported. The median of --runs runs is reported.
+
+Typical use case:
+python -m benchmarks.bench_import --budget 250
+"""
+
+# for running fresh interpreters
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# the modules importing graphing must not import
+LAZY_MODULES: tuple[str] = ("matplotlib", "pandas")
+# the cumulative milliseconds importing graphing may take
+BUDGET: float = 250
+
+
+def import_time(module: str) -> tuple[float, float]:
+    """The cumulative and self import times of module, in milliseconds"""
+    result: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # lines read "import time: self [us] | cumulative | name", the imported
+    # module itself not being indented
+    for line in result.stderr.splitlines():
+        fields: list[str] = line.split("|")
+        if len(fields) == 3 and fields[2].rstrip() == f" {module}":
+            own: float = int(fields[0].split(":")[1]) / 1e3
+            return int(fields[1]) / 1e3, own
+
+    raise RuntimeError(f"{module} was not imported:\n{result.stderr}")
+
+
+def eager_imports(module: str) -> list[str]:
+    """The lazy modules that importing module imports anyway"""
+    check: str = (
+        f"import sys, {module}; "
+        f"print(' '.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+    )
+    result: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    return result.stdout.split()
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="graphing", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="fresh imports timed")
+    parser.add_argument(
+        "--budget", type=float, default=BUDGET, help="cumulative milliseconds allowed"
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    times: list[tuple[float, float]] = [
+        import_time(args.module) for _ in range(args.runs)
+    ]
+    cumulative: float = statistics.median(each[0] for each in times)
+    own: float = statistics.median(each[1] for each in times)
+    eager: list[str] = eager_imports(args.module)
+
+    print(
+        f"import {args.module}: {cumulative:.1f}ms cumulative, {own:.1f}ms own, "
+        f"budget {args.budget:.0f}ms"
+    )
+
+    failures: list[str] = []
+    if cumulative > args.budget:
+        failures.append(f"over budget by {cumulative - args.budget:.1f}ms")
+    if eager:
+        failures.append(f"imports {', '.join(eager)} eagerly")
+
+    if failures:
+        sys.exit(f"FAIL: {args.module} " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Measures how parse_many scales with the number of worker processes on a
+synthetic timeloop printout.
+
+Typical use case:
+python -m benchmarks.bench_parallel --size 1024
+"""
+
+# for timing the runs
+import argparse
+import os
+import tempfile
+import time
+
+# the implementation under test
+import parsing
+
+# reuses the synthetic dump of the parsing benchmark
+from benchmarks.bench_parsing import make_dump
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=256, help="dump size in MiB")
+    parser.add_argument("--path", help="existing printout to parse instead")
+    args: argparse.Namespace = parser.parse_args()
+
+    # builds the synthetic dump if we weren't given one
+    path: str = args.path
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"timeloop_{args.size}MiB.txt")
+        if not os.path.exists(path):
+            make_dump(path, args.size << 20)
+
+    # doubles the workers up to every core
+    counts: list[int] = [1]
+    while counts[-1] * 2 <= os.cpu_count():
+        counts.append(counts[-1] * 2)
+
+    print(f"{path}: {os.path.getsize(path) / (1 << 20):.0f} MiB")
+    baseline: float = None
+    for workers in counts:
+        start: float = time.perf_counter()
+        records: int = len(parsing.parse_many([path], workers=workers))
+        elapsed: float = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        print(
+            f"{workers:>4} workers: {records} records in {elapsed:.2f}s, "
+            f"{records / elapsed:,.0f} records/s, speedup {baseline / elapsed:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
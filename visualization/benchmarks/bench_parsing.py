@@ -0,0 +1,146 @@
+"""Compares the streaming parser against the original read-everything parser
+on a synthetic timeloop printout, reporting records/sec and peak RSS.
+
+Every implementation runs in its own interpreter, as peak RSS is a per process
+high-water mark.
+
+Typical use case:
+python -m benchmarks.bench_parsing --size 1024
+"""
+
+# for running the implementations in isolation
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# for typehinting
+from io import TextIOWrapper
+
+# for the original implementation
+import regex as re
+
+# the implementation under test
+import parsing
+
+# the printout the synthetic dump is made of
+SEED_PATH: str = os.path.join(os.path.dirname(parsing.__file__), "testdata.txt")
+
+
+def make_dump(path: str, size: int) -> None:
+    """
+    path:str
+        Where to write the synthetic printout.
+    size:int
+        Roughly how many bytes the printout should be.
+    """
+    # the seed printout, newline terminated so it can be repeated
+    with open(SEED_PATH) as seed:
+        chunk: str = seed.read().rstrip("\n") + "\n"
+
+    # repeats the seed in large writes until the dump is big enough
+    block: str = chunk * max(1, (1 << 20) // len(chunk))
+    with open(path, "w") as dump:
+        written: int = 0
+        while written < size:
+            written += dump.write(block)
+
+
+def legacy_parse(file: TextIOWrapper) -> list:
+    """The original implementation: reads the whole printout then splits it
+    into 4 line chunks with a regex."""
+    raw: str = file.read()
+    mapping_texts: list = re.compile("(?:^.*$\n?){4}", re.M).findall(raw)
+    mapping_texts = [
+        [line.rstrip(";") for line in data_str.rstrip().split("\n")]
+        for data_str in mapping_texts
+    ]
+
+    # the regex also matches the empty string at the end of the printout
+    return [
+        parsing.build_mapping(*record)
+        for record in mapping_texts
+        if len(record) == parsing.RECORD_LINES
+    ]
+
+
+def streaming_parse(file: TextIOWrapper) -> int:
+    """The streaming implementation, counting records without keeping them."""
+    return sum(1 for _ in parsing.iter_parse(file))
+
+
+def run(implementation: str, path: str) -> dict:
+    """Runs one implementation over the dump in this process."""
+    start: float = time.perf_counter()
+    with open(path) as file:
+        if implementation == "legacy":
+            records: int = len(legacy_parse(file))
+        else:
+            records = streaming_parse(file)
+    elapsed: float = time.perf_counter() - start
+
+    return {
+        "implementation": implementation,
+        "records": records,
+        "seconds": elapsed,
+        "records_per_sec": records / elapsed,
+        # ru_maxrss is in KiB on linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1024, help="dump size in MiB")
+    parser.add_argument("--path", help="existing printout to parse instead")
+    parser.add_argument(
+        "--run", choices=("legacy", "streaming"), help=argparse.SUPPRESS
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    # child mode: run one implementation and report back
+    if args.run:
+        print(json.dumps(run(args.run, args.path)))
+        return
+
+    # builds the synthetic dump if we weren't given one
+    path: str = args.path
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"timeloop_{args.size}MiB.txt")
+        if not os.path.exists(path):
+            make_dump(path, args.size << 20)
+
+    print(f"{path}: {os.path.getsize(path) / (1 << 20):.0f} MiB")
+    for implementation in ("streaming", "legacy"):
+        child: subprocess.CompletedProcess = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                __spec__.name,
+                "--run",
+                implementation,
+                "--path",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if child.returncode:
+            print(f"{implementation:>10}: failed\n{child.stderr}")
+            continue
+
+        result: dict = json.loads(child.stdout)
+        print(
+            f"{implementation:>10}: {result['records']} records in "
+            f"{result['seconds']:.2f}s, "
+            f"{result['records_per_sec']:,.0f} records/s, "
+            f"peak RSS {result['peak_rss_mib']:,.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compares the array-backed make_data_percentage against the original
+deepcopy-and-walk implementation, and checks they agree.
+
+Typical use case:
+python -m benchmarks.bench_percentage --datapoints 100000
+"""
+
+# for timing the runs
+import argparse
+import os
+import time
+from copy import deepcopy
+
+# the graphing module draws on import, so never opens a window
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# imports numpy
+import numpy as np
+
+# the implementation under test
+import graphing
+
+
+def legacy_make_data_percentage(data: tuple) -> tuple:
+    """The original implementation, kept verbatim for comparison"""
+    data = deepcopy(data)
+    largest_in_category = dict()
+
+    example_datapoint = data[0]
+    example_component = tuple(example_datapoint.keys())[0]
+    for category, metric_data in example_datapoint[example_component].items():
+        largest_in_category[category] = dict()
+        for label in metric_data.keys():
+            largest_in_category[category][label] = 0
+
+    for datapoint in data:
+        running_sum = dict()
+
+        for metric_data in datapoint.values():
+            for category, values in metric_data.items():
+                if category not in running_sum.keys():
+                    running_sum[category] = dict()
+
+                for label, value in values.items():
+                    if label not in running_sum[category].keys():
+                        running_sum[category][label] = 0
+                    running_sum[category][label] += value
+
+        for category, values in running_sum.items():
+            for label, value in values.items():
+                if running_sum[category][label] > largest_in_category[category][label]:
+                    largest_in_category[category][label] = running_sum[category][label]
+
+    for datapoint in data:
+        for component, metric_data in datapoint.items():
+            for category, values in metric_data.items():
+                for label in values.keys():
+                    datapoint[component][category][label] *= 100
+                    datapoint[component][category][label] /= largest_in_category[
+                        category
+                    ][label]
+
+    return data
+
+
+def make_datapoints(count: int, seed: int = 0) -> tuple:
+    """count datapoints shaped like generate_random_data's, built quickly"""
+    components: tuple = ("A", "B", "C")
+    metrics: list = [
+        (category, label)
+        for category, labels in graphing.categories.items()
+        for label in labels
+    ]
+    values: list = (
+        np.random.default_rng(seed)
+        .integers(50, 100, (count, len(components), len(metrics)))
+        .tolist()
+    )
+
+    datapoints: list = []
+    for datapoint in values:
+        nested: dict = {}
+        for component, row in zip(components, datapoint):
+            nested[component] = {category: {} for category in graphing.categories}
+            for (category, label), value in zip(metrics, row):
+                nested[component][category][label] = value
+        datapoints.append(nested)
+
+    return tuple(datapoints)
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--datapoints", type=int, default=100000, help="datapoints")
+    args: argparse.Namespace = parser.parse_args()
+
+    data: tuple = make_datapoints(args.datapoints)
+
+    start: float = time.perf_counter()
+    legacy: tuple = legacy_make_data_percentage(data)
+    legacy_time: float = time.perf_counter() - start
+
+    # packing the dicts is a one off cost, so is timed apart
+    start = time.perf_counter()
+    packed: graphing.MetricData = graphing.MetricData.from_dicts(data)
+    pack_time: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalized: graphing.MetricData = graphing.make_data_percentage(packed)
+    normalize_time: float = time.perf_counter() - start
+
+    # both agree everywhere
+    assert np.allclose(graphing.MetricData.from_dicts(legacy).values, normalized.values)
+
+    print(
+        f"{args.datapoints} datapoints: legacy {legacy_time:.2f}s, "
+        f"packing {pack_time:.2f}s + normalizing {normalize_time * 1e3:.1f}ms "
+        f"({legacy_time / (pack_time + normalize_time):.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measures how long each aggregated graph takes to build and draw as the
+number of mappings grows. Every graph should take about as long at a million
+mappings as at a hundred.
+
+Typical use case:
+python -m benchmarks.bench_plotting --sizes 100 10000 1000000
+"""
+
+# for timing the runs
+import argparse
+import os
+import time
+
+# draws off screen
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# imports numpy and the plotting library
+import numpy as np
+import matplotlib.pyplot as plt
+
+# the implementation under test
+import graphing
+
+
+def make_data(count: int, seed: int = 0) -> tuple:
+    """Random normalized metric data and cycles/energy for count mappings"""
+    generator: np.random.Generator = np.random.default_rng(seed)
+
+    components: tuple = ("A", "B", "C")
+    metrics: int = sum(len(labels) for labels in graphing.categories.values())
+    values: np.ndarray = generator.integers(50, 100, (count, len(components), metrics))
+
+    data: graphing.MetricData = graphing.make_data_percentage(
+        graphing.MetricData(values.astype(np.float64), components, graphing.categories)
+    )
+    cycles: np.ndarray = generator.lognormal(10, 1, count)
+    energy: np.ndarray = cycles * generator.lognormal(0, 0.5, count)
+
+    return data, cycles, energy
+
+
+def timed(graph, *args) -> float:
+    """Builds and draws a graph, returning the time taken"""
+    plt.close("all")
+
+    start: float = time.perf_counter()
+    graph(*args)
+    plt.gcf().canvas.draw()
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 10000, 1000000], help="mappings"
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    for size in args.sizes:
+        data, cycles, energy = make_data(size)
+
+        print(
+            f"{size:>9} mappings: "
+            f"unified page {timed(graphing.graph_unified_mapping, data):.2f}s, "
+            f"category page {timed(graphing.graph_category, 'Capacity', data):.2f}s, "
+            f"heatmap {timed(graphing.graph_heatmap, data):.2f}s, "
+            f"cycles/energy {timed(graphing.graph_cycles_energy, cycles, energy):.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
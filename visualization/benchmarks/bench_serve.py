@@ -0,0 +1,150 @@
+"""Load tests /api/diff, reporting latency percentiles and requests/sec.
+
+Unless --url points at a running server, starts serve.py in production mode
+on a synthetic printout and stops it afterwards. Each client thread keeps
+one connection open and requests diffs of random mapping pairs.
+
+Typical use case:
+python -m benchmarks.bench_serve --clients 16 --requests 5000 --workers 4
+"""
+
+# for driving the server
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+# imports numpy
+import numpy as np
+
+# the server under test
+import serve
+
+# reuses the synthetic dump of the parsing benchmark
+from benchmarks.bench_parsing import make_dump
+
+
+def get(connection: http.client.HTTPConnection, path: str) -> bytes:
+    """GETs path over an open connection, raising on anything but 200"""
+    connection.request("GET", path)
+    response: http.client.HTTPResponse = connection.getresponse()
+    body: bytes = response.read()
+
+    if response.status != 200:
+        raise RuntimeError(f"GET {path}: {response.status}")
+
+    return body
+
+
+def start_server(port: int, printout: str, workers: int) -> subprocess.Popen:
+    """Starts serve.py in production mode, returning once it answers"""
+    server: subprocess.Popen = subprocess.Popen(
+        [sys.executable, serve.__file__, "--production", "--port", str(port)]
+        + ["--workers", str(workers)],
+        env={**os.environ, "PRINTOUT": printout},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    # the first start parses the printout, so waits generously
+    deadline: float = time.monotonic() + 600
+    while time.monotonic() < deadline:
+        try:
+            get(http.client.HTTPConnection("127.0.0.1", port), "/api/mappings?limit=0")
+            return server
+        except OSError:
+            time.sleep(0.2)
+
+    server.kill()
+    raise RuntimeError("the server did not start")
+
+
+def hammer(
+    host: str, port: int, paths: list[str], latencies: list[float]
+) -> None:
+    """Requests every path in turn over one connection, noting latencies"""
+    connection: http.client.HTTPConnection = http.client.HTTPConnection(host, port)
+
+    for path in paths:
+        start: float = time.perf_counter()
+        get(connection, path)
+        latencies.append(time.perf_counter() - start)
+
+    connection.close()
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="a running server to test instead")
+    parser.add_argument("--size", type=int, default=16, help="dump size in MiB")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="diff workers"
+    )
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="requests in total")
+    parser.add_argument("--format", default="json", help="the diff format requested")
+    parser.add_argument("--port", type=int, default=5077, help="port to serve on")
+    args: argparse.Namespace = parser.parse_args()
+
+    server: subprocess.Popen = None
+    if args.url is None:
+        path: str = os.path.join(tempfile.gettempdir(), f"timeloop_{args.size}MiB.txt")
+        if not os.path.exists(path):
+            make_dump(path, args.size << 20)
+
+        server = start_server(args.port, path, args.workers)
+        host, port = "127.0.0.1", args.port
+    else:
+        url: urllib.parse.SplitResult = urllib.parse.urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+
+    try:
+        # the population the pairs are drawn from
+        total: int = json.loads(
+            get(http.client.HTTPConnection(host, port), "/api/mappings?limit=0")
+        )["total"]
+
+        pairs: np.ndarray = np.random.default_rng(0).integers(
+            0, total, (args.requests, 2)
+        )
+        paths: list[str] = [
+            f"/api/diff/{a}/{b}?format={args.format}" for a, b in pairs.tolist()
+        ]
+
+        # deals the requests out round robin
+        latencies: list[list[float]] = [[] for _ in range(args.clients)]
+        clients: list[threading.Thread] = [
+            threading.Thread(
+                target=hammer,
+                args=(host, port, paths[client :: args.clients], latencies[client]),
+            )
+            for client in range(args.clients)
+        ]
+
+        start: float = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed: float = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    every: np.ndarray = np.concatenate([np.array(each) for each in latencies]) * 1e3
+    print(
+        f"{len(every)} requests from {args.clients} clients over {total:,} "
+        f"mappings: {len(every) / elapsed:,.0f} req/s, "
+        f"p50 {np.percentile(every, 50):.2f}ms, p99 {np.percentile(every, 99):.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Measures building a similarity index and querying it, by exact scan and
+through LSH, with the recall LSH keeps.
+
+The population is the seed printout repeated to --records mappings, with
+every loop bound, loop type and bypass mask drawn at random so the mappings
+differ.
+
+Typical use case:
+python -m benchmarks.bench_similarity --records 1000000
+"""
+
+# for measuring
+import argparse
+import time
+
+# imports numpy
+import numpy as np
+
+# the implementation under test
+from parsing import parse_table
+from similarity import SimilarityIndex
+from mapping.table import MappingTable
+
+# reuses the seed printout of the parsing benchmark
+from benchmarks.bench_parsing import SEED_PATH
+
+
+def make_population(records: int, seed: int = 0) -> MappingTable:
+    """The seed printout repeated to records mappings, then randomized"""
+    with open(SEED_PATH) as printout:
+        seed_table: MappingTable = parse_table(printout)
+
+    table: MappingTable = MappingTable.concatenate(
+        [seed_table] * -(-records // len(seed_table))
+    ).take(np.arange(records))
+    generator: np.random.Generator = np.random.default_rng(seed)
+
+    # power of two bounds, as the mapper tends to pick
+    loops: int = len(table.loop_ends)
+    table.loop_ends = table.loop_starts + (1 << generator.integers(0, 6, loops))
+    table.loop_types = generator.integers(0, 2, loops).astype(table.loop_types.dtype)
+    table.bypass = generator.integers(
+        0, 1 << len(table.dataspaces), len(table.bypass)
+    ).astype(table.bypass.dtype)
+
+    return table
+
+
+def timed(function, *args, repeat: int = 1):
+    """Runs function repeat times, returning its last result and mean time"""
+    start: float = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200000, help="mappings")
+    parser.add_argument("--queries", type=int, default=20, help="queries timed")
+    parser.add_argument("-k", type=int, default=20, help="neighbours per query")
+    parser.add_argument("--lsh-tables", type=int, default=8, help="LSH tables")
+    parser.add_argument("--lsh-bits", type=int, default=12, help="bits per table")
+    args: argparse.Namespace = parser.parse_args()
+
+    table: MappingTable = make_population(args.records)
+
+    exact, build_time = timed(SimilarityIndex, table)
+    approximate, lsh_time = timed(
+        SimilarityIndex, table, args.lsh_tables, args.lsh_bits
+    )
+    print(
+        f"{len(table):,} mappings, {exact.layout.width} features: "
+        f"built in {build_time:.2f}s, LSH tables in {lsh_time:.2f}s"
+    )
+
+    # queries with mappings spread over the population
+    queries: np.ndarray = np.linspace(0, len(table) - 1, args.queries).astype(int)
+
+    recall: list[float] = []
+    exact_time: float = 0
+    approximate_time: float = 0
+    for query in queries:
+        mapping = table[int(query)]
+
+        (rows, _), elapsed = timed(exact.nearest, mapping, args.k)
+        exact_time += elapsed
+        (found, _), elapsed = timed(approximate.nearest, mapping, args.k)
+        approximate_time += elapsed
+
+        recall.append(len(np.intersect1d(rows, found)) / len(rows))
+
+    print(
+        f"exact scan: {exact_time / len(queries) * 1e3:.1f}ms/query, "
+        f"LSH: {approximate_time / len(queries) * 1e3:.1f}ms/query "
+        f"at {np.mean(recall):.0%} recall"
+    )
+
+
+if __name__ == "__main__":
+    main()
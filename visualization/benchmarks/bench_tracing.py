@@ -0,0 +1,74 @@
+"""Measures what the tracing layer costs the hot paths: each instrumented
+function is timed with tracing off and on, and checked to be the
+undecorated function itself while tracing is off.
+
+Typical use case:
+python -m benchmarks.bench_tracing --calls 20000
+"""
+
+# for timing the runs
+import argparse
+import time
+from typing import Callable
+
+# imports numpy
+import numpy as np
+
+# the implementations under test
+import parsing
+import tracing
+from mapping import Block, Mapping
+
+# the printout the mappings are drawn from
+from benchmarks.bench_parsing import SEED_PATH
+
+
+def timed(function: Callable, pairs: list[tuple], runs: int = 5) -> float:
+    """The best time per call of function over every pair, in microseconds"""
+    best: float = float("inf")
+
+    for _ in range(runs):
+        start: float = time.perf_counter()
+        for ours, theirs in pairs:
+            function(ours, theirs)
+        best = min(best, time.perf_counter() - start)
+
+    return best / len(pairs) * 1e6
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000, help="calls timed per run")
+    args: argparse.Namespace = parser.parse_args()
+
+    with open(SEED_PATH) as file:
+        mappings: list[Mapping] = parsing.parse(file)
+
+    drawn: np.ndarray = np.random.default_rng(0).integers(
+        0, len(mappings), (args.calls, 2)
+    )
+    mapping_pairs: list[tuple] = [(mappings[a], mappings[b]) for a, b in drawn.tolist()]
+    block_pairs: list[tuple] = [
+        (ours.blocks[0], theirs.blocks[0]) for ours, theirs in mapping_pairs
+    ]
+
+    for name, owner, attribute, pairs in (
+        ("Block.justify", Block, "justify", block_pairs),
+        ("Mapping.compare", Mapping, "compare", mapping_pairs),
+        ("Mapping.diff", Mapping, "diff", mapping_pairs),
+    ):
+        off: float = timed(getattr(owner, attribute), pairs)
+        bare: bool = not hasattr(getattr(owner, attribute), "__wrapped__")
+
+        tracing.enable()
+        on: float = timed(getattr(owner, attribute), pairs)
+        tracing.enable(False)
+
+        print(
+            f"{name:>16}: off {off:7.2f}us ({'undecorated' if bare else 'WRAPPED'}), "
+            f"on {on:7.2f}us ({(on - off) / off:+.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""Times the hot paths end to end, parse, justify, diff, render and plot, at
+1k, 100k and 1M items, and fails if any got slower than a stored baseline.
+
+Every case is set up once per scale, outside the timing, then run --repeat
+times. Fast runs are looped until a run takes at least MIN_RUN seconds, and
+the time per call is recorded, so small scales aren't lost in timer noise.
+Cases compare on their median.
+
+Every result is saved with the machine it was measured on and a
+calibration time: a fixed workload timed alongside the cases. Ratios
+against the baseline are divided by the ratio of the calibration times,
+which takes out a uniformly faster or slower machine, and a case more than
+--tolerance slower fails the run. --warn-only reports regressions without
+failing, e.g. on a machine too unlike the baseline's for calibration to
+make up for.
+
+The inputs come from synthetic.py with fixed seeds, so every run times the
+same work. Printouts are cached in the temp directory between runs.
+
+Typical use case:
+python -m benchmarks.suite --scales 1k 100k --output results.json
+python -m benchmarks.suite --save-baseline    # after an intended change
+python -m benchmarks.suite --scales 1k --warn-only    # on an unlike machine
+"""
+
+# for timing the runs
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+# imports numpy
+import numpy as np
+
+# the implementations under test
+import graphing
+import parsing
+import synthetic
+from mapping import Mapping
+
+# the number of items each scale stands for
+SCALES: dict[str, int] = {"1k": 1000, "100k": 100000, "1m": 1000000}
+
+# the shortest a timed run may be; faster bodies are called several times
+MIN_RUN: float = 0.2
+# how many distinct mappings per-pair cases cycle through; parsing more
+# would time the parser, not the case
+POPULATION: int = 1024
+# the seed of every input
+SEED: int = 0
+# the size of the calibration workload
+CALIBRATION_ITEMS: int = 200000
+# the machine specs warned about when they differ from the baseline's
+MACHINE_SPECS: tuple[str] = ("machine", "processor", "cpus", "python", "numpy")
+
+# where results are compared against by default
+BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# every case, by name: each takes a scale, sets up, and returns the body
+CASES: dict[str, Callable[[int], Callable[[], object]]] = {}
+
+
+def case(name: str) -> Callable:
+    """Registers a case under name"""
+
+    def register(setup: Callable[[int], Callable[[], object]]) -> Callable:
+        CASES[name] = setup
+        return setup
+
+    return register
+
+
+#########
+# INPUT #
+#########
+
+
+def printout(records: int) -> str:
+    """The path of a synthetic printout of records records, written once"""
+    path: str = os.path.join(
+        tempfile.gettempdir(), f"timeloop_synthetic_{records}_{SEED}.txt"
+    )
+
+    if not os.path.exists(path):
+        # written aside first, so an interrupted run never leaves half a file
+        synthetic.write_dump(path + ".part", records, seed=SEED)
+        os.replace(path + ".part", path)
+
+    return path
+
+
+def population() -> list[Mapping]:
+    """The mappings per-pair cases draw from"""
+    with open(printout(POPULATION)) as file:
+        return parsing.parse(file)
+
+
+def pairs(scale: int) -> list[tuple[Mapping, Mapping]]:
+    """scale pairs of mappings drawn from the population"""
+    mappings: list[Mapping] = population()
+    drawn: np.ndarray = np.random.default_rng(SEED).integers(
+        0, len(mappings), (scale, 2)
+    )
+
+    return [(mappings[a], mappings[b]) for a, b in drawn.tolist()]
+
+
+def comparison_entries(scale: int) -> list[tuple]:
+    """The scale entries of a comparison page, compared up front so only the
+    template is timed"""
+    drawn: list[tuple[Mapping, Mapping]] = pairs(min(scale, POPULATION))
+    compared: list[tuple] = [
+        (mapping.compare(other), mapping) for mapping, other in drawn
+    ]
+
+    return [compared[index % len(compared)] for index in range(scale)]
+
+
+def metric_data(scale: int) -> graphing.MetricData:
+    """scale normalized metric datapoints"""
+    return graphing.make_data_percentage(synthetic.metric_data(scale, seed=SEED))
+
+
+#########
+# CASES #
+#########
+
+
+@case("parse")
+def parse_case(scale: int) -> Callable[[], object]:
+    path: str = printout(scale)
+
+    def body() -> list[Mapping]:
+        with open(path) as file:
+            return parsing.parse(file)
+
+    return body
+
+
+@case("parse_table")
+def parse_table_case(scale: int) -> Callable[[], object]:
+    path: str = printout(scale)
+
+    def body() -> parsing.MappingTable:
+        with open(path) as file:
+            return parsing.parse_table(file)
+
+    return body
+
+
+@case("justify")
+def justify_case(scale: int) -> Callable[[], object]:
+    drawn: list[tuple[Mapping, Mapping]] = pairs(scale)
+
+    def body() -> None:
+        for mapping, other in drawn:
+            mapping.justify(other)
+
+    return body
+
+
+@case("diff")
+def diff_case(scale: int) -> Callable[[], object]:
+    drawn: list[tuple[Mapping, Mapping]] = pairs(scale)
+
+    def body() -> None:
+        for mapping, other in drawn:
+            mapping.diff(other)
+
+    return body
+
+
+@case("render")
+def render_case(scale: int) -> Callable[[], object]:
+    # imported here, as the server pulls in its own dependencies
+    import serve
+
+    entries: list[tuple] = comparison_entries(scale)
+    template = serve.app.jinja_env.get_template("mapping.html")
+
+    def body() -> int:
+        # renders as render_template would, but streamed, so a million
+        # entries never sit in memory as one string
+        with serve.app.test_request_context():
+            context: dict = {"entries": entries}
+            serve.app.update_template_context(context)
+
+            return sum(len(chunk) for chunk in template.generate(context))
+
+    return body
+
+
+@case("render_template")
+def render_template_case(scale: int) -> Callable[[], object]:
+    # imported here, as the server pulls in its own dependencies
+    import serve
+    from flask import render_template
+
+    entries: list[tuple] = comparison_entries(scale)
+
+    def body() -> int:
+        # renders the whole page into one string, as the cached views do
+        with serve.app.test_request_context():
+            return len(render_template("mapping.html", entries=entries))
+
+    return body
+
+
+@case("normalize")
+def normalize_case(scale: int) -> Callable[[], object]:
+    data: graphing.MetricData = synthetic.metric_data(scale, seed=SEED)
+
+    return lambda: graphing.make_data_percentage(data)
+
+
+def drawn(graph: Callable, *args) -> Callable[[], object]:
+    """A body that builds a graph and draws it off screen"""
+    graphing.use_agg()
+    pyplot = graphing._pyplot()
+
+    def body() -> None:
+        figure = graph(*args)
+        figure.canvas.draw()
+        pyplot.close(figure)
+
+    return body
+
+
+@case("plot_unified")
+def plot_unified_case(scale: int) -> Callable[[], object]:
+    return drawn(graphing.graph_unified_mapping, metric_data(scale))
+
+
+@case("plot_category")
+def plot_category_case(scale: int) -> Callable[[], object]:
+    return drawn(graphing.graph_category, "Access Count", metric_data(scale))
+
+
+@case("plot_heatmap")
+def plot_heatmap_case(scale: int) -> Callable[[], object]:
+    return drawn(graphing.graph_heatmap, metric_data(scale))
+
+
+@case("plot_cycles_energy")
+def plot_cycles_energy_case(scale: int) -> Callable[[], object]:
+    generator: np.random.Generator = np.random.default_rng(SEED)
+    cycles: np.ndarray = generator.lognormal(10, 1, scale)
+    energy: np.ndarray = cycles * generator.lognormal(0, 0.5, scale)
+
+    return drawn(graphing.graph_cycles_energy, cycles, energy)
+
+
+##########
+# TIMING #
+##########
+
+
+def measure(body: Callable[[], object], repeat: int) -> dict:
+    """Times body, repeat runs of enough calls each to last MIN_RUN"""
+    # the first call warms up, and says how many calls make a run
+    start: float = time.perf_counter()
+    body()
+    first: float = time.perf_counter() - start
+    number: int = max(1, math.ceil(MIN_RUN / max(first, 1e-9)))
+
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            body()
+        times.append((time.perf_counter() - start) / number)
+
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "number": number,
+        "times": times,
+    }
+
+
+def calibration(repeat: int) -> float:
+    """
+    The median time of a fixed workload, mixing interpreted loops and numpy
+    as the cases do, which scales cases measured on different machines.
+    """
+    values: np.ndarray = np.random.default_rng(SEED).random(CALIBRATION_ITEMS)
+
+    def body() -> float:
+        total: float = 0.0
+        for value in values[: CALIBRATION_ITEMS // 10].tolist():
+            total += value * value
+        return total + float(np.sort(values)[-1])
+
+    return measure(body, repeat)["median"]
+
+
+def machine(repeat: int) -> dict:
+    """What the results were measured on, as results only compare on the
+    same machine"""
+    try:
+        commit: str = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "calibration": calibration(repeat),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Prints each result against its baseline, scaled by the calibration times
+    where both have one, returning the regressions.
+    """
+    regressions: list[str] = []
+    current: dict = results["machine"]
+
+    for key, result in results["results"].items():
+        if key not in baseline["results"]:
+            print(f"{key:>28}: {result['median'] * 1e3:10.2f}ms, no baseline")
+            continue
+
+        # results saved before machines were kept per result share one
+        expected: dict = baseline["results"][key]
+        measured_on: dict = expected.get("machine", baseline["machine"])
+
+        ratio: float = result["median"] / expected["median"]
+        if measured_on.get("calibration"):
+            ratio /= current["calibration"] / measured_on["calibration"]
+
+        verdict: str = ""
+        if ratio > 1 + tolerance:
+            verdict = "  REGRESSION"
+            regressions.append(f"{key} is {ratio:.2f}x slower")
+        elif ratio < 1 / (1 + tolerance):
+            verdict = "  faster"
+
+        print(
+            f"{key:>28}: {result['median'] * 1e3:10.2f}ms, "
+            f"{ratio:5.2f}x baseline{verdict}"
+        )
+
+    return regressions
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--cases", nargs="+", choices=tuple(CASES), default=tuple(CASES), help="cases"
+    )
+    parser.add_argument(
+        "--scales", nargs="+", choices=tuple(SCALES), default=tuple(SCALES)
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--output", help="where to write the results as JSON")
+    parser.add_argument(
+        "--baseline", default=BASELINE_PATH, help="results to compare to"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 is 25%%"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="merge these results into the baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--warn-only",
+        action="store_true",
+        help="only report regressions, rather than exiting with an error",
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    results: dict = {"machine": machine(args.repeat), "results": {}}
+
+    for name in args.cases:
+        for scale in args.scales:
+            key: str = f"{name}/{scale}"
+
+            body: Callable[[], object] = CASES[name](SCALES[scale])
+            result: dict = measure(body, args.repeat)
+            result["scale"] = SCALES[scale]
+            result["per_item"] = result["median"] / SCALES[scale]
+            result["machine"] = results["machine"]
+            results["results"][key] = result
+
+            print(
+                f"{key:>28}: {result['median'] * 1e3:10.2f}ms, "
+                f"{result['per_item'] * 1e6:8.3f}us per item",
+                flush=True,
+            )
+
+            # frees the inputs before the next scale is set up
+            del body
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    baseline: dict = {"machine": results["machine"], "results": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    if args.save_baseline:
+        baseline["machine"] = results["machine"]
+        baseline["results"].update(results["results"])
+
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print(f"saved to {args.baseline}")
+        return
+
+    if not baseline["results"]:
+        print(f"no baseline at {args.baseline}, see --save-baseline")
+        return
+
+    print(f"\nagainst the baseline of {baseline['machine']['date']}:")
+    for field in MACHINE_SPECS:
+        if baseline["machine"].get(field) != results["machine"][field]:
+            print(f"warning: the baseline was measured on another {field}")
+    if not baseline["machine"].get("calibration"):
+        print("warning: the baseline has no calibration, so ratios are unscaled")
+
+    regressions: list[str] = compare(results, baseline, args.tolerance)
+    if regressions and args.warn_only:
+        print("WARNING: " + "; ".join(regressions))
+    elif regressions:
+        sys.exit("FAIL: " + "; ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Caches parsed timeloop printouts as memory-mapped MappingTable files, so
+each printout is only parsed once across runs of serve.py or graphing.py,
+and provides a size bounded in-memory LRU cache for derived results, such
+as rendered views.
+
+A cache file is keyed by the printout's path, size, mtime and content hash,
+and is rebuilt automatically when the printout changes.
+
+Typical use case:
+table = cached_parse("timeloop-mapper.map.txt")
+views = LRUCache(max_bytes=64 << 20)
+views.put(key, html, len(html))
+"""
+
+# for locating and validating cache files
+import hashlib
+import os
+import struct
+
+# for the in-memory cache
+import threading
+from collections import OrderedDict
+
+# for typehinting
+from typing import Any, Hashable, Iterable, Union
+
+# the parser the cache sits in front of
+from parsing import parse_many, workload_dataspaces
+from mapping.table import MappingTable, DEFAULT_DATASPACES
+from mapping.tablefile import read_meta, read_table, write_table
+
+# where cache files go by default
+CACHE_DIR: str = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "timeloop-visualization",
+)
+
+# how much of the printout is hashed at a time
+HASH_BLOCK: int = 1 << 20
+
+
+def file_hash(path: str) -> str:
+    """
+    path:str
+        Path to the file to hash.
+
+    returns:
+        The hex digest of the file's contents.
+    """
+    digest: hashlib.blake2b = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as file:
+        while block := file.read(HASH_BLOCK):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def cache_path(path: str, cache_dir: str = None) -> str:
+    """
+    path:str
+        Path to the timeloop printout.
+    cache_dir:str
+        The directory cache files live in, CACHE_DIR if None.
+
+    returns:
+        Where the printout's cache file lives.
+    """
+    # names the cache after the printout's absolute path
+    name: str = hashlib.blake2b(
+        os.path.abspath(path).encode("utf-8"), digest_size=8
+    ).hexdigest()
+
+    return os.path.join(cache_dir or CACHE_DIR, f"{name}.tlmt")
+
+
+def _source_key(path: str, dataspaces: tuple[str]) -> dict:
+    """Describes the printout as it is on disk right now"""
+    stat: os.stat_result = os.stat(path)
+
+    return {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": file_hash(path),
+        "dataspaces": list(dataspaces),
+    }
+
+
+def _is_fresh(key: dict, path: str, dataspaces: tuple[str]) -> bool:
+    """Checks whether the cached key still describes the printout, only
+    hashing the printout if its mtime changed but its size did not."""
+    stat: os.stat_result = os.stat(path)
+
+    # a different file, workload or length can never match
+    if (
+        key.get("path") != os.path.abspath(path)
+        or key.get("dataspaces") != list(dataspaces)
+        or key.get("size") != stat.st_size
+    ):
+        return False
+
+    # unchanged since it was cached
+    if key.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+
+    # touched, but maybe not modified
+    return key.get("hash") == file_hash(path)
+
+
+def cached_parse(
+    path: str,
+    workload: Union[dict, Iterable[str]] = DEFAULT_DATASPACES,
+    cache_dir: str = None,
+    workers: int = None,
+) -> MappingTable:
+    """
+    path:str
+        Path to the timeloop printout.
+    workload:Union[dict, Iterable[str]]
+        The workload spec or dataspace names, see parsing.workload_dataspaces.
+    cache_dir:str
+        The directory cache files live in, CACHE_DIR if None.
+    workers:int
+        The number of processes to parse with on a cache miss.
+
+    returns:
+        The printout's mappings as a MappingTable memory-mapped from the cache,
+        parsing and caching the printout first if needed.
+    """
+    dataspaces: tuple[str] = workload_dataspaces(workload)
+    cache: str = cache_path(path, cache_dir)
+
+    # the key the cache was written with, if there is a usable cache
+    try:
+        key: dict = read_meta(cache)
+    except (OSError, ValueError, struct.error):
+        key = None
+
+    if key is not None and _is_fresh(key, path, dataspaces):
+        table: MappingTable = read_table(cache)[0]
+
+        # rekeys a touched but unmodified printout so it isn't rehashed next time
+        if key["mtime_ns"] != os.stat(path).st_mtime_ns:
+            write_table(table, cache, _source_key(path, dataspaces))
+
+        return table
+
+    # keys the cache before parsing, so edits made mid-parse invalidate it
+    key = _source_key(path, dataspaces)
+    table = parse_many([path], workers, dataspaces)
+
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    write_table(table, cache, key)
+
+    # reloads from the cache so the pages are shared with other processes
+    return read_table(cache)[0]
+
+
+class LRUCache:
+    """A thread safe least recently used cache, bounded by the total size of
+    its values rather than their number.
+
+    Attributes:
+        max_bytes: The total size the values may take before the least
+            recently used are evicted.
+        hits: The number of lookups that found their key.
+        misses: The number of lookups that did not.
+        evictions: The number of values evicted to make room.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Inits an empty cache holding at most max_bytes of values"""
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+        # (value, size) by key, least recently used first
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._bytes: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """The value cached under key, marking it as recently used"""
+        with self._lock:
+            entry: tuple[Any, int] = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        """Caches value under key, evicting the least recently used values
+        until it fits. Values larger than the whole cache are not kept."""
+        with self._lock:
+            # replaces any older value
+            old: tuple[Any, int] = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            if size > self.max_bytes:
+                return
+
+            while self._bytes + size > self.max_bytes:
+                self._bytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+    def clear(self) -> None:
+        """Drops every value, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        """The number of values cached"""
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether key is cached, without counting as a lookup"""
+        return key in self._entries
+
+    def stats(self) -> dict:
+        """The cache's counters and occupancy"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,208 @@
+"""Groups structurally identical mappings by fingerprint, keeping aggregated
+cycles and energy statistics per group, so diffing and rendering only has to
+run once per unique structure.
+
+Memory grows with the number of unique structures, not records: each group
+is a small statistics record, and only a bounded number of groups keep their
+representative Mapping. The number of groups is bounded too, the least
+recently seen group being evicted to make room for a new one.
+
+Typical use case:
+index = DedupIndex()
+for mapping in index.iter_unique(iter_parse(file)):
+    render(mapping)
+index.stats(fingerprint).energy_mean
+"""
+# imports type hinting tools
+from __future__ import annotations
+from typing import Iterable, Iterator
+
+# for evicting the least recently seen groups
+from collections import OrderedDict
+
+# imports the mapping class being grouped
+from mapping import Mapping
+
+
+class GroupStats:
+    """Aggregated statistics of the mappings sharing one structure.
+
+    Attributes:
+        first: The arrival index of the group's first mapping.
+        representative: The group's first mapping, None if not kept.
+        count: The number of mappings in the group.
+        cycles_min, cycles_max, cycles_sum: Cycles over the group.
+        energy_min, energy_max, energy_sum: Energy over the group.
+    """
+
+    # there is one of these per unique structure, so no __dict__
+    __slots__ = (
+        "first",
+        "representative",
+        "count",
+        "cycles_min",
+        "cycles_max",
+        "cycles_sum",
+        "energy_min",
+        "energy_max",
+        "energy_sum",
+    )
+
+    def __init__(self, first: int, representative: Mapping = None) -> None:
+        """Inits the empty statistics of a group"""
+        self.first: int = first
+        self.representative: Mapping = representative
+        self.count: int = 0
+        self.cycles_min: float = float("inf")
+        self.cycles_max: float = float("-inf")
+        self.cycles_sum: float = 0
+        self.energy_min: float = float("inf")
+        self.energy_max: float = float("-inf")
+        self.energy_sum: float = 0
+
+    def add(self, mapping: Mapping) -> None:
+        """Folds a mapping's performance into the statistics"""
+        self.count += 1
+
+        # unknown performance only counts towards the group size
+        if mapping.cycles is not None:
+            self.cycles_min = min(self.cycles_min, mapping.cycles)
+            self.cycles_max = max(self.cycles_max, mapping.cycles)
+            self.cycles_sum += mapping.cycles
+
+        if mapping.energy is not None:
+            self.energy_min = min(self.energy_min, mapping.energy)
+            self.energy_max = max(self.energy_max, mapping.energy)
+            self.energy_sum += mapping.energy
+
+    @property
+    def cycles_mean(self) -> float:
+        """The mean cycles of the group"""
+        return self.cycles_sum / self.count
+
+    @property
+    def energy_mean(self) -> float:
+        """The mean energy of the group"""
+        return self.energy_sum / self.count
+
+
+# how many groups an index holds by default
+MAX_GROUPS: int = 1 << 20
+
+
+class DedupIndex:
+    """Groups mappings by Mapping.fingerprint().
+
+    Attributes:
+        max_representatives: How many groups keep their first Mapping. Later
+            groups only keep statistics, and can be rebuilt from their first
+            arrival index.
+        max_groups: How many groups are held. Once full, a new structure
+            evicts the group seen least recently, so a later mapping of an
+            evicted structure starts a new group.
+        evicted: The number of groups evicted.
+    """
+
+    def __init__(
+        self, max_representatives: int = 10000, max_groups: int = MAX_GROUPS
+    ) -> None:
+        """Inits an empty index"""
+        if max_groups < 1:
+            raise ValueError(f"max_groups must be positive, not {max_groups}")
+
+        self.max_representatives: int = max_representatives
+        self.max_groups: int = max_groups
+        self.evicted: int = 0
+
+        # the groups by fingerprint, least recently seen first
+        self._groups: OrderedDict[int, GroupStats] = OrderedDict()
+        # the number of mappings added
+        self._arrivals: int = 0
+        # the number of groups keeping their Mapping
+        self._kept: int = 0
+
+    def add(self, mapping: Mapping) -> tuple[int, bool]:
+        """Adds a mapping to its group.
+
+        Returns:
+            The mapping's fingerprint, and whether it started a new group.
+        """
+        fingerprint: int = mapping.fingerprint()
+        group: GroupStats = self._groups.get(fingerprint)
+
+        new: bool = group is None
+        if new:
+            # makes room by evicting the group seen least recently
+            if len(self._groups) >= self.max_groups:
+                evicted: GroupStats = self._groups.popitem(last=False)[1]
+                self._kept -= evicted.representative is not None
+                self.evicted += 1
+
+            # keeps the mapping while under budget
+            keep: bool = self._kept < self.max_representatives
+            self._kept += keep
+
+            group = GroupStats(self._arrivals, mapping if keep else None)
+            self._groups[fingerprint] = group
+        else:
+            self._groups.move_to_end(fingerprint)
+
+        group.add(mapping)
+        self._arrivals += 1
+
+        return fingerprint, new
+
+    def iter_unique(self, mappings: Iterable[Mapping]) -> Iterator[Mapping]:
+        """Adds every mapping, yielding only the first of each structure, or
+        the first since its group was evicted"""
+        for mapping in mappings:
+            if self.add(mapping)[1]:
+                yield mapping
+
+    def stats(self, fingerprint: int) -> GroupStats:
+        """The statistics of the group with fingerprint, if not evicted"""
+        return self._groups[fingerprint]
+
+    def groups(self) -> Iterator[tuple[int, GroupStats]]:
+        """Every (fingerprint, statistics) pair, in order of first arrival"""
+        return iter(sorted(self._groups.items(), key=lambda item: item[1].first))
+
+    def unique(self) -> list[Mapping]:
+        """The kept representative of every group, in order of first arrival"""
+        return [
+            group.representative
+            for _, group in self.groups()
+            if group.representative is not None
+        ]
+
+    def __len__(self) -> int:
+        """The number of unique structures"""
+        return len(self._groups)
+
+    def __contains__(self, mapping: Mapping) -> bool:
+        """Whether a mapping's structure has been seen"""
+        return mapping.fingerprint() in self._groups
+
+
+def dedup(
+    mappings: Iterable[Mapping],
+    max_representatives: int = 10000,
+    max_groups: int = MAX_GROUPS,
+) -> DedupIndex:
+    """
+    mappings:Iterable[Mapping]
+        The mappings to group, e.g. parsing.iter_parse(file).
+    max_representatives:int
+        How many groups keep their first Mapping.
+    max_groups:int
+        How many groups are held, the least recently seen being evicted.
+
+    returns:
+        The index of every mapping's group.
+    """
+    index: DedupIndex = DedupIndex(max_representatives, max_groups)
+
+    for mapping in mappings:
+        index.add(mapping)
+
+    return index
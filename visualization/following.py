@@ -0,0 +1,188 @@
+"""Follows a timeloop printout while the mapper is still appending to it,
+keeping the best mappings and running statistics up to date.
+
+Each poll reads only the bytes appended since the last complete record, and
+parses only the records they complete; a record still being written is held
+back and read again once it is complete. A poll therefore costs time in
+proportion to the new bytes, never to the size of the printout. If the
+printout shrinks or is replaced, as when the mapper is restarted, following
+starts over from its beginning.
+
+Typical use case:
+follower = Follower("timeloop-mapper.map.txt", k=10)
+while True:
+    for index, mapping in follower.poll():
+        print(f"mapping {index} is among the best: {mapping.energy}")
+    time.sleep(1)
+"""
+# imports type hinting tools
+from __future__ import annotations
+from typing import Iterable, Union
+
+# for reading the printout and thread safety
+import os
+import threading
+
+# the parser and selectors being driven incrementally
+from mapping import Mapping
+from mapping.table import DEFAULT_DATASPACES
+from parsing import build_mappings, complete_records, workload_dataspaces
+from selection import ParetoFront, TopK
+
+# how many bytes are read at a time, bounding a poll's memory however far
+# behind it is
+READ_BYTES: int = 16 << 20
+
+
+class Follower:
+    """Parses a growing printout incrementally, keeping its k best mappings,
+    its cycles/energy Pareto front and running statistics. Thread safe.
+
+    Attributes:
+        path: The printout followed.
+        k: The number of best mappings kept.
+        key: The mapping attribute the best mappings are ranked by, lower
+            being better.
+        offset: The bytes of the printout parsed, up to the end of the last
+            complete record.
+        records: The number of mappings parsed.
+        version: Incremented by every poll that parses a record, or starts
+            over.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        k: int = 10,
+        key: str = "energy",
+        workload: Union[dict, Iterable[str]] = DEFAULT_DATASPACES,
+    ) -> None:
+        """Inits a follower of path, which has parsed nothing yet"""
+        self.path: str = path
+        self.k: int = k
+        self.key: str = key
+        self.version: int = 0
+
+        self._dataspaces: tuple[str] = workload_dataspaces(workload)
+        self._lock: threading.Lock = threading.Lock()
+        # the file followed, told apart from a replacement by its inode
+        self._identity: tuple[int, int] = None
+
+        self._start()
+
+    def _start(self) -> None:
+        """Forgets everything parsed, to follow from the beginning"""
+        self.offset: int = 0
+        self.records: int = 0
+
+        # the best mappings, kept as (index, mapping) and ranked by key
+        self._best: TopK = TopK(self.k, lambda entry: getattr(entry[1], self.key))
+        self._front: ParetoFront = ParetoFront()
+
+        # running totals of the metrics, for the means
+        self._cycles: float = 0.0
+        self._energy: float = 0.0
+
+    def poll(self) -> list[tuple[int, Mapping]]:
+        """Parses the records completed since the last poll.
+
+        Returns:
+            The (index, mapping) pairs of the new mappings that joined the
+            best k, in the order they were parsed. Any of them may already
+            have been pushed out again by a later one.
+        """
+        with self._lock:
+            try:
+                stat: os.stat_result = os.stat(self.path)
+            except FileNotFoundError:
+                # the mapper may not have created it yet
+                return []
+
+            # starts over if the printout was replaced or truncated
+            identity: tuple[int, int] = (stat.st_dev, stat.st_ino)
+            if identity != self._identity or stat.st_size < self.offset:
+                self._identity = identity
+                if self.offset or self.records:
+                    self._start()
+                    self.version += 1
+
+            if stat.st_size == self.offset:
+                return []
+
+            joined: list[tuple[int, Mapping]] = []
+            parsed: int = self.records
+
+            with open(self.path, "rb") as printout:
+                printout.seek(self.offset)
+
+                # the bytes read but not yet parsed, at most a partial record
+                # plus one read
+                pending: bytes = b""
+                while data := printout.read(READ_BYTES):
+                    pending += data
+                    records, consumed = complete_records(pending)
+                    pending = pending[consumed:]
+                    self.offset += consumed
+
+                    joined.extend(self._push(records))
+
+            if self.records != parsed:
+                self.version += 1
+
+            return joined
+
+    def _push(self, records: list[tuple[str, str, str, str]]) -> list[tuple]:
+        """Offers the mappings of new records, returning the ones that joined
+        the best k"""
+        joined: list[tuple[int, Mapping]] = []
+
+        mapping: Mapping
+        for mapping in build_mappings(records, self._dataspaces):
+            entry: tuple[int, Mapping] = (self.records, mapping)
+            self.records += 1
+
+            if self._best.push(entry):
+                joined.append(entry)
+            self._front.push(mapping)
+
+            self._cycles += mapping.cycles
+            self._energy += mapping.energy
+
+        return joined
+
+    def best(self) -> list[tuple[int, Mapping]]:
+        """The (index, mapping) pairs of the best k mappings so far, best
+        first"""
+        with self._lock:
+            return self._best.best()
+
+    def front(self) -> list[Mapping]:
+        """The cycles/energy Pareto front so far, by increasing cycles"""
+        with self._lock:
+            return self._front.best()
+
+    def stats(self) -> dict:
+        """The running statistics, JSON serializable"""
+        with self._lock:
+            return self._stats()
+
+    def snapshot(self) -> tuple[dict, list[tuple[int, Mapping]]]:
+        """The running statistics and the best k mappings, as stats() and
+        best() give them, taken at once"""
+        with self._lock:
+            return self._stats(), self._best.best()
+
+    def _stats(self) -> dict:
+        """The running statistics, with the lock held"""
+        best: list[tuple[int, Mapping]] = self._best.best()
+
+        return {
+            "version": self.version,
+            "records": self.records,
+            "offset": self.offset,
+            "key": self.key,
+            "best": getattr(best[0][1], self.key) if best else None,
+            "mean_cycles": self._cycles / self.records if self.records else None,
+            "mean_energy": self._energy / self.records if self.records else None,
+            "front": len(self._front),
+        }
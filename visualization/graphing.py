@@ -1,277 +1,615 @@
-from copy import deepcopy
+"""Normalizes and graphs the metrics Timeloop reports for each mapping.
+
+Importing this module has no side effects: no data is generated and nothing
+is drawn until a function is called. matplotlib is only imported on first
+use, so the module is cheap to import from servers and scripts that never
+plot. Servers should call use_agg() first, to draw off screen.
+
+Typical use case:
+fig = graph_unified_mapping(make_data_percentage(data))
+fig.savefig("metrics.png")
+
+Running this file draws the example graphs from random data.
+"""
+from collections import abc
+from math import ceil
 from typing import *
 
 # defines the numeric data type for type hinting
 numeric = Union[float, int]
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-from math import *
 
 # np.random.seed(42)
 
 # display conditions
 width = 1
+# the most mappings shown on one page of bar charts, and in one row of it
+per_page = 24
+per_row = 8
+# the most rows a heatmap draws; more mappings are averaged into this many
+heatmap_rows = 1024
 
 # thing's we're trying to measure generally, versus what we need to map to see them
 categories = {"Capacity": ["L1", "L2"], "Access Count": ["Read", "Write", "Fill"]}
 
 
-def generate_random_data(data_points: int) -> tuple:
+def generate_random_data(data_points: int, seed: int = None) -> tuple:
     """
     Generates random data of the type Timeloop will provide.
 
     data_points:
         The number of data points we want to get.
+    seed:
+        Seeds the generator, so the same data comes back every time.
     """
-    # the list that stores the data point dictionary.
-    data = list()
-
-    for i in range(data_points):
-        # randomly generates data point
-        data_point = {
-            "A": {  # A is the component
-                "Capacity": {  # Capacity is the category
-                    "L1": np.random.randint(
-                        50, 100
-                    ),  # L1 is the label, the random is the value
-                    "L2": np.random.randint(50, 100),
-                },
-                "Access Count": {
-                    "Read": np.random.randint(50, 100),
-                    "Write": np.random.randint(50, 100),
-                    "Fill": np.random.randint(50, 100),
-                },
-            },
-            "B": {
-                "Capacity": {
-                    "L1": np.random.randint(50, 100),
-                    "L2": np.random.randint(50, 100),
-                },
-                "Access Count": {
-                    "Read": np.random.randint(50, 100),
-                    "Write": np.random.randint(50, 100),
-                    "Fill": np.random.randint(50, 100),
-                },
-            },
-            "C": {
-                "Capacity": {
-                    "L1": np.random.randint(50, 100),
-                    "L2": np.random.randint(50, 100),
-                },
-                "Access Count": {
-                    "Read": np.random.randint(50, 100),
-                    "Write": np.random.randint(50, 100),
-                    "Fill": np.random.randint(50, 100),
-                },
-            },
+    # imported here, as synthetic builds on this module
+    from synthetic import metric_data
+
+    # draws every value at once, then unpacks them into dicts
+    return tuple(metric_data(data_points, seed=seed).to_dicts())
+
+
+# whether pyplot should draw off screen, see use_agg()
+_agg = False
+
+
+def use_agg() -> None:
+    """
+    Draws every figure off screen with the non-interactive Agg backend, as
+    servers and batch jobs should. Call it before drawing anything.
+    """
+    global _agg
+    _agg = True
+
+    # switches over if pyplot was already imported
+    import sys
+
+    if "matplotlib.pyplot" in sys.modules:
+        sys.modules["matplotlib.pyplot"].switch_backend("Agg")
+
+
+def _pyplot():
+    """Imports pyplot on first use, with the backend use_agg() asked for"""
+    if _agg:
+        import matplotlib
+
+        matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Builds the example datasets on first access, rather than on import.
+
+    generated_data:
+        Data on the effect of each process (?) on the measured variables.
+    normalized_data:
+        generated_data, made into percentages.
+    """
+    if name == "generated_data":
+        value = generate_random_data(5)
+    elif name == "normalized_data":
+        value = make_data_percentage(_example("generated_data"))
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # later accesses find it directly
+    globals()[name] = value
+
+    return value
+
+
+def _example(name: str) -> Any:
+    """An example dataset, built if this is its first use"""
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+class LabeledView(abc.Mapping):
+    """
+    A read-only dict view over the trailing axes of a MetricData array, so
+    data[i][component][category][label] works without copying anything.
+
+    values:
+        The array slice the view reads from.
+    axes:
+        One dict per remaining level, mapping each key to its index (or
+        slice) along the slice's first axis.
+    """
+
+    def __init__(self, values: np.ndarray, axes: tuple) -> None:
+        self._values = values
+        self._axes = axes
+
+    def __getitem__(self, key: str) -> Union["LabeledView", numeric]:
+        selected = self._values[self._axes[0][key]]
+
+        # the last level holds the values themselves
+        if len(self._axes) == 1:
+            return selected.item()
+
+        return LabeledView(selected, self._axes[1:])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._axes[0])
+
+    def __len__(self) -> int:
+        return len(self._axes[0])
+
+    def to_dict(self) -> dict:
+        """Copies the view out into plain nested dicts"""
+        return {
+            key: value.to_dict() if isinstance(value, LabeledView) else value
+            for key, value in self.items()
+        }
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+
+class MetricData(abc.Sequence):
+    """
+    Holds datapoints of the shape generate_random_data gives as one dense
+    array of shape (datapoints, components, metrics), where the metrics are
+    every (category, label) pair laid out category by category. Indexing it
+    gives the datapoint as a dict view.
+
+    values:
+        The dense array.
+    components:
+        The component names, along axis 1.
+    categories:
+        The labels of each category, in metric order along axis 2.
+    """
+
+    def __init__(
+        self, values: np.ndarray, components: tuple, categories: Dict[str, tuple]
+    ) -> None:
+        self.values = values
+        self.components = tuple(components)
+        self.categories = {
+            category: tuple(labels) for category, labels in categories.items()
+        }
+
+        # the metric slice of each category, and each label's place within it
+        self._category_axis = dict()
+        self._label_axes = dict()
+        start = 0
+        for category, labels in self.categories.items():
+            self._category_axis[category] = slice(start, start + len(labels))
+            self._label_axes[category] = {
+                label: index for index, label in enumerate(labels)
+            }
+            start += len(labels)
+
+    @classmethod
+    def from_dicts(cls, data: Iterable) -> "MetricData":
+        """
+        Packs datapoints of nested dicts into one array. Assumes the data is
+        rectangular, with the first datapoint's keys.
+
+        data:
+            The datapoints, like the ones generate_random_data gives.
+        """
+        data = tuple(data)
+
+        # takes the axes from the first datapoint
+        example_datapoint = data[0]
+        components = tuple(example_datapoint.keys())
+        categories = {
+            category: tuple(values.keys())
+            for category, values in example_datapoint[components[0]].items()
+        }
+
+        # reads every value straight into the array, in axis order
+        metrics = [
+            (category, label)
+            for category, labels in categories.items()
+            for label in labels
+        ]
+        values = np.fromiter(
+            (
+                datapoint[component][category][label]
+                for datapoint in data
+                for component in components
+                for category, label in metrics
+            ),
+            dtype=np.float64,
+            count=len(data) * len(components) * len(metrics),
+        ).reshape(len(data), len(components), len(metrics))
+
+        return cls(values, components, categories)
+
+    def normalized(self) -> "MetricData":
+        """
+        Expresses every value as a percentage of the largest total any
+        datapoint reaches for its metric, summed over the components.
+        """
+        # the total of each metric per datapoint, then the largest total
+        largest = self.values.sum(axis=1).max(axis=0)
+
+        return MetricData(self.values * 100 / largest, self.components, self.categories)
+
+    def __getitem__(self, index: int) -> LabeledView:
+        # components, then categories, then labels within the category
+        category_views = {
+            category: (axis, self._label_axes[category])
+            for category, axis in self._category_axis.items()
+        }
+
+        return _DatapointView(self.values[index], self.components, category_views)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def category(self, category: str) -> np.ndarray:
+        """The (datapoints, components, labels) values of one category"""
+        return self.values[:, :, self._category_axis[category]]
+
+    @property
+    def flat_labels(self) -> tuple:
+        """
+        The name of every metric along axis 2, its category then its label,
+        e.g. "Access Count Read".
+        """
+        return tuple(
+            f"{category} {label}"
+            for category, labels in self.categories.items()
+            for label in labels
+        )
+
+    def to_dicts(self) -> tuple:
+        """Copies every datapoint out into plain nested dicts"""
+        return tuple(datapoint.to_dict() for datapoint in self)
+
+
+class _DatapointView(LabeledView):
+    """
+    The dict view of one datapoint. Categories are slices of the metric axis
+    rather than single indices, so they get views of their own.
+    """
+
+    def __init__(self, values: np.ndarray, components: tuple, categories: dict) -> None:
+        self._values = values
+        self._components = {
+            component: index for index, component in enumerate(components)
         }
+        self._categories = categories
+
+    def __getitem__(self, component: str) -> LabeledView:
+        metrics = self._values[self._components[component]]
+
+        return _ComponentView(metrics, self._categories)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._components)
+
+    def __len__(self) -> int:
+        return len(self._components)
+
+
+class _ComponentView(LabeledView):
+    """The dict view of one component's categories within a datapoint"""
 
-        data.append(data_point)
+    def __init__(self, metrics: np.ndarray, categories: dict) -> None:
+        self._values = metrics
+        self._categories = categories
 
-    return tuple(data)
+    def __getitem__(self, category: str) -> LabeledView:
+        axis, labels = self._categories[category]
 
+        return LabeledView(self._values[axis], (labels,))
 
-# Data on the effect of each process (?) on the measured variables.
-generated_data: tuple
-generated_data = generate_random_data(5)
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._categories)
 
+    def __len__(self) -> int:
+        return len(self._categories)
 
-def make_data_percentage(data: Iterable = generated_data) -> tuple:
+
+def make_data_percentage(data: Iterable = None) -> MetricData:
     """
-    Takes all the data and preprocesses it so that they are in terms of the max value (100%).
+    Takes all the data and preprocesses it so that they are in terms of the max
+    value (100%).
 
     data:
-        An iterable containing all the datapoints we want to normalize over
+        An iterable containing all the datapoints we want to normalize over,
+        either as nested dicts or as MetricData
+
+    Returns:
+        The normalized data as MetricData, rather than a tuple of dicts. Its
+        datapoints read like the input dicts; to_dicts() copies them out
     """
-    # makes a copy of the old data
-    data = deepcopy(data)
-    # a dictionary storing the largest value in any category across all datapoints in data
-    largest_in_category: dict
-    largest_in_category = dict()
+    if data is None:
+        data = _example("generated_data")
 
-    # loads all the categories and their respective subcategories (labels) into the dictionary; assumes all data is rectangular
-    example_datapoint = data[0]
-    example_component = tuple(example_datapoint.keys())[0]
-    for category, metric_data in example_datapoint[example_component].items():
-        # the dictionary is to store subcomponents of the category data
-        largest_in_category[category] = dict()
-        for label in metric_data.keys():
-            # since all metrics we're looking at are whole numbers, we can initalize all max values as 0 for later comparison.
-            largest_in_category[category][label] = 0
-
-    for datapoint in data:
-        # dictionary that stores the running sum of each category across all components
-        running_sum: dict
-        running_sum = dict()
-
-        # pulls the metric data for all components
-        for metric_data in datapoint.values():
-            # pulls the subdata for all labels to add together
-            for category, values in metric_data.items():
-                # hodge-podge solution to making sure dict doesn't get reinstatiated. You should proabably just make a key-copy of the largest-sum dict but this works for now.
-                if category not in running_sum.keys():
-                    running_sum[category] = dict()
-
-                # running sum among all the components in a category
-                for label, value in values.items():
-                    # instantiates a value if there is no value there
-                    if label not in running_sum[category].keys():
-                        running_sum[category][label] = 0
-                    running_sum[category][label] += value
-
-        # determines max by checking if the values in running sum are greater than the current values of largest_in_category
-        for category, values in running_sum.items():
-            for label, value in values.items():
-                if running_sum[category][label] > largest_in_category[category][label]:
-                    largest_in_category[category][label] = running_sum[category][label]
-
-    # uses largest in category to normalize all the data
-    for datapoint in data:
-        for component, metric_data in datapoint.items():
-            for category, values in metric_data.items():
-                for label in values.keys():
-                    # converts to percentage
-                    datapoint[component][category][label] *= 100
-                    datapoint[component][category][label] /= largest_in_category[
-                        category
-                    ][label]
-
-    return data
-
-
-normalized_data = make_data_percentage()
-# print(normalized_data)
-
-
-def graph_category(category: str, data: tuple = generated_data) -> None:
+    # packs dict data into an array once; the normalization is then a single
+    # sum, max and divide over it, leaving the input untouched
+    if not isinstance(data, MetricData):
+        data = MetricData.from_dicts(data)
+
+    return data.normalized()
+
+
+def graph_category(category: str, data: tuple = None, page: int = 0):
     """
     Generates a Graph Based on the Category Given
 
     category:
         the category you want graphed
+    data:
+        The datapoints, as dicts or MetricData
+    page:
+        Which page of per_page mappings to show
+
+    Returns:
+        The figure
     """
-    # calculates the number of mappings and determine number of plots needed
-    number_of_mappings = len(data)
-    # creates the figure and the subplots
-    fig, subplots = plt.subplots(1, number_of_mappings)
+    if data is None:
+        data = _example("generated_data")
+    if not isinstance(data, MetricData):
+        data = MetricData.from_dicts(data)
+
+    # the mappings on this page, and their values in the category
+    start, stop = _page_bounds(len(data), page)
+    values = data.category(category)[start:stop]
+    labels = data.categories[category]
+    index = np.arange(len(labels))
 
-    for i in range(number_of_mappings):
+    fig, subplots = _page_subplots(stop - start)
+
+    for i in range(stop - start):
         subplot = subplots[i]
-        mapping_data = data[i]
-        # Calculates the amount of bars you need. Assumes all components have even data for all categories.
-        category_size = len(
-            mapping_data[tuple(mapping_data.keys())[0]][category]
-        )  # accesses first component in memory, then checks the number of elements describing that category in component.
-        index = np.arange(
-            category_size
-        )  # a list representing all the elements in the category.
-
-        # the dictionary storing the bar contribution for each component
-        plots = dict()
-        # the bottom of where the bar contribution should be, so that it starts when the last contribution stops
-        bottom_val = np.array([0.0] * category_size)
-
-        # accesses all the metrics data for each component
-        metric_data: dict
-        for component, metric_data in mapping_data.items():
-            # Creates the plots for each component
-            plots[component] = subplot.bar(
-                index, tuple(metric_data[category].values()), width, bottom=bottom_val
-            )
-            bottom_val += np.array(tuple(metric_data[category].values()))
+        handles = _stacked_bars(subplot, values[i], data.components)
 
         # Show title tick marks
-        subplot.set_title(f"Mapping {i + 1}")
+        subplot.set_title(f"Mapping {start + i + 1}")
         subplot.set_ylabel(category)
-        subplot.set_xticks(
-            index, tuple(mapping_data[tuple(mapping_data.keys())[0]][category].keys())
-        )
+        subplot.set_xticks(index, labels)
         subplot.set_yticks(np.arange(0, 301, 100))
-        subplot.legend(
-            tuple([plot[0] for plot in plots.values()]), tuple(mapping_data.keys())
-        )
+        subplot.legend(handles=handles)
+
+    fig.suptitle("Relation of Structure to " + category + _page_title(len(data), page))
 
-    fig.suptitle("Relation of Structure to " + category)
+    return fig
 
 
-def flatten_data_point(datapoint: dict) -> dict:
+def _page_bounds(number_of_mappings: int, page: int) -> tuple:
     """
-    Takes the data from a datapoint and flattens it into just a key-pair interaction
+    The first and one past the last mapping on a page of per_page mappings.
+    """
+    start = page * per_page
+    if not 0 <= start < max(number_of_mappings, 1):
+        raise IndexError(f"No page {page} of {number_of_mappings} mappings")
+
+    return start, min(start + per_page, number_of_mappings)
 
-    datapoint:
-        A datapoint like the ones generated above
+
+def _page_subplots(count: int) -> tuple:
+    """
+    Creates a figure of count subplots, per_row to a row, as small multiples.
 
     Returns:
-        A flattened datapoint of the form:
-        {
-            "Component": {
-                "Capacity Alpha": int,
-                "L1 Read": int,
-                "L1 Write": int,
-                etc etc
-            }
-        }
+        The figure, and its subplots as a flat array in reading order.
     """
+    columns = min(count, per_row)
+    fig, subplots = _pyplot().subplots(ceil(count / columns), columns, squeeze=False)
+    subplots = subplots.ravel()
+
+    # the last row may not be full
+    for subplot in subplots[count:]:
+        subplot.set_visible(False)
+
+    return fig, subplots[:count]
+
+
+def _page_title(number_of_mappings: int, page: int) -> str:
+    """Notes the page in a figure title, if there is more than one"""
+    pages = ceil(number_of_mappings / per_page)
 
-    return pd.json_normalize(datapoint, sep=" ").to_dict(orient="records")[0]
+    return f" (page {page + 1} of {pages})" if pages > 1 else ""
 
 
-def graph_unified_mapping(data: tuple = normalized_data) -> None:
+def _stacked_bars(subplot, values: np.ndarray, components: tuple) -> list:
     """
-    Graphs all the data for a mapping in relation to the max amount in each category for a dataset (set as 100% in the scaling).
+    Draws every component's bars stacked on each other as one collection,
+    rather than one bar() call of a Rectangle per bar per component.
 
-    data:
-        The data collected from time loop, processed by the normalization function.
+    subplot:
+        The axes to draw on.
+    values:
+        The (components, bars) heights.
+    components:
+        The component names, for the legend.
+
+    Returns:
+        The legend handles, one per component.
     """
+    from matplotlib.collections import PolyCollection
+    from matplotlib.colors import to_rgba_array
+    from matplotlib.patches import Patch
+
+    # the bottom of every component's bars is the sum of the components below
+    tops = np.cumsum(values, axis=0)
+    bottoms = tops - values
+
+    # the corners of every bar, each centered on its index like bar() does
+    left = np.arange(values.shape[1]) - width / 2
+    left = np.broadcast_to(left, values.shape)
+    right = left + width
+    corners = np.stack(
+        (
+            np.stack((left, bottoms), axis=-1),
+            np.stack((left, tops), axis=-1),
+            np.stack((right, tops), axis=-1),
+            np.stack((right, bottoms), axis=-1),
+        ),
+        axis=-2,
+    ).reshape(-1, 4, 2)
+
+    # a color per component, as successive bar() calls would cycle through
+    colors = _pyplot().rcParams["axes.prop_cycle"].by_key()["color"]
+    colors = [colors[c % len(colors)] for c in range(len(components))]
+
+    facecolors = np.repeat(to_rgba_array(colors), values.shape[1], axis=0)
+    subplot.add_collection(PolyCollection(corners, facecolors=facecolors))
+    subplot.autoscale_view()
+
+    return [Patch(color=color, label=name) for color, name in zip(colors, components)]
+
+
+def graph_unified_mapping(data: tuple = None, page: int = 0):
+    """
+    Graphs all the data for a mapping in relation to the max amount in each
+    category for a dataset (set as 100% in the scaling).
 
-    # calculates the number of mappings needed to determine the number of plots needed
-    number_of_mappings = len(data)
-    # creates the figure and subplots
-    fig, subplots = plt.subplots(1, number_of_mappings)
+    data:
+        The data collected from time loop, processed by the normalization function.
+    page:
+        Which page of per_page mappings to show
 
-    for i in range(number_of_mappings):
+    Returns:
+        The figure
+    """
+    if data is None:
+        data = _example("normalized_data")
+
+    # flattens the whole dataset into one (mappings, components, bars) array
+    # up front, rather than each component of each mapping on its own
+    if not isinstance(data, MetricData):
+        data = MetricData.from_dicts(data)
+    labels = data.flat_labels
+    # numerical designators for each bar, which we label later
+    index = np.arange(len(labels))
+
+    # the mappings on this page
+    start, stop = _page_bounds(len(data), page)
+    fig, subplots = _page_subplots(stop - start)
+
+    for i in range(stop - start):
         subplot = subplots[i]
-        mapping_data = data[i]
-
-        # the dictionary containing each bar plot.
-        plots = dict()
-        # the bottom offset for the graphs
-        bottom_val: np.NDArray
-        bottom_val = None
-
-        for component, values in mapping_data.items():
-            # gets the 1D representation of the data so we don't have to do more processing of the data.
-            values = flatten_data_point(values)
-            # gets the number of vertical bars we need
-            category_size = len(values)
-            # a list representing the bar count; numerical designators for each bar which we will label later
-            index = np.arange(category_size)
-            # the bottom of where the bar contribution should be for the next component
-            if (
-                bottom_val is None
-            ):  # shoddy workaround again to avoid reinstantiation of the variable
-                bottom_val = np.array([0.0] * category_size)
-
-            # creates the bars for a given component in the mapping
-            plots[component] = subplot.bar(
-                index, tuple(values.values()), width, bottom=bottom_val
-            )
-            # updates bottom_val to the new bottom for the next thing to display
-            bottom_val += np.array(tuple(values.values()))
+        handles = _stacked_bars(subplot, data.values[start + i], data.components)
 
         # shows titles and tick marks
-        subplot.set_title(f"Mapping {i + 1}")
+        subplot.set_title(f"Mapping {start + i + 1}")
         subplot.set_ylabel("Percentage of Max")
-        subplot.set_xticks(index, tuple(values.keys()), rotation="vertical")
+        subplot.set_xticks(index, labels, rotation="vertical")
         subplot.set_yticks(np.arange(0, 101, 100))
-        subplot.legend(
-            tuple([plot[0] for plot in plots.values()]), tuple(mapping_data.keys())
-        )
+        subplot.legend(handles=handles)
         subplot.set_ylim((0, 100))
 
-    fig.suptitle("Relation of Structure to Metrics")
+    fig.suptitle("Relation of Structure to Metrics" + _page_title(len(data), page))
+
+    return fig
+
+
+def graph_heatmap(data: tuple = None, component: str = None):
+    """
+    Graphs every mapping's metrics as one heatmap row, so any number of
+    mappings draws in bounded time. Past heatmap_rows mappings, consecutive
+    mappings are averaged into one row.
+
+    data:
+        The normalized data, as dicts or MetricData
+    component:
+        The component to show, or None for the sum over every component
+
+    Returns:
+        The figure
+    """
+    if data is None:
+        data = _example("normalized_data")
+    if not isinstance(data, MetricData):
+        data = MetricData.from_dicts(data)
+
+    # the (mappings, metrics) values shown
+    if component is None:
+        values = data.values.sum(axis=1)
+    else:
+        values = data.values[:, data.components.index(component)]
+
+    # averages consecutive mappings down to at most heatmap_rows rows
+    group = ceil(len(values) / heatmap_rows)
+    if group > 1:
+        padding = np.full((-len(values) % group, values.shape[1]), np.nan)
+        values = np.nanmean(
+            np.concatenate((values, padding)).reshape(-1, group, values.shape[1]),
+            axis=1,
+        )
+
+    fig, subplot = _pyplot().subplots()
+    image = subplot.imshow(
+        values,
+        aspect="auto",
+        interpolation="nearest",
+        extent=(-0.5, values.shape[1] - 0.5, len(data) + 0.5, 0.5),
+    )
+
+    subplot.set_xticks(
+        np.arange(values.shape[1]), data.flat_labels, rotation="vertical"
+    )
+    subplot.set_ylabel("Mapping")
+    fig.colorbar(image, ax=subplot, label="Percentage of Max")
+    fig.suptitle(
+        "Relation of Structure to Metrics"
+        + ("" if component is None else f" for {component}")
+    )
+
+    return fig
+
+
+def graph_cycles_energy(cycles: np.ndarray, energy: np.ndarray, bins: int = 256):
+    """
+    Graphs cycles against energy as a 2D histogram on log axes, rather than
+    one marker per mapping, so millions of mappings draw as fast as a few.
+
+    cycles:
+        The cycles of every mapping, e.g. MappingTable.cycles
+    energy:
+        The energy of every mapping, e.g. MappingTable.energy
+    bins:
+        The number of bins along each axis
+
+    Returns:
+        The figure
+    """
+    from matplotlib.colors import LogNorm
+
+    cycles = np.asarray(cycles, dtype=np.float64)
+    energy = np.asarray(energy, dtype=np.float64)
+
+    # only positive, known values can go on log axes
+    known = np.isfinite(cycles) & np.isfinite(energy) & (cycles > 0) & (energy > 0)
+    cycles, energy = cycles[known], energy[known]
+
+    # bins evenly spaced in log space, widened a little if every value is equal
+    edges = [
+        np.logspace(
+            np.log10(values.min()) - 0.01, np.log10(values.max()) + 0.01, bins + 1
+        )
+        if len(values)
+        else np.logspace(0, 1, bins + 1)
+        for values in (cycles, energy)
+    ]
+    counts = np.histogram2d(cycles, energy, bins=edges)[0]
+
+    fig, subplot = _pyplot().subplots()
+    # empty bins are left blank
+    mesh = subplot.pcolormesh(
+        edges[0], edges[1], np.ma.masked_equal(counts.T, 0), norm=LogNorm()
+    )
+
+    subplot.set_xscale("log")
+    subplot.set_yscale("log")
+    subplot.set_xlabel("Cycles")
+    subplot.set_ylabel("Energy")
+    fig.colorbar(mesh, ax=subplot, label="Mappings")
+    fig.suptitle(f"Cycles against Energy of {len(cycles)} Mappings")
+
+    return fig
 
 
 """
@@ -281,15 +619,23 @@ def graph_mapping(data: tuple = generated_data) -> None:
     data:
         The data collected from Timeloop.
     \"""
-    # defines the first element in the dataset, which we assume is of equal shape to the other pieces of data.
+    # defines the first element in the dataset, which we assume is of equal
+    # shape to the other pieces of data.
     example_datapoint = data[0]
     # calculates evenly-spaced axis angles
     theta = np.linspace(0, 2*np.pi, len(tuple(example_datapoint.values())[0]
 """
 
-# graph_category("Capacity", normalized_data)
-graph_category("Capacity")
-graph_category("Access Count")
-graph_unified_mapping()
 
-plt.show()
+def main() -> None:
+    """Draws the example graphs from random data"""
+    # graph_category("Capacity", normalized_data)
+    graph_category("Capacity")
+    graph_category("Access Count")
+    graph_unified_mapping()
+
+    _pyplot().show()
+
+
+if __name__ == "__main__":
+    main()
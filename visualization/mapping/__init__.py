@@ -8,16 +8,123 @@ mapping = Mapping([Buffer, ForLoop])
 from __future__ import annotations
 from typing import Union, Iterable
 
-# imports numpy
-import numpy as np
+# for stable fingerprints
+import hashlib
 
 # imports all of elements
 from mapping.elements import MappingElement, Distinguishable
 
 # imports classes of elements
-from mapping.elements.loops import Loop, For, ParFor
+from mapping.elements.loops import Loop, MISSING
 from mapping.elements.stores import Store
 
+# imports the structured diff
+from mapping.changes import LoopChange, BlockDiff, MappingDiff
+
+# for rendering into a single buffer
+import io
+
+# for memoizing alignments
+from functools import lru_cache
+
+# times the comparisons
+from tracing import traced
+
+# how many block alignments are remembered
+ALIGN_CACHE_SIZE: int = 4096
+
+
+def align_loops(ours: tuple[Loop], theirs: tuple[Loop]) -> tuple[tuple[Loop]]:
+    """Optimally aligns two loop sequences by dim, Needleman-Wunsch style.
+
+    A pair of loops over the same dim scores 2, or 3 if the loops are equal,
+    and a loop left unpaired scores 0, so the alignment pairs as many dims as
+    possible, preferring identical loops. Unpaired loops are faced with a
+    blank() of themselves on the other side.
+
+    Args:
+        ours: The loops of one block, in order.
+        theirs: The loops of the other block, in order.
+
+    Returns:
+        The aligned loops of each side, of equal length and with matching dims
+        at every position.
+    """
+    # the alignment is remembered by the loops' values, never the loops, so
+    # the cache doesn't keep interned loops alive
+    pairs: tuple[tuple[int, int]] = _alignment(
+        tuple((loop.dim, type(loop), loop._state()) for loop in ours),
+        tuple((loop.dim, type(loop), loop._state()) for loop in theirs),
+    )
+
+    return (
+        tuple(theirs[j].blank() if i is None else ours[i] for i, j in pairs),
+        tuple(ours[i].blank() if j is None else theirs[j] for i, j in pairs),
+    )
+
+
+@lru_cache(maxsize=ALIGN_CACHE_SIZE)
+def _alignment(ours: tuple[tuple], theirs: tuple[tuple]) -> tuple[tuple[int, int]]:
+    """Aligns two loop sequences, as align_loops does, given as the dim, class
+    and state of each loop.
+
+    Returns:
+        The index of the loop of each side at every aligned position, None
+        where that side has a blank.
+    """
+    rows: int = len(ours)
+    columns: int = len(theirs)
+
+    # the dims are compared on every cell, so are pulled out once
+    our_dims: list[str] = [loop[0] for loop in ours]
+    their_dims: list[str] = [loop[0] for loop in theirs]
+
+    # best[i][j] is the best score aligning ours[i:] with theirs[j:]
+    best: list[list[int]] = [[0] * (columns + 1) for _ in range(rows + 1)]
+
+    for i in range(rows - 1, -1, -1):
+        row: list[int] = best[i]
+        below: list[int] = best[i + 1]
+        ours_loop: tuple = ours[i]
+        ours_dim: str = our_dims[i]
+
+        # the score of the cell to the right, carried along the row
+        right: int = 0
+        for j in range(columns - 1, -1, -1):
+            # the better of leaving either loop unpaired
+            score: int = below[j] if below[j] > right else right
+
+            # pairing the two loops, if they share a dim
+            if ours_dim == their_dims[j]:
+                paired: int = below[j + 1] + 2 + (ours_loop == theirs[j])
+                if paired > score:
+                    score = paired
+
+            row[j] = right = score
+
+    # walks the table front to back, preferring pairs, then our loops first
+    pairs: list[tuple[int, int]] = []
+    i: int = 0
+    j: int = 0
+    while i < rows or j < columns:
+        if (
+            i < rows
+            and j < columns
+            and our_dims[i] == their_dims[j]
+            and best[i][j] == best[i + 1][j + 1] + 2 + (ours[i] == theirs[j])
+        ):
+            pairs.append((i, j))
+            i += 1
+            j += 1
+        elif i < rows and (j == columns or best[i][j] == best[i + 1][j]):
+            pairs.append((i, None))
+            i += 1
+        else:
+            pairs.append((None, j))
+            j += 1
+
+    return tuple(pairs)
+
 
 class Block:
     """Represents an indentation block, caused by a buffer
@@ -33,6 +140,9 @@ class Block:
         children: The elements that directly belong to this block.
     """
 
+    # there are as many blocks as levels in every mapping, so no __dict__
+    __slots__ = ("_buffer", "_children")
+
     def __init__(self, buffer: Store) -> None:
         """Inits the Block with the buffer its contained in and a list"""
         self._buffer: Store = buffer
@@ -131,46 +241,58 @@ class Block:
     # COMPARISON FUNCTIONS #
     ########################
 
+    @traced("justify")
     def justify(self, other: Block) -> Block:
         """Inserts into a copy of self the dims that are located in this Block
         but not the other Block.
 
         returns the copy of self"""
-        # the loops in each Block
-        self_loop_dims: tuple[str] = self.loop_dims
-        other_loop_dims: tuple[str] = other.loop_dims
-
-        # the loops not contained in self
-        missing_loops: list = []
-        # calculates the loops not in self
-        dim: str
-        for dim in other_loop_dims:
-            if dim not in self_loop_dims:
-                missing_loops.append(dim)
+        # the loops in self
+        self_loop_dims: set[str] = set(self.loop_dims)
 
         # represents the new block loop order
         new_loops: list[Loop] = list(self.children)
 
-        # inserts the missing loops in the correct relative positions
-        loop: str
-        for loop in missing_loops:
-            # finds its index in other
-            other_index: int = other_loop_dims.index(loop)
-
-            # inserts into new loop at index
-            new_loops.insert(other_index, other.children[other_index].blank())
+        # inserts the loops not in self at their index in other
+        other_index: int
+        for other_index, dim in enumerate(other.loop_dims):
+            if dim not in self_loop_dims:
+                new_loops.insert(other_index, other.children[other_index].blank())
 
         # the new block to be returned
         new_block: Block = Block(self.buffer)
-        print(new_loops)
 
         # sets its children
         new_block.children = new_loops
 
         return new_block
 
-    def diff(self, other: Block) -> str:
-        """Notes the difference between two blocks on the same level"""
+    def align(self, other: Block) -> tuple[Block, Block]:
+        """Aligns the loops of two blocks on the same level, inserting blanks
+        so both have the same dims in the same positions. Unlike justify, the
+        result is optimal and symmetric, and survives reordered loops.
+
+        returns the aligned copies of self and other"""
+        # checks we are doing block to block comparison
+        if not isinstance(other, Block):
+            raise TypeError(f"Cannot align {type(other)} to Block.")
+
+        # checks the buffers are of the same level
+        assert self.level == other.level, "Cannot align blocks between levels"
+
+        ours, theirs = align_loops(self.children, other.children)
+
+        # the new blocks to be returned
+        aligned_self: Block = Block(self.buffer)
+        aligned_self.children = ours
+        aligned_other: Block = Block(other.buffer)
+        aligned_other.children = theirs
+
+        return aligned_self, aligned_other
+
+    def compare(self, other: Block) -> BlockDiff:
+        """Notes the difference between two blocks on the same level as a
+        BlockDiff. Children past the end of other are marked MISSING."""
 
         # checks we are doing block to block comparison
         if not isinstance(other, Block):
@@ -179,27 +301,30 @@ class Block:
         # checks the buffers are of the same level
         assert self.level == other.level, "Cannot compare blocks between levels"
 
-        ## synthesizes the diffstring ##
-
         # the children of the other buffer
         other_children: tuple[MappingElement] = other.children
 
-        # string we're outputting; we don't do any comparison checks on the buffer
-        # as we already note the bypasses.
-        out_string: str = f"{self.buffer}\n"
-
-        # adds the comparison of the non-buffer elements, indented
+        # the change of each child; we don't do any comparison checks on the
+        # buffer as we already note the bypasses.
+        changes: list[LoopChange] = []
         for index, child in enumerate(self.children):
-            # checks that the child is Distinguishable
-            if isinstance(child, Distinguishable):
-                # if so, check the difference between the corresponding children
-                out_string += f"\t{child.diff(other_children[index])}\n"
-
+            # only Distinguishable children have differences to note
+            if not isinstance(child, Distinguishable):
+                changes.append(LoopChange(child))
+            elif index < len(other_children):
+                changes.append(LoopChange(child, child.compare(other_children[index])))
             else:
-                # otherwise, just add the child
-                out_string += f"\t{child}\n"
+                changes.append(LoopChange(child, MISSING))
+
+        return BlockDiff(self.buffer, changes)
+
+    def diff(self, other: Block) -> str:
+        """Notes the difference between two blocks on the same level"""
+        # a diff of a single block is rendered like a mapping's blocks are
+        out: io.StringIO = io.StringIO()
+        self.compare(other).write_markdown(out)
 
-        return out_string
+        return out.getvalue()
 
     #########################
     # testing aid functions #
@@ -208,14 +333,11 @@ class Block:
     def __str__(self) -> str:
         """returns a string representation of the Block"""
 
-        # the string we are outputting
-        out_string: str = f"{self.buffer}\n"
-
-        # adds the non-buffer elements, indented
-        for child in self.children:
-            out_string += f"\t{child}\n"
+        # the buffer, then the non-buffer elements, indented
+        lines: list[str] = [f"{self.buffer}\n"]
+        lines.extend(f"\t{child}\n" for child in self.children)
 
-        return out_string
+        return "".join(lines)
 
 
 class Mapping:
@@ -302,6 +424,29 @@ class Mapping:
         """Sets the energy cost of the mapping"""
         self._energy = energy
 
+    ####################
+    # FINGERPRINT FXNS #
+    ####################
+
+    def fingerprint(self) -> int:
+        """Returns a stable 128 bit hash of the mapping's structure: the level
+        and bypass of every block, and the order, type, dim and bounds of
+        every loop. Performance is not part of the structure.
+
+        Unlike hash(), the fingerprint is the same across processes and runs.
+        """
+        digest: hashlib.blake2b = hashlib.blake2b(digest_size=16)
+
+        block: Block
+        for block in self.blocks:
+            # the printout's separators cannot appear in a dim
+            digest.update(f"{block.level};{int(block.buffer.bypass)}\n".encode())
+
+            for child in block.children:
+                digest.update(f"{child};".encode())
+
+        return int.from_bytes(digest.digest(), "little")
+
     ###################
     # COMPARISON FXNS #
     ###################
@@ -328,26 +473,74 @@ class Mapping:
 
         return out
 
-    def diff(self, other: Mapping) -> str:
-        """Notes the differences between two mappings"""
+    def align(self, other: Mapping) -> tuple[Mapping, Mapping]:
+        """Returns new copies of self and other whose corresponding blocks have
+        been aligned against each other, see Block.align. Blocks without a
+        counterpart are kept as they are."""
 
         # checks other input type
         if not isinstance(other, Mapping):
-            raise TypeError(f"{type(other)} cannot be compared with Mapping")
+            raise TypeError(f"{type(other)} cannot be aligned with Mapping")
 
-        ## synthesizes the diffstring ##
+        # the aligned blocks of each side
+        ours: list[Block] = []
+        theirs: list[Block] = []
+        for block, other_block in zip(self.blocks, other.blocks):
+            aligned, other_aligned = block.align(other_block)
+            ours.append(aligned)
+            theirs.append(other_aligned)
+
+        # the blocks past the end of the shorter mapping
+        ours.extend(self.blocks[len(ours) :])
+        theirs.extend(other.blocks[len(theirs) :])
+
+        # initializes new mappings and loads in the blocks
+        aligned_self: Mapping = Mapping([], self.cycles, self.energy)
+        aligned_self.blocks = ours
+        aligned_other: Mapping = Mapping([], other.cycles, other.energy)
+        aligned_other.blocks = theirs
+
+        return aligned_self, aligned_other
+
+    @traced("compare")
+    def compare(self, other: Mapping) -> MappingDiff:
+        """Notes the differences between two mappings as a MappingDiff"""
+
+        # checks other input type
+        if not isinstance(other, Mapping):
+            raise TypeError(f"{type(other)} cannot be compared with Mapping")
 
         # the blocks of the other mapping
         other_blocks: tuple[Block] = other.blocks
 
-        # the string we're outputting
-        out_string: str = ""
+        # compares every block against its counterpart; blocks without one
+        # are compared against an empty block, marking every child MISSING
+        return MappingDiff(
+            block.compare(
+                other_blocks[index]
+                if index < len(other_blocks)
+                else Block(block.buffer)
+            )
+            for index, block in enumerate(self.blocks)
+        )
+
+    @traced("diff")
+    def diff(self, other: Mapping) -> str:
+        """Notes the differences between two mappings"""
+        return self.compare(other).to_markdown()
 
-        # adds all the blocks and their differences individually
-        for index, block in enumerate(self.blocks):
-            out_string += f"{block.diff(other_blocks[index])}\n"
+    def to_dict(self) -> dict:
+        """The mapping as JSON serializable data, shaped like
+        MappingDiff.to_dict with every change code 0"""
+        data: dict = MappingDiff(
+            BlockDiff(block.buffer, [LoopChange(child) for child in block.children])
+            for block in self.blocks
+        ).to_dict()
+
+        data["cycles"] = self.cycles
+        data["energy"] = self.energy
 
-        return out_string
+        return data
 
     #########################
     # testing aid functions #
@@ -355,12 +548,4 @@ class Mapping:
 
     def __str__(self) -> str:
         """Converts the mapping into a printable string"""
-
-        # the string we are outputting
-        out_string: str = ""
-
-        # adds all the blocks individually
-        for block in self.blocks:
-            out_string += f"{block}\n"
-
-        return out_string
+        return "".join(f"{block}\n" for block in self.blocks)
@@ -0,0 +1,228 @@
+"""Defines the MappingDiff structure, the result of comparing two mappings.
+
+A MappingDiff is a tree of BlockDiffs, each holding the block's Store and a
+LoopChange per child: the child element and its change code (see the codes
+in mapping.elements.loops). Nothing is formatted until a renderer is called,
+and every renderer writes into a single buffer.
+
+Typical use case:
+changes = mapping.compare(other)
+changes.to_html()
+"""
+# imports type hinting tools
+from __future__ import annotations
+
+# for the renderers
+import html
+import io
+import json
+
+# imports the elements being compared
+from mapping.elements import MappingElement
+from mapping.elements.loops import Loop, LOOP_TYPE, DIM, MISSING
+from mapping.elements.stores import Store
+
+# times the rendering
+from tracing import traced
+
+
+class LoopChange:
+    """A block child and how it differs from its counterpart.
+
+    Attributes:
+        element: The child of the block.
+        code: Its change code, 0 if unchanged or not a Loop.
+    """
+
+    __slots__ = ("element", "code")
+
+    def __init__(self, element: MappingElement, code: int = 0) -> None:
+        """Inits the LoopChange with the element and its change code"""
+        self.element: MappingElement = element
+        self.code: int = code
+
+    def to_dict(self) -> dict:
+        """The change as JSON serializable data"""
+        # non-loop children are only ever shown
+        if not isinstance(self.element, Loop):
+            return {"element": str(self.element), "code": self.code}
+
+        return {
+            "type": self.element._loop_type,
+            "dim": self.element.dim,
+            "start": self.element.start,
+            "end": self.element.end,
+            "code": self.code,
+        }
+
+    def write_markdown(self, out: io.StringIO, emphasis: bool = True) -> None:
+        """Writes the change as a line of markdown, or plain text"""
+        if isinstance(self.element, Loop):
+            out.write(f"\t{self.element.render(self.code, emphasis)}\n")
+        else:
+            out.write(f"\t{self.element}\n")
+
+    def write_html(self, out: io.StringIO) -> None:
+        """Writes the change as a line of HTML, starting on a new line"""
+        element: MappingElement = self.element
+
+        if not isinstance(element, Loop):
+            out.write(f"\n\t{html.escape(str(element))}")
+            return
+
+        code: int = self.code
+        # a loop with nothing to compare against is wholly different
+        if code & MISSING:
+            code |= LOOP_TYPE | DIM
+
+        # escapes the values, then marks them up as the markdown would be
+        loop_type: str = html.escape(element._loop_type)
+        dim: str = html.escape(str(element.dim))
+        if code & LOOP_TYPE:
+            loop_type = f"<em>{loop_type}</em>"
+        if code & DIM:
+            dim = f"<strong>{dim}</strong>"
+
+        # the bounds markers carry no markup
+        bounds: str = element.render(code & ~(LOOP_TYPE | DIM), False)
+        bounds = html.escape(bounds[bounds.index("[") :])
+
+        out.write(f"\n\t{loop_type} {dim} in {bounds}")
+
+
+class BlockDiff:
+    """The changes of one block's children.
+
+    Attributes:
+        store: The Store of the block.
+        changes: A LoopChange per child, in order.
+    """
+
+    __slots__ = ("store", "changes")
+
+    def __init__(self, store: Store, changes: tuple[LoopChange]) -> None:
+        """Inits the BlockDiff with the block's store and child changes"""
+        self.store: Store = store
+        self.changes: tuple[LoopChange] = tuple(changes)
+
+    def to_dict(self) -> dict:
+        """The block's changes as JSON serializable data"""
+        return {
+            "level": self.store.level,
+            "dataspaces": list(self.store.names),
+            "bypass": int(self.store.bypass),
+            "loops": [change.to_dict() for change in self.changes],
+        }
+
+    def write_markdown(self, out: io.StringIO, emphasis: bool = True) -> None:
+        """Writes the block as markdown, as Block.diff emits it"""
+        out.write(f"{self.store}\n")
+
+        for change in self.changes:
+            change.write_markdown(out, emphasis)
+
+    def write_text(self, out: io.StringIO) -> None:
+        """Writes the block as plain text, listing bypassed dataspaces apart"""
+        # the names the store keeps and bypasses
+        names: tuple[str] = self.store.names
+        kept: list[str] = []
+        bypassed: list[str] = []
+        for index, name in enumerate(names):
+            (bypassed if self.store.is_bypassed(index) else kept).append(name)
+
+        out.write(f"buffer {self.store.level} stores ({', '.join(kept)})")
+        if bypassed:
+            out.write(f" bypasses ({', '.join(bypassed)})")
+        out.write("\n")
+
+        for change in self.changes:
+            change.write_markdown(out, False)
+
+    def write_html(self, out: io.StringIO) -> None:
+        """Writes the block as an HTML paragraph"""
+        # bypassed dataspaces are highlighted and struck through
+        spaces: list[str] = [
+            f"<mark><del>{html.escape(name)}</del></mark>"
+            if self.store.is_bypassed(index)
+            else html.escape(name)
+            for index, name in enumerate(self.store.names)
+        ]
+
+        out.write(f"<p>buffer {self.store.level} stores ({', '.join(spaces)})")
+
+        for change in self.changes:
+            change.write_html(out)
+
+        out.write("</p>\n")
+
+
+class MappingDiff:
+    """The changes of every block of a mapping against another mapping.
+
+    Attributes:
+        blocks: A BlockDiff per block, outermost first.
+    """
+
+    __slots__ = ("blocks",)
+
+    def __init__(self, blocks: tuple[BlockDiff]) -> None:
+        """Inits the MappingDiff with its block diffs"""
+        self.blocks: tuple[BlockDiff] = tuple(blocks)
+
+    @property
+    def changed(self) -> int:
+        """The number of children that differ from their counterpart"""
+        return sum(
+            1 for block in self.blocks for change in block.changes if change.code
+        )
+
+    #################
+    # RENDERER FXNS #
+    #################
+
+    def to_markdown(self) -> str:
+        """Renders the diff as the markdown Mapping.diff emits"""
+        out: io.StringIO = io.StringIO()
+
+        for block in self.blocks:
+            block.write_markdown(out)
+            out.write("\n")
+
+        return out.getvalue()
+
+    def to_text(self) -> str:
+        """Renders the diff as plain text. Bound changes keep their ^/v
+        markers, while dim and loop type changes lose their emphasis."""
+        out: io.StringIO = io.StringIO()
+
+        for block in self.blocks:
+            block.write_text(out)
+            out.write("\n")
+
+        return out.getvalue()
+
+    @traced("html")
+    def to_html(self) -> str:
+        """Renders the diff as HTML, without going through markdown"""
+        out: io.StringIO = io.StringIO()
+
+        for block in self.blocks:
+            block.write_html(out)
+
+        return out.getvalue()
+
+    def to_dict(self) -> dict:
+        """The diff as JSON serializable data"""
+        return {"blocks": [block.to_dict() for block in self.blocks]}
+
+    def to_json(self) -> str:
+        """Renders the diff as JSON"""
+        return json.dumps(self.to_dict())
+
+    def __str__(self) -> str:
+        """The markdown rendering of the diff"""
+        return self.to_markdown()
+
+    def __repr__(self) -> str:
+        """A compact summary of the diff"""
+        return f"MappingDiff({len(self.blocks)} blocks, {self.changed} changed)"
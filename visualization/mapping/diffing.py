@@ -0,0 +1,209 @@
+"""Diffs one reference mapping against a whole population of candidates in
+one vectorized pass.
+
+Every candidate loop gets an integer change code, a bitwise or of the flags
+below, computed by comparing it against the reference loop in the same block
+and position, as Mapping.diff does. A MappingDiff, and from it text, is only
+built for the rows asked for.
+
+Typical use case:
+diffs = diff_many(best, table)
+for index in np.argsort(diffs.changed_loops)[:20]:
+    print(diffs.markdown(index))
+"""
+# imports type hinting tools
+from __future__ import annotations
+from typing import Iterable, Union
+
+# imports numpy
+import numpy as np
+
+# imports the mapping representations being compared
+from mapping import Mapping
+from mapping.changes import LoopChange, BlockDiff, MappingDiff
+from mapping.elements.stores import Store
+from mapping.table import MappingTable, LOOP_TYPES
+
+# the change codes, see mapping.elements.loops
+from mapping.elements.loops import (
+    DIM,
+    START_UP,
+    START_DOWN,
+    END_UP,
+    END_DOWN,
+    LOOP_TYPE,
+    MISSING,
+)
+
+
+class BatchDiff:
+    """The change codes of every candidate loop against one reference.
+
+    Attributes:
+        reference: The mapping the candidates were compared against.
+        table: The candidates.
+        codes: The change code of every loop in table, aligned with its loop
+            columns.
+    """
+
+    def __init__(
+        self, reference: Mapping, table: MappingTable, codes: np.ndarray
+    ) -> None:
+        """Inits the BatchDiff with already computed codes"""
+        self.reference: Mapping = reference
+        self.table: MappingTable = table
+        self.codes: np.ndarray = codes
+
+    def __len__(self) -> int:
+        """The number of candidates"""
+        return len(self.table)
+
+    @property
+    def loop_mappings(self) -> np.ndarray:
+        """The candidate each loop belongs to"""
+        return self.table.level_mappings[self.table.loop_levels]
+
+    @property
+    def changed_loops(self) -> np.ndarray:
+        """The number of loops that differ from the reference, per candidate"""
+        return np.bincount(
+            self.loop_mappings, weights=self.codes != 0, minlength=len(self)
+        ).astype(np.int64)
+
+    def has_change(self, code: int) -> np.ndarray:
+        """A boolean mask of the candidates with any loop carrying code"""
+        hits: np.ndarray = np.zeros(len(self), dtype=bool)
+        hits[self.loop_mappings[(self.codes & code) != 0]] = True
+
+        return hits
+
+    ###############
+    # RENDER FXNS #
+    ###############
+
+    def diff(self, index: int) -> MappingDiff:
+        """Builds the structured diff of one candidate against the reference"""
+        table: MappingTable = self.table
+
+        blocks: list[BlockDiff] = []
+
+        level: int
+        for level in range(table.level_offsets[index], table.level_offsets[index + 1]):
+            store: Store = Store(
+                int(table.levels[level]), table.dataspaces, table.bypass[level]
+            )
+
+            # the loops and their codes, straight out of the columns
+            changes: list[LoopChange] = [
+                LoopChange(
+                    LOOP_TYPES[table.loop_types[loop]](
+                        table.dims[table.loop_dims[loop]],
+                        int(table.loop_starts[loop]),
+                        int(table.loop_ends[loop]),
+                    ),
+                    int(self.codes[loop]),
+                )
+                for loop in range(
+                    table.loop_offsets[level], table.loop_offsets[level + 1]
+                )
+            ]
+
+            blocks.append(BlockDiff(store, changes))
+
+        return MappingDiff(blocks)
+
+    def markdown(self, index: int) -> str:
+        """Renders one candidate's diff in the markdown Mapping.diff emits"""
+        return self.diff(index).to_markdown()
+
+    def text(self, index: int) -> str:
+        """Renders one candidate's diff as plain text"""
+        return self.diff(index).to_text()
+
+
+def diff_many(
+    reference: Mapping, candidates: Union[MappingTable, Iterable[Mapping]]
+) -> BatchDiff:
+    """
+    reference:Mapping
+        The mapping to compare against.
+    candidates:Union[MappingTable, Iterable[Mapping]]
+        The mappings being compared.
+
+    returns:
+        The change codes of every candidate loop, from the candidate's point
+        of view, as candidate.diff(reference) would mark it.
+    """
+    table: MappingTable = (
+        candidates
+        if isinstance(candidates, MappingTable)
+        else MappingTable.from_mappings(candidates)
+    )
+
+    ## lays the reference out as dense (block, position) grids ##
+
+    blocks: tuple = reference.blocks
+    shape: tuple[int] = (
+        max(len(blocks), 1),
+        max([len(block.children) for block in blocks] + [1]),
+    )
+
+    # the number of loops in each reference block
+    counts: np.ndarray = np.zeros(shape[0], dtype=np.int64)
+
+    # dims the candidates never use get a code no candidate loop has
+    dim_codes: dict[str, int] = {dim: code for code, dim in enumerate(table.dims)}
+
+    reference_dims: np.ndarray = np.full(shape, -1, dtype=np.int64)
+    reference_starts: np.ndarray = np.zeros(shape, dtype=np.int64)
+    reference_ends: np.ndarray = np.zeros(shape, dtype=np.int64)
+    reference_types: np.ndarray = np.full(shape, -1, dtype=np.int64)
+
+    for block_index, block in enumerate(blocks):
+        counts[block_index] = len(block.children)
+
+        for loop_index, loop in enumerate(block.children):
+            reference_dims[block_index, loop_index] = dim_codes.get(loop.dim, -1)
+            reference_starts[block_index, loop_index] = loop.start
+            reference_ends[block_index, loop_index] = loop.end
+            reference_types[block_index, loop_index] = LOOP_TYPES.index(type(loop))
+
+    ## finds every candidate loop's position ##
+
+    loop_levels: np.ndarray = table.loop_levels
+    level_mappings: np.ndarray = table.level_mappings
+
+    # the block of each level row within its mapping, and of each loop
+    level_positions: np.ndarray = (
+        np.arange(len(table.levels)) - table.level_offsets[level_mappings]
+    )
+    loop_blocks: np.ndarray = level_positions[loop_levels]
+    # the position of each loop within its block
+    loop_positions: np.ndarray = (
+        np.arange(len(table.loop_dims)) - table.loop_offsets[loop_levels]
+    )
+
+    # loops past the end of the reference have nothing to compare with
+    rows: np.ndarray = np.minimum(loop_blocks, shape[0] - 1)
+    present: np.ndarray = (loop_blocks < len(blocks)) & (loop_positions < counts[rows])
+    columns: np.ndarray = np.minimum(loop_positions, shape[1] - 1)
+
+    ## compares every loop against its reference in one pass ##
+
+    starts: np.ndarray = table.loop_starts
+    ends: np.ndarray = table.loop_ends
+    other_starts: np.ndarray = reference_starts[rows, columns]
+    other_ends: np.ndarray = reference_ends[rows, columns]
+
+    codes: np.ndarray = (
+        (table.loop_dims != reference_dims[rows, columns]) * DIM
+        | (starts > other_starts) * START_UP
+        | (starts < other_starts) * START_DOWN
+        | (ends > other_ends) * END_UP
+        | (ends < other_ends) * END_DOWN
+        | (table.loop_types != reference_types[rows, columns]) * LOOP_TYPE
+    )
+
+    return BatchDiff(
+        reference, table, np.where(present, codes, MISSING).astype(np.uint8)
+    )
@@ -3,6 +3,9 @@
 This file describes an abstract class and its equality operators for use by the
 rest of the mapping library.
 
+Mapping elements are immutable, so identical ones are interned: constructing
+an element equal to one still alive returns the existing instance.
+
 Typical usage example:
 class Foo(MappingElement):
     pass
@@ -11,15 +14,82 @@ class Foo(MappingElement):
 from __future__ import annotations
 
 # imports abstract classes
-from abc import ABC, abstractmethod
+from abc import abstractmethod
+
+# for the table of live elements
+from typing import Hashable
+from weakref import WeakValueDictionary
+
+# whether identical elements are shared. Only meant to be turned off to measure it.
+INTERN: bool = True
+
+# every live interned element, keyed by its class and constructor arguments
+_interned: WeakValueDictionary = WeakValueDictionary()
+
+
+class Interned(type):
+    """Metaclass that returns the existing instance when a class is called
+    with arguments identical to a still living instance's."""
+
+    def __call__(cls, *args, **kwargs) -> MappingElement:
+        """Looks the arguments up before constructing a new instance"""
+        if not INTERN:
+            return super().__call__(*args, **kwargs)
+
+        # unhashable arguments cannot be looked up, so are never shared
+        try:
+            key: tuple = (cls, cls._intern_key(*args, **kwargs))
+            return _interned[key]
+        except TypeError:
+            return super().__call__(*args, **kwargs)
+        except KeyError:
+            pass
 
-# imports numpy
-import numpy as np
+        element: MappingElement = super().__call__(*args, **kwargs)
+        _interned[key] = element
 
+        return element
 
-class MappingElement:
+
+class MappingElement(metaclass=Interned):
     """An abstract class representing all mapping elements"""
 
+    # interning keeps weak references to elements
+    __slots__ = ("__weakref__",)
+
+    # the names of the slots holding the element's state, across its bases
+    _state_slots: tuple[str] = ()
+
+    @classmethod
+    def _intern_key(cls, *args, **kwargs) -> Hashable:
+        """Normalizes constructor arguments into the key identical instances
+        are shared under. Subclasses with defaults or mutable arguments
+        should override it.
+
+        Raises:
+            TypeError: If the arguments are unhashable.
+        """
+        return (args, tuple(sorted(kwargs.items())))
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Collects the state slots of every new element class"""
+        super().__init_subclass__(**kwargs)
+
+        cls._state_slots = tuple(
+            name
+            for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get("__slots__", ())
+            if name not in ("__weakref__", "__dict__")
+        )
+
+    def _state(self) -> tuple:
+        """The values that make up the element, in slot order"""
+        return tuple(getattr(self, name) for name in self._state_slots)
+
+    def __hash__(self) -> int:
+        """Hashes the element's values, consistently with __eq__"""
+        return hash(self._state())
+
     def __eq__(self, other: MappingElement) -> bool:
         """Defines strict equality between two mapping elements.
 
@@ -30,6 +100,10 @@ class MappingElement:
         Returns:
             A boolean describing if the two objects are equal
         """
+        # interned elements are equal iff they are the same instance
+        if self is other:
+            return True
+
         # makes sure other is a MappingElement
         if not isinstance(other, MappingElement):
             raise TypeError(f"Cannot compare MappingElement to {type(other)}")
@@ -38,21 +112,10 @@ class MappingElement:
         if not isinstance(other, type(self)):
             return False
 
-        # they're equal if they share all the same vars
-        own_vals: dict = vars(self)
-        other_vals: dict = vars(other)
-
-        # goes through all vars to check equality
-        for var, val in own_vals.items():
-            # check var exists in other
-            if var not in other_vals:
-                return False
-            # checks the values are equal
-            if other_vals[var] != val:
-                return False
-
-        # if you made it here, all equal, true
-        return True
+        # they're equal if they share all the same state
+        return self._state() == tuple(
+            getattr(other, name) for name in self._state_slots
+        )
 
     @abstractmethod
     def __str__(self) -> str:
@@ -65,6 +128,9 @@ class Distinguishable:
     """Makes an object able to list key differences between itself and another
     object of its type."""
 
+    # adds no state to the classes it is mixed into
+    __slots__ = ()
+
     @abstractmethod
     def diff(self, other) -> str:
         """Creates a string marking the differences between oneself and another
@@ -78,6 +144,19 @@ class Distinguishable:
         """
         raise NotImplementedError(f"{type(self)} has not implemented diffstring")
 
+    @abstractmethod
+    def compare(self, other) -> int:
+        """Encodes the differences between oneself and another member of the
+        class as a change code.
+
+        Attributes:
+            other -- of the same type as self. To be comapred against.
+
+        Returns:
+            An int, 0 if there are no differences.
+        """
+        raise NotImplementedError(f"{type(self)} has not implemented compare")
+
     @abstractmethod
     def blank(self) -> Distinguishable:
         """Creates a "blank" version of the element, signifying a trivial
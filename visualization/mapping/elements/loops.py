@@ -12,6 +12,24 @@ from typing import Self
 # imports super classes
 from mapping.elements import MappingElement, Distinguishable
 
+################
+# CHANGE CODES #
+################
+# How a loop differs from the one it is compared against, OR'd together.
+
+# the loop iterates over a different dim
+DIM: int = 1
+# the loop starts later (^) or earlier (v)
+START_UP: int = 2
+START_DOWN: int = 4
+# the loop ends later (^) or earlier (v)
+END_UP: int = 8
+END_DOWN: int = 16
+# the loop is of a different type, e.g. par-for instead of for
+LOOP_TYPE: int = 32
+# there is no loop to compare against
+MISSING: int = 64
+
 
 class Loop(MappingElement, Distinguishable):
     """A mapping element representing a generic loop.
@@ -22,11 +40,19 @@ class Loop(MappingElement, Distinguishable):
         end: End of iteration.
     """
 
+    # The state of every loop, without a per-instance __dict__
+    __slots__ = ("_dim", "_start", "_end")
+
     # The general format any printout should be in
     _frame: str = "{loop_type} {dim} in [{start}, {end})"
     # Notes this is a generic loop
     _loop_type: str = "loop"
 
+    @classmethod
+    def _intern_key(cls, dim: str, start: int, end: int) -> tuple:
+        """Loops are identical if they share dim and bounds"""
+        return (dim, start, end)
+
     def __init__(self, dim: str, start: int, end: int) -> None:
         """Inits Loop with dimension, start, and end"""
         assert start < end, f"start:{start} >= end:{end}"
@@ -65,55 +91,78 @@ class Loop(MappingElement, Distinguishable):
     # COMPARISON FXNS #
     ###################
 
-    def diff(self, other: Loop) -> str:
-        """Notes the differences between each loop"""
+    def compare(self, other: Loop) -> int:
+        """Returns the change code marking how self differs from other"""
         if not isinstance(other, Loop):
             raise TypeError(f"{type(other)} cannot be compared with loops")
 
-        # if the two are equal, just return the str
+        # if the two are equal, there is nothing to note
         if self == other:
-            # tests that the equality function is true implicitly
-            assert str(self) == str(
-                other
-            ), f"{self} and {other} evaluated as the same but aren't."
+            return 0
 
-            # returns the string, as the two should be the same
-            return str(self)
-
-        # tests that the equality function is untrue implicitly
-        assert str(self) != str(
-            other
-        ), f"{self} and {other} evaluated as different but aren't."
-
-        # strings representing the printout variables
-        loop_type: str = self._loop_type
-        dim: str = str(self.dim)
-        start: str = str(self.start)
-        end: str = str(self.end)
+        code: int = 0
 
         # checks if loop type is equal, if not, note
         if not isinstance(self, type(other)):
-            loop_type = f"*{loop_type}*"
+            code |= LOOP_TYPE
 
         # checks if dim is equal, if not, note.
         if self.dim != other.dim:
-            dim = f"**{dim}**"
+            code |= DIM
 
         # checks if start are equal, if not, note whether or not this is is an
         # increase or decrease
         if self.start < other.start:
-            start = f"{start} v"
+            code |= START_DOWN
         elif self.start > other.start:
-            start = f"{start} ^"
+            code |= START_UP
 
         # does the start check but for end
         if self.end < other.end:
-            end = f"{end} v"
+            code |= END_DOWN
         elif self.end > other.end:
+            code |= END_UP
+
+        return code
+
+    def render(self, code: int = 0, emphasis: bool = True) -> str:
+        """Formats the loop with the markers of a change code.
+
+        Attributes:
+            code -- the change code, as returned by compare.
+            emphasis -- whether to mark dim and loop type changes in markdown.
+        """
+        # strings representing the printout variables
+        loop_type: str = self._loop_type
+        dim: str = str(self.dim)
+        start: str = str(self.start)
+        end: str = str(self.end)
+
+        # a loop with nothing to compare against is wholly different
+        if code & MISSING:
+            code |= LOOP_TYPE | DIM
+
+        if emphasis and code & LOOP_TYPE:
+            loop_type = f"*{loop_type}*"
+        if emphasis and code & DIM:
+            dim = f"**{dim}**"
+
+        if code & START_DOWN:
+            start = f"{start} v"
+        elif code & START_UP:
+            start = f"{start} ^"
+
+        if code & END_DOWN:
+            end = f"{end} v"
+        elif code & END_UP:
             end = f"{end} ^"
 
         return self._frame.format(loop_type=loop_type, dim=dim, start=start, end=end)
 
+    def diff(self, other: Loop) -> str:
+        """Notes the differences between each loop"""
+        return self.render(self.compare(other))
+
     #########################
     # testing aid functions #
     #########################
@@ -133,6 +182,8 @@ class Loop(MappingElement, Distinguishable):
 class For(Loop):
     """A mapping element representing a serial loop."""
 
+    __slots__ = ()
+
     # string representation of what type of loop this is
     _loop_type = "for"
 
@@ -140,5 +191,7 @@ class For(Loop):
 class ParFor(Loop):
     """A mapping element representing a parallel loop."""
 
+    __slots__ = ()
+
     # string representation of what type of loop this is
     _loop_type = "par-for"
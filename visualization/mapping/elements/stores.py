@@ -19,12 +19,29 @@ class Store(MappingElement):
         dataspaces: The dataspaces the buffer contains.
     """
 
+    # The state of every store, without a per-instance __dict__
+    __slots__ = ("_level", "_dataspaces", "_bypass")
+
     # The general format any printout should be in
     _frame: str = "buffer {level} stores {dataspaces}"
+    # How a bypassed dataspace is marked, ==highlight== and ~~strikethrough~~
+    _bypassed: str = "==~~{}~~=="
+
+    @classmethod
+    def _intern_key(
+        cls, level: int, dataspaces: tuple[str], bypass: np.uint32 = 0
+    ) -> tuple:
+        """Stores are identical if they share level, dataspaces and the bypass
+        of those dataspaces"""
+        return (level, tuple(dataspaces), int(bypass) & ((1 << len(dataspaces)) - 1))
 
     def __init__(self, level: int, dataspaces: tuple[str], bypass: np.uint32 = 0):
         """Inits Store with buffer level, data, and prunes bypass from data"""
         self._level: int = level
+        # the bypass mask, kept so the Store can be re-encoded. Bits past the
+        # last dataspace mean nothing, so are cleared rather than telling
+        # otherwise equal stores apart.
+        self._bypass: np.uint32 = bypass & ((1 << len(dataspaces)) - 1)
 
         # the data living in this space, post bypass
         resident_spaces: list = []
@@ -38,7 +55,7 @@ class Store(MappingElement):
 
             # if it was, mark that the dataspace was bypassed with ~ ~ for strikethrough
             else:
-                resident_spaces.append(f"==~~{space}~~==")
+                resident_spaces.append(self._bypassed.format(space))
 
         self._dataspaces: tuple = tuple(resident_spaces)
 
@@ -78,3 +95,28 @@ class Store(MappingElement):
     def dataspaces(self):
         """Getter for self._dataspaces"""
         return self._dataspaces
+
+    def is_bypassed(self, index: int) -> bool:
+        """Whether the dataspace at index is bypassed"""
+        return bool((int(self._bypass) >> index) & 0b1)
+
+    @property
+    def names(self) -> tuple[str]:
+        """The dataspace names, without the bypass markings"""
+        # the length of the marking around a bypassed name
+        prefix: int = self._bypassed.index("{")
+        suffix: int = len(self._bypassed) - self._bypassed.index("}") - 1
+
+        return tuple(
+            space[prefix : len(space) - suffix] if self.is_bypassed(index) else space
+            for index, space in enumerate(self._dataspaces)
+        )
+
+    ########################
+    # BYPASS ACCESSOR FXNS #
+    ########################
+
+    @property
+    def bypass(self):
+        """Getter for self._bypass"""
+        return self._bypass
@@ -0,0 +1,501 @@
+"""Defines the MappingTable class, a columnar store for large populations of
+mappings.
+
+Every mapping is kept as rows of flat typed arrays rather than as Mapping,
+Block and Loop objects. Levels and loops are ragged arrays: an offsets array
+per parent (mapping -> levels, level -> loops) pointing into the value arrays.
+A Mapping is only built when asked for.
+
+Typical use case:
+table = MappingTable.from_records(iter_records(file))
+best = table.take(np.flatnonzero(table.has_loop("k", level=1, loop_type=ParFor)))
+mapping = best[0]
+"""
+# imports type hinting tools
+from __future__ import annotations
+from typing import Iterable, Iterator, Sequence, Union
+
+# typed growable buffers for building the columns
+from array import array
+
+# imports numpy
+import numpy as np
+
+# imports the object representation we materialize into
+from mapping import Mapping
+from mapping.elements import MappingElement
+from mapping.elements.loops import Loop, For, ParFor
+from mapping.elements.stores import Store
+
+# the loop classes, indexed by the loop type code stored in the table
+LOOP_TYPES: tuple[type[Loop]] = (For, ParFor)
+
+# the dataspaces assumed when none are given
+DEFAULT_DATASPACES: tuple[str] = ("A", "B", "Z")
+
+# the width of a bypass mask in the timeloop printout
+MASK_BITS: int = 32
+
+# how many printout masks a table builder holds before decoding them, so a
+# streaming parse never holds the masks of the whole population
+MASK_BATCH: int = 1 << 14
+
+
+def decode_masks(masks: list[str], dataspaces: tuple[str]) -> np.ndarray:
+    """Decodes printout bypass masks into Store bypass values in one pass.
+
+    Args:
+        masks: The mask strings, e.g. "000...0101", where a 1 marks a stored
+            dataspace and the right-most character is dataspace 0.
+        dataspaces: The dataspaces the masks describe.
+
+    Returns:
+        The bypass of each mask, where a set bit marks a bypassed dataspace.
+
+    Raises:
+        ValueError: If there are more dataspaces than a mask has bits.
+    """
+    # a Store's bypass holds one bit per dataspace
+    if len(dataspaces) > MASK_BITS:
+        raise ValueError(
+            f"{len(dataspaces)} dataspaces do not fit a {MASK_BITS} bit bypass mask"
+        )
+
+    # bits past the last dataspace mean nothing
+    full_mask: np.uint32 = np.uint32((1 << len(dataspaces)) - 1)
+
+    # the masks as one buffer, each mask followed by a separator
+    raw: bytes = ";".join(masks).encode("ascii") + b";"
+
+    # the characters as one row per mask, if the masks could all be full width
+    rows: np.ndarray = None
+    if len(raw) == len(masks) * (MASK_BITS + 1):
+        rows = np.frombuffer(raw, dtype=np.uint8).reshape(-1, MASK_BITS + 1)
+
+        # ragged masks can add up to the same length, but then some separator
+        # falls outside the last column
+        if not (rows[:, MASK_BITS] == ord(";")).all():
+            rows = None
+
+    if rows is not None:
+        # every mask is full width: view the characters as a bit matrix
+        bits: np.ndarray = rows[:, :MASK_BITS] == ord("1")
+
+        # packs each row, most significant bit first, into a big endian word
+        stored: np.ndarray = np.packbits(bits, axis=1).view(">u4").ravel()
+    else:
+        # ragged widths, fall back to decoding them one at a time
+        stored = np.fromiter(
+            (int(mask, 2) for mask in masks), dtype=np.uint64, count=len(masks)
+        )
+
+    return ~stored.astype(np.uint32) & full_mask
+
+
+def _ragged_take(offsets: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray]:
+    """Gathers the children of rows out of a ragged array.
+
+    Args:
+        offsets: The offsets of the ragged array, one more than its rows.
+        rows: The rows to gather, in order.
+
+    Returns:
+        The positions of the gathered children in the value arrays, and the
+        offsets of the gathered ragged array.
+    """
+    # the number of children each row has
+    counts: np.ndarray = offsets[rows + 1] - offsets[rows]
+
+    # the offsets of the rows in the gathered array
+    new_offsets: np.ndarray = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+
+    # shifts each gathered child back to where it came from
+    positions: np.ndarray = np.arange(new_offsets[-1], dtype=np.int64)
+    positions += np.repeat(offsets[rows] - new_offsets[:-1], counts)
+
+    return positions, new_offsets
+
+
+class MappingTable:
+    """Represents a population of mappings as flat columns.
+
+    Attributes:
+        dims: The dimension names, indexed by the dim codes.
+        dataspaces: The dataspaces every Store holds.
+        cycles: The cycles of each mapping, NaN if unknown.
+        energy: The energy of each mapping, NaN if unknown.
+        level_offsets: Where each mapping's levels start, outermost first.
+        levels: The storage level of each level row.
+        bypass: The bypass mask of each level row.
+        loop_offsets: Where each level row's loops start.
+        loop_dims: The dim code of each loop.
+        loop_starts: The start of each loop.
+        loop_ends: The end of each loop.
+        loop_types: The index into LOOP_TYPES of each loop.
+    """
+
+    def __init__(
+        self,
+        dims: tuple[str],
+        dataspaces: tuple[str],
+        cycles: np.ndarray,
+        energy: np.ndarray,
+        level_offsets: np.ndarray,
+        levels: np.ndarray,
+        bypass: np.ndarray,
+        loop_offsets: np.ndarray,
+        loop_dims: np.ndarray,
+        loop_starts: np.ndarray,
+        loop_ends: np.ndarray,
+        loop_types: np.ndarray,
+    ) -> None:
+        """Inits the MappingTable from already built columns"""
+        self.dims: tuple[str] = tuple(dims)
+        self.dataspaces: tuple[str] = tuple(dataspaces)
+
+        # mapping columns
+        self.cycles: np.ndarray = cycles
+        self.energy: np.ndarray = energy
+        self.level_offsets: np.ndarray = level_offsets
+
+        # level columns
+        self.levels: np.ndarray = levels
+        self.bypass: np.ndarray = bypass
+        self.loop_offsets: np.ndarray = loop_offsets
+
+        # loop columns
+        self.loop_dims: np.ndarray = loop_dims
+        self.loop_starts: np.ndarray = loop_starts
+        self.loop_ends: np.ndarray = loop_ends
+        self.loop_types: np.ndarray = loop_types
+
+    #################
+    # BUILDING FXNS #
+    #################
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[tuple[str, str, str, str]],
+        dataspaces: tuple[str] = DEFAULT_DATASPACES,
+    ) -> MappingTable:
+        """Builds the table straight from timeloop printout records, as
+        yielded by parsing.iter_records, without building any Mapping."""
+        builder: _TableBuilder = _TableBuilder(dataspaces)
+
+        for record in records:
+            builder.append_record(*record)
+
+        return builder.build()
+
+    @classmethod
+    def from_mappings(
+        cls,
+        mappings: Iterable[Mapping],
+        dataspaces: tuple[str] = DEFAULT_DATASPACES,
+    ) -> MappingTable:
+        """Builds the table from existing Mapping objects"""
+        builder: _TableBuilder = _TableBuilder(dataspaces)
+
+        for mapping in mappings:
+            builder.append_mapping(mapping)
+
+        return builder.build()
+
+    @classmethod
+    def concatenate(cls, tables: Sequence[MappingTable]) -> MappingTable:
+        """Joins tables end to end, merging their dim string tables"""
+        if not tables:
+            raise ValueError("Need at least one table to concatenate")
+
+        # every table must describe the same workload
+        dataspaces: tuple[str] = tables[0].dataspaces
+        for table in tables:
+            if table.dataspaces != dataspaces:
+                raise ValueError(
+                    f"Cannot concatenate {table.dataspaces} with {dataspaces}"
+                )
+
+        # the merged dim string table
+        dims: dict[str, int] = {}
+        loop_dims: list[np.ndarray] = []
+        for table in tables:
+            # recodes the table's dims into the merged string table
+            codes: np.ndarray = np.array(
+                [dims.setdefault(dim, len(dims)) for dim in table.dims], dtype=np.int16
+            )
+            loop_dims.append(codes[table.loop_dims])
+
+        def join_offsets(offsets: list[np.ndarray]) -> np.ndarray:
+            """Joins offsets arrays, shifting each by the children before it"""
+            shifts: np.ndarray = np.cumsum([0] + [part[-1] for part in offsets[:-1]])
+            return np.concatenate(
+                [offsets[0][:1]]
+                + [part[1:] + shift for part, shift in zip(offsets, shifts)]
+            )
+
+        return MappingTable(
+            tuple(dims),
+            dataspaces,
+            np.concatenate([table.cycles for table in tables]),
+            np.concatenate([table.energy for table in tables]),
+            join_offsets([table.level_offsets for table in tables]),
+            np.concatenate([table.levels for table in tables]),
+            np.concatenate([table.bypass for table in tables]),
+            join_offsets([table.loop_offsets for table in tables]),
+            np.concatenate(loop_dims).astype(np.int16),
+            np.concatenate([table.loop_starts for table in tables]),
+            np.concatenate([table.loop_ends for table in tables]),
+            np.concatenate([table.loop_types for table in tables]),
+        )
+
+    ######################
+    # MATERIALIZING FXNS #
+    ######################
+
+    def __len__(self) -> int:
+        """The number of mappings in the table"""
+        return len(self.level_offsets) - 1
+
+    def __getitem__(self, index: int) -> Mapping:
+        """Materializes the mapping at index"""
+        # supports negative indexing like a list
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"mapping {index} out of range")
+
+        # the elements of the mapping, outermost first
+        elements: list[MappingElement] = []
+
+        level: int
+        for level in range(self.level_offsets[index], self.level_offsets[index + 1]):
+            elements.append(
+                Store(int(self.levels[level]), self.dataspaces, self.bypass[level])
+            )
+
+            loop: int
+            for loop in range(self.loop_offsets[level], self.loop_offsets[level + 1]):
+                elements.append(
+                    LOOP_TYPES[self.loop_types[loop]](
+                        self.dims[self.loop_dims[loop]],
+                        int(self.loop_starts[loop]),
+                        int(self.loop_ends[loop]),
+                    )
+                )
+
+        # unknown performance is stored as NaN
+        cycles: float = self.cycles[index]
+        energy: float = self.energy[index]
+
+        return Mapping(
+            elements,
+            None if np.isnan(cycles) else int(cycles),
+            None if np.isnan(energy) else float(energy),
+        )
+
+    def __iter__(self) -> Iterator[Mapping]:
+        """Materializes every mapping in order"""
+        for index in range(len(self)):
+            yield self[index]
+
+    def take(self, indices: Union[Iterable[int], np.ndarray]) -> MappingTable:
+        """Returns a new table of the mappings at indices, in that order"""
+        rows: np.ndarray = np.asarray(indices, dtype=np.int64)
+
+        # gathers the levels of the rows, then the loops of those levels
+        level_rows, level_offsets = _ragged_take(self.level_offsets, rows)
+        loop_rows, loop_offsets = _ragged_take(self.loop_offsets, level_rows)
+
+        return MappingTable(
+            self.dims,
+            self.dataspaces,
+            self.cycles[rows],
+            self.energy[rows],
+            level_offsets,
+            self.levels[level_rows],
+            self.bypass[level_rows],
+            loop_offsets,
+            self.loop_dims[loop_rows],
+            self.loop_starts[loop_rows],
+            self.loop_ends[loop_rows],
+            self.loop_types[loop_rows],
+        )
+
+    ###############
+    # FILTER FXNS #
+    ###############
+
+    @property
+    def level_mappings(self) -> np.ndarray:
+        """The mapping each level row belongs to"""
+        return np.repeat(
+            np.arange(len(self), dtype=np.int64), np.diff(self.level_offsets)
+        )
+
+    @property
+    def loop_levels(self) -> np.ndarray:
+        """The level row each loop belongs to"""
+        return np.repeat(
+            np.arange(len(self.levels), dtype=np.int64), np.diff(self.loop_offsets)
+        )
+
+    def has_loop(
+        self,
+        dim: str = None,
+        level: int = None,
+        loop_type: type[Loop] = None,
+    ) -> np.ndarray:
+        """Finds the mappings with at least one loop matching all the given
+        criteria, without building any Mapping.
+
+        Args:
+            dim: The dimension the loop iterates over.
+            level: The storage level whose block holds the loop.
+            loop_type: The class of the loop, e.g. ParFor.
+
+        Returns:
+            A boolean mask over the mappings.
+        """
+        # the loops matching every criterion
+        matches: np.ndarray = np.ones(len(self.loop_dims), dtype=bool)
+
+        if dim is not None:
+            # a dim never seen cannot match
+            if dim not in self.dims:
+                return np.zeros(len(self), dtype=bool)
+            matches &= self.loop_dims == self.dims.index(dim)
+
+        if loop_type is not None:
+            matches &= self.loop_types == LOOP_TYPES.index(loop_type)
+
+        # the level rows owning the matching loops
+        owners: np.ndarray = self.loop_levels[matches]
+
+        if level is not None:
+            owners = owners[self.levels[owners] == level]
+
+        # marks the mappings owning a matching loop
+        hits: np.ndarray = np.zeros(len(self), dtype=bool)
+        hits[self.level_mappings[owners]] = True
+
+        return hits
+
+
+class _TableBuilder:
+    """Accumulates mappings into typed buffers for a MappingTable."""
+
+    def __init__(self, dataspaces: tuple[str]) -> None:
+        """Inits the empty columns"""
+        self._dataspaces: tuple[str] = tuple(dataspaces)
+
+        # the dim string table
+        self._dims: dict[str, int] = {}
+
+        # mapping columns
+        self._cycles: array = array("d")
+        self._energy: array = array("d")
+        self._level_offsets: array = array("q", [0])
+
+        # level columns
+        self._levels: array = array("h")
+        self._bypass: array = array("I")
+        # printout masks not yet decoded into self._bypass
+        self._masks: list[str] = []
+        self._loop_offsets: array = array("q", [0])
+
+        # loop columns
+        self._loop_dims: array = array("h")
+        self._loop_starts: array = array("q")
+        self._loop_ends: array = array("q")
+        self._loop_types: array = array("b")
+
+    def _dim_code(self, dim: str) -> int:
+        """Interns dim into the string table"""
+        return self._dims.setdefault(dim, len(self._dims))
+
+    def append_record(
+        self, loop_info: str, storage_levels: str, bypass_masks: str, data: str
+    ) -> None:
+        """Appends a timeloop printout record, in the format read by
+        parsing.build_mapping"""
+        # the loops, innermost first
+        loops: list[list[str]] = [loop.split(",") for loop in loop_info.split(";")]
+        # the index of the outermost loop each level holds, innermost level first
+        boundaries: list[int] = [int(level) for level in storage_levels.split(";")]
+        # the masks, decoded in bulk once MASK_BATCH are pending
+        masks: list[str] = bypass_masks.split(";")
+
+        # walks the levels outermost first, as Mapping does
+        for Lval in range(len(boundaries) - 1, -1, -1):
+            inner: int = boundaries[Lval - 1] + 1 if Lval else 0
+
+            self._levels.append(Lval)
+            self._masks.append(masks[Lval])
+            if len(self._masks) >= MASK_BATCH:
+                self._flush_masks()
+
+            for dim, start, end in reversed(loops[inner : boundaries[Lval] + 1]):
+                self._loop_dims.append(self._dim_code(dim))
+                self._loop_starts.append(int(start))
+                self._loop_ends.append(int(end))
+                self._loop_types.append(0)
+
+            self._loop_offsets.append(len(self._loop_dims))
+
+        self._level_offsets.append(len(self._levels))
+
+        # performance information
+        cycles, energy = data.split(";")
+        self._cycles.append(int(float(cycles)))
+        self._energy.append(float(energy))
+
+    def append_mapping(self, mapping: Mapping) -> None:
+        """Appends an existing Mapping"""
+        # keeps the bypass column in level order
+        self._flush_masks()
+
+        for block in mapping.blocks:
+            self._levels.append(block.level)
+            self._bypass.append(int(block.buffer.bypass))
+
+            loop: Loop
+            for loop in block.children:
+                self._loop_dims.append(self._dim_code(loop.dim))
+                self._loop_starts.append(loop.start)
+                self._loop_ends.append(loop.end)
+                self._loop_types.append(LOOP_TYPES.index(type(loop)))
+
+            self._loop_offsets.append(len(self._loop_dims))
+
+        self._level_offsets.append(len(self._levels))
+
+        # unknown performance is stored as NaN
+        self._cycles.append(np.nan if mapping.cycles is None else mapping.cycles)
+        self._energy.append(np.nan if mapping.energy is None else mapping.energy)
+
+    def _flush_masks(self) -> None:
+        """Decodes the pending printout masks into the bypass column"""
+        if self._masks:
+            self._bypass.extend(decode_masks(self._masks, self._dataspaces))
+            self._masks = []
+
+    def build(self) -> MappingTable:
+        """Freezes the buffers into a MappingTable"""
+        self._flush_masks()
+
+        return MappingTable(
+            tuple(self._dims),
+            self._dataspaces,
+            np.frombuffer(self._cycles, dtype=np.float64),
+            np.frombuffer(self._energy, dtype=np.float64),
+            np.frombuffer(self._level_offsets, dtype=np.int64),
+            np.frombuffer(self._levels, dtype=np.int16),
+            np.frombuffer(self._bypass, dtype=np.uint32),
+            np.frombuffer(self._loop_offsets, dtype=np.int64),
+            np.frombuffer(self._loop_dims, dtype=np.int16),
+            np.frombuffer(self._loop_starts, dtype=np.int64),
+            np.frombuffer(self._loop_ends, dtype=np.int64),
+            np.frombuffer(self._loop_types, dtype=np.int8),
+        )
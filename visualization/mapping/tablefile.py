@@ -0,0 +1,160 @@
+"""Defines the binary file format MappingTables are saved in.
+
+The file is a fixed header, a JSON metadata block holding the string tables
+(dims, dataspaces), the column layout and any caller metadata, then every
+column as raw fixed-width values, each aligned so it can be memory-mapped in
+place.
+
+Typical use case:
+write_table(table, "sweep.tlmt", {"source": "sweep.txt"})
+table, meta = read_table("sweep.tlmt")
+"""
+# imports type hinting tools
+from __future__ import annotations
+
+# for the header and metadata
+import json
+import os
+import struct
+
+# imports numpy
+import numpy as np
+
+# imports the class being stored
+from mapping.table import MappingTable
+
+# identifies the file type and layout version
+MAGIC: bytes = b"TLMTABLE"
+VERSION: int = 1
+# magic, version, metadata length
+HEADER: struct.Struct = struct.Struct("<8sII")
+# every column starts on a multiple of this
+ALIGNMENT: int = 64
+
+# the numeric columns, in the order MappingTable takes them
+COLUMNS: tuple[str] = (
+    "cycles",
+    "energy",
+    "level_offsets",
+    "levels",
+    "bypass",
+    "loop_offsets",
+    "loop_dims",
+    "loop_starts",
+    "loop_ends",
+    "loop_types",
+)
+
+
+def _align(offset: int) -> int:
+    """Rounds offset up to the next column boundary"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_table(table: MappingTable, path: str, meta: dict = None) -> None:
+    """Writes table to path, atomically replacing any existing file.
+
+    Args:
+        table: The table to save.
+        path: Where to save it.
+        meta: JSON serializable caller data stored alongside, e.g. a cache key.
+    """
+    # the columns as contiguous little endian arrays
+    columns: list[np.ndarray] = []
+    for name in COLUMNS:
+        column: np.ndarray = getattr(table, name)
+        columns.append(
+            np.ascontiguousarray(column, dtype=column.dtype.newbyteorder("<"))
+        )
+
+    # lays the columns out relative to the end of the metadata
+    layout: list[dict] = []
+    relative: int = 0
+    for name, column in zip(COLUMNS, columns):
+        relative = _align(relative)
+        layout.append(
+            {
+                "name": name,
+                "dtype": column.dtype.str,
+                "length": len(column),
+                "offset": relative,
+            }
+        )
+        relative += column.nbytes
+
+    metadata: bytes = json.dumps(
+        {
+            "dims": list(table.dims),
+            "dataspaces": list(table.dataspaces),
+            "columns": layout,
+            "meta": meta or {},
+        }
+    ).encode("utf-8")
+
+    # the columns start after the header and metadata
+    data_start: int = _align(HEADER.size + len(metadata))
+
+    # writes to a temporary file so readers never see a partial table
+    temporary: str = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(metadata)))
+        file.write(metadata)
+
+        for column, entry in zip(columns, layout):
+            # pads up to the column's offset
+            file.write(b"\0" * (data_start + entry["offset"] - file.tell()))
+            file.write(column.tobytes())
+
+    os.replace(temporary, path)
+
+
+def _read_header(path: str) -> tuple[dict, int]:
+    """Reads the metadata block of a table file and where its columns start.
+
+    Raises:
+        ValueError: If the file is not a table file of this version.
+    """
+    with open(path, "rb") as file:
+        magic, version, length = HEADER.unpack(file.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} mapping table")
+
+        metadata: dict = json.loads(file.read(length))
+
+    return metadata, _align(HEADER.size + length)
+
+
+def read_meta(path: str) -> dict:
+    """Reads only the caller metadata of a table file, without mapping it"""
+    return _read_header(path)[0]["meta"]
+
+
+def read_table(path: str) -> tuple[MappingTable, dict]:
+    """Memory-maps the table saved at path.
+
+    The columns are read-only views of the file, so loading is near instant
+    and processes loading the same file share its pages.
+
+    Returns:
+        The table and the caller metadata it was written with.
+    """
+    metadata, data_start = _read_header(path)
+
+    # maps the file once, every column is a view into it
+    raw: np.ndarray = np.memmap(path, dtype=np.uint8, mode="r")
+
+    columns: list[np.ndarray] = []
+    for entry in metadata["columns"]:
+        dtype: np.dtype = np.dtype(entry["dtype"])
+        start: int = data_start + entry["offset"]
+
+        columns.append(
+            raw[start : start + entry["length"] * dtype.itemsize].view(dtype)
+        )
+
+    table: MappingTable = MappingTable(
+        metadata["dims"], metadata["dataspaces"], *columns
+    )
+
+    return table, metadata["meta"]
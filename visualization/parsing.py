@@ -1,96 +1,425 @@
 # gets the classes we constructed
 from mapping.elements.stores import Store
-from mapping.elements.loops import For, ParFor
-from mapping import Block, Mapping, MappingElement
+from mapping.elements.loops import For
+from mapping import Mapping, MappingElement
+from mapping.table import MappingTable, DEFAULT_DATASPACES, decode_masks
 
 # for typehinting
 from io import TextIOWrapper
+from typing import Iterable, Iterator, Sequence, Union
 
-# for finding stuff
-import regex as re
+# for batching records
+from itertools import islice
 
+# for splitting printouts across processes
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def parse(file: TextIOWrapper) -> list:
+# imports numpy
+import numpy as np
+
+# times the parsing stages
+import tracing
+from tracing import traced
+
+###
+# Every mapping in the printout is a 4 line record:
+
+# [{dimension},{start},{end};]*  // these are the loops in the mapping (from innermost to outermost)
+# [{storage_level}]*             // these are the storage levels
+# [{bypass_mask}]*               // read from right to left. each one is a dataspace (1 means stored)
+# [{cycles};{energy};]
+###
+RECORD_LINES: int = 4
+
+# how many records have their bypass masks decoded together
+BATCH_RECORDS: int = 4096
+
+# the smallest slice of a printout worth handing to another process
+MIN_CHUNK_BYTES: int = 4 << 20
+
+
+def workload_dataspaces(workload: Union[dict, Iterable[str]]) -> tuple[str]:
+    """
+    workload:Union[dict, Iterable[str]]
+        Either the dataspace names in order, or a timeloop workload spec as
+        loaded from its yaml, i.e. {"problem": {"shape": {"data-spaces":
+        [{"name": ...}, ...]}}}. The "problem" level may be omitted.
+
+    returns:
+        The dataspace names, in the order the bypass mask bits refer to them.
+    """
+    # already a sequence of names
+    if not isinstance(workload, dict):
+        return tuple(workload)
+
+    problem: dict = workload.get("problem", workload)
+
+    return tuple(space["name"] for space in problem["shape"]["data-spaces"])
+
+
+def iter_records(file: TextIOWrapper) -> Iterator[tuple[str, str, str, str]]:
     """
     file:TextIOWrapper
         File object pointing to the timeloop printout.
 
     returns:
-        A list of mappings included in the printout
+        An iterator over the raw records in the printout, one tuple of the
+        4 record lines (with the trailing ";" removed) at a time. Only one
+        record is ever held in memory; a trailing partial record is dropped.
     """
-    # the entire file
-    raw: str = file.read()
-    
-    ###
-    # Breaks it up by mapping, which is in 4 line chunks. Source: https://stackoverflow.com/questions/26459838/splitting-a-string-every-n-lines-using-regex
-    # (?:     # Start a non-capturing group that matches...
-    # ^       # (from the start of a line)
-    # .*      # any number of non-newline characters
-    # $       # (until the end of the line).
-    # \n?     # Then it matches a newline character, if present.
-    # ){4}  # It repeats this three times. If there are less than three lines
-    #         # at the end of the string.
-    ###
-
-    mapping_texts: list = re.compile("(?:^.*$\n?){4}", re.M).findall(raw)
-    
-    ###
-    # Splits into separate lines.
-
-    # [{dimension},{start},{end};]*  // these are the loops in the mapping (from innermost to outermost)
-    # [{storage_level}]*             // these are the storage levels
-    # [{bypass_mask}]*               // read from right to left. each one is a dataspace (1 means stored)
-    # [{cycles};{energy};]
-    ###
-    mapping_texts = [
-        [
-            dataspace.rstrip(
-                ";"
-            )  # this step is necessary to remove null string from the split due to ending split char
-            for dataspace in data_str.rstrip().split(
-                "\n"
-            )  # this step is necessary to remove null string from the split due to ending split char
-        ]
-        for data_str in mapping_texts
-    ]
+    # the lines of the record currently being read
+    record: list[str] = []
 
-    # stores all the mappings
-    mappings: list = list()
-
-    loop_info: str
-    storage_levels: str
-    bypass_masks: str
-    data: str
-    for [loop_info, storage_levels, bypass_masks, data] in mapping_texts:
-        # stores the master mapping structure
-        mapping: list = list()
-
-        # converts the loop_info into the loops and dumps them in mapping.
-        for loop in loop_info.split(";"):
-            for dim, start, end in [loop.split(",")]:
-                mapping.append(For(dim, int(start), int(end)))
-
-        # gets the indicies of the loops the levels refer to
-        storage_levels: list[int] = [int(level) for level in storage_levels.split(";")]
-        # creates corresponding level curves and inserts them into the correct position
-        for Lval in range(len(storage_levels) - 1, -1, -1):
-            mapping.insert(
-                storage_levels[Lval],
-                Store(Lval, ("A", "B", "Z")),  # don't know what dataspace it stores yet
-            )
+    line: str
+    for line in file:
+        # this step is necessary to remove null string from the split due to ending split char
+        line = line.rstrip().rstrip(";")
+
+        # blank lines do not belong to any record
+        if not line:
+            continue
+
+        record.append(line)
+
+        # yields the record once all its lines are read
+        if len(record) == RECORD_LINES:
+            yield tuple(record)
+            record = []
+
+
+def complete_records(data: bytes) -> tuple[list[tuple[str, str, str, str]], int]:
+    """
+    data:bytes
+        Printout bytes starting at the first line of a record, such as the
+        bytes appended since the last complete record was read.
+
+    returns:
+        The complete records in data, as iter_records yields them, and how
+        many bytes of data they span. The partial record after them, if any,
+        is left out, to be read again once it is complete.
+    """
+    records: list[tuple[str, str, str, str]] = []
+    # the lines of the record currently being read
+    record: list[str] = []
+
+    # the bytes up to the end of the last complete record, and of the last
+    # line read; a line without its newline may still be being written
+    consumed: int = 0
+    position: int = 0
+
+    line: str
+    for line in data[: data.rfind(b"\n") + 1].decode("ascii").split("\n")[:-1]:
+        position += len(line) + 1
+        line = line.rstrip().rstrip(";")
 
-        # bypass masks, read left to right TODO::implement bypass descriptors
-        bypass_masks = [
-            mask[::-1] for mask in bypass_masks
-        ]  # reverses direction so indicies line up
-        # extracts performance information. TODO::store performance information in mapping
-        data: list = [float(info) for info in data.split(";")]
+        # blank lines do not belong to any record
+        if not line:
+            if not record:
+                consumed = position
+            continue
 
-        mappings.append(Mapping(mapping))
+        record.append(line)
+
+        if len(record) == RECORD_LINES:
+            records.append(tuple(record))
+            record = []
+            consumed = position
+
+    return records, consumed
+
+
+def build_mapping(
+    loop_info: str,
+    storage_levels: str,
+    bypass_masks: str,
+    data: str,
+    dataspaces: tuple[str] = DEFAULT_DATASPACES,
+    bypass: Sequence[np.uint32] = None,
+) -> Mapping:
+    """
+    loop_info, storage_levels, bypass_masks, data:str
+        The 4 lines of a record, as yielded by iter_records.
+    dataspaces:tuple[str]
+        The dataspaces of the workload, in bypass mask order.
+    bypass:Sequence[np.uint32]
+        The already decoded bypass of each level, innermost first. Decoded
+        from bypass_masks if not given.
+
+    returns:
+        The Mapping the record describes.
+    """
+    # converts the loop_info into the loops, innermost first
+    loops: list[For] = []
+    loop: str
+    for loop in loop_info.split(";"):
+        for dim, start, end in [loop.split(",")]:
+            loops.append(For(dim, int(start), int(end)))
+
+    # gets the index of the outermost loop each level holds, innermost level first
+    boundaries: list[int] = [int(level) for level in storage_levels.split(";")]
+
+    # bypass masks, read right to left so the bit indicies line up with dataspaces
+    if bypass is None:
+        bypass = decode_masks(bypass_masks.split(";"), dataspaces)
+
+    # stores the master mapping structure, outermost first as Mapping expects
+    mapping: list[MappingElement] = []
+
+    # each level holds the loops between the boundary below it and its own boundary
+    for Lval in range(len(boundaries) - 1, -1, -1):
+        # the index of the innermost loop of this level
+        inner: int = boundaries[Lval - 1] + 1 if Lval else 0
+
+        mapping.append(Store(Lval, dataspaces, bypass[Lval]))
+        mapping.extend(reversed(loops[inner : boundaries[Lval] + 1]))
+
+    # extracts performance information
+    cycles, energy = data.split(";")
+
+    return Mapping(mapping, int(float(cycles)), float(energy))
+
+
+def iter_parse(
+    file: TextIOWrapper, workload: Union[dict, Iterable[str]] = DEFAULT_DATASPACES
+) -> Iterator[Mapping]:
+    """
+    file:TextIOWrapper
+        File object pointing to the timeloop printout.
+    workload:Union[dict, Iterable[str]]
+        The workload spec or dataspace names, see workload_dataspaces.
+
+    returns:
+        An iterator over the mappings included in the printout. The file is
+        read line by line, so memory use does not grow with the printout.
+    """
+    return build_mappings(iter_records(file), workload_dataspaces(workload))
+
+
+def build_mappings(
+    records: Iterable[tuple[str, str, str, str]],
+    dataspaces: tuple[str] = DEFAULT_DATASPACES,
+) -> Iterator[Mapping]:
+    """
+    records:Iterable[tuple[str, str, str, str]]
+        Raw records, as yielded by iter_records.
+    dataspaces:tuple[str]
+        The dataspaces of the workload, in bypass mask order.
+
+    returns:
+        An iterator over the Mappings the records describe, built lazily
+        BATCH_RECORDS records at a time, their bypass masks decoded at once.
+    """
+    records = iter(records)
+
+    while batch := list(islice(records, BATCH_RECORDS)):
+        # each batch is one build span, rather than a span per record
+        with tracing.span("build"):
+            mappings: list[Mapping] = _build_batch(batch, dataspaces)
+
+        yield from mappings
+
+
+def _build_batch(
+    batch: list[tuple[str, str, str, str]], dataspaces: tuple[str]
+) -> list[Mapping]:
+    """Builds a batch of records, decoding all their bypass masks at once"""
+    # the masks of every record in the batch, split per record
+    masks: list[list[str]] = [record[2].split(";") for record in batch]
+    bypass: np.ndarray = decode_masks(
+        [mask for record_masks in masks for mask in record_masks], dataspaces
+    )
+
+    # where the current record's masks start in bypass
+    offset: int = 0
+    mappings: list[Mapping] = []
+
+    record: tuple[str, str, str, str]
+    for index, record in enumerate(batch):
+        end: int = offset + len(masks[index])
+        mappings.append(build_mapping(*record, dataspaces, bypass[offset:end]))
+        offset = end
 
     return mappings
 
 
+@traced("parse")
+def parse(
+    file: TextIOWrapper, workload: Union[dict, Iterable[str]] = DEFAULT_DATASPACES
+) -> list:
+    """
+    file:TextIOWrapper
+        File object pointing to the timeloop printout.
+    workload:Union[dict, Iterable[str]]
+        The workload spec or dataspace names, see workload_dataspaces.
+
+    returns:
+        A list of mappings included in the printout
+    """
+    return list(iter_parse(file, workload))
+
+
+@traced("parse_table")
+def parse_table(
+    file: TextIOWrapper, workload: Union[dict, Iterable[str]] = DEFAULT_DATASPACES
+) -> MappingTable:
+    """
+    file:TextIOWrapper
+        File object pointing to the timeloop printout.
+    workload:Union[dict, Iterable[str]]
+        The workload spec or dataspace names, see workload_dataspaces.
+
+    returns:
+        The mappings included in the printout as a columnar MappingTable,
+        without building any Mapping objects.
+    """
+    return MappingTable.from_records(iter_records(file), workload_dataspaces(workload))
+
+
+def split_records(path: str, chunk_bytes: int) -> list[tuple[int, int]]:
+    """
+    path:str
+        Path to the timeloop printout.
+    chunk_bytes:int
+        Roughly how many bytes each chunk should hold.
+
+    returns:
+        The (start, end) byte ranges of the chunks, in file order, each
+        starting on the first line of a record. That line, the loops, is the
+        only one of a record holding commas, so records are found by their
+        content and blank lines anywhere are tolerated, as iter_records
+        tolerates them.
+    """
+    # mmap cannot map an empty file
+    size: int = os.path.getsize(path)
+    if not size:
+        return []
+
+    # the byte offset each chunk starts at
+    bounds: list[int] = [0]
+
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as printout:
+        target: int
+        for target in range(chunk_bytes, size, chunk_bytes):
+            # the previous chunk may already reach past the target
+            position: int = max(target, bounds[-1])
+
+            # moves to the start of the next line
+            newline: int = printout.find(b"\n", position)
+            position = size if newline == -1 else newline + 1
+
+            # then on to the first line holding loops
+            while position < size:
+                line_end: int = printout.find(b"\n", position)
+                if line_end == -1:
+                    line_end = size
+                if printout.find(b",", position, line_end) != -1:
+                    break
+                position = line_end + 1
+
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+
+    bounds.append(size)
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_chunk(
+    path: str, start: int, end: int, dataspaces: tuple[str]
+) -> MappingTable:
+    """
+    path:str
+        Path to the timeloop printout.
+    start, end:int
+        The byte range of the chunk, as made by split_records.
+    dataspaces:tuple[str]
+        The dataspaces of the workload, in bypass mask order.
+
+    returns:
+        The mappings in the chunk as a MappingTable, which pickles as a
+        handful of flat arrays rather than a graph of objects.
+    """
+    with open(path, "rb") as file:
+        file.seek(start)
+
+        def lines() -> Iterator[str]:
+            """Reads the chunk line by line"""
+            position: int = start
+            while position < end:
+                line: bytes = file.readline()
+                if not line:
+                    return
+                position += len(line)
+                yield line.decode("ascii")
+
+        return MappingTable.from_records(iter_records(lines()), dataspaces)
+
+
+def parse_many(
+    paths: Iterable[str],
+    workers: int = None,
+    workload: Union[dict, Iterable[str]] = DEFAULT_DATASPACES,
+) -> MappingTable:
+    """
+    paths:Iterable[str]
+        Paths to the timeloop printouts, e.g. one per mapper thread.
+    workers:int
+        The number of processes to parse with, os.cpu_count() if None.
+    workload:Union[dict, Iterable[str]]
+        The workload spec or dataspace names, see workload_dataspaces.
+
+    returns:
+        Every mapping in the printouts as a single MappingTable, in the order
+        the paths and the records within them were given.
+    """
+    dataspaces: tuple[str] = workload_dataspaces(workload)
+    paths = list(paths)
+    workers = workers or os.cpu_count()
+
+    # aims for a few chunks per worker so uneven chunks still balance
+    total: int = sum(os.path.getsize(path) for path in paths)
+    chunk_bytes: int = max(MIN_CHUNK_BYTES, total // (workers * 4) + 1)
+
+    # the chunks of every printout, in order
+    chunks: list[tuple[str, int, int]] = [
+        (path, start, end)
+        for path in paths
+        for start, end in split_records(path, chunk_bytes)
+    ]
+
+    if not chunks:
+        return MappingTable.from_records([], dataspaces)
+
+    # small jobs are not worth starting processes for
+    if workers == 1 or len(chunks) == 1:
+        tables: list[MappingTable] = [
+            _parse_chunk(path, start, end, dataspaces) for path, start, end in chunks
+        ]
+    else:
+        # spawned rather than forked, as parse_many may be called from a
+        # threaded server
+        with ProcessPoolExecutor(
+            min(workers, len(chunks)), mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            # map keeps the chunks in submission order
+            tables = list(
+                pool.map(
+                    _parse_chunk,
+                    *zip(*chunks),
+                    [dataspaces] * len(chunks),
+                )
+            )
+
+    return MappingTable.concatenate(tables)
+
+
 if __name__ == "__main__":
     for mapping in parse(open("testdata.txt")):
         print(mapping)
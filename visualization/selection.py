@@ -0,0 +1,225 @@
+"""Selects the best mappings out of a population, either while streaming
+through the parser or vectorized over a MappingTable.
+
+The streaming selectors only ever hold the mappings they would return, so
+memory is O(K) (or O(front size)) rather than O(records).
+
+Typical use case:
+best = top_k(iter_parse(file), 10, "energy")
+front = pareto_front(iter_parse(file))
+best[0].diff(best[1])
+"""
+# imports type hinting tools
+from __future__ import annotations
+from typing import Callable, Iterable, Union
+
+# for the bounded heap and the sorted front
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import count
+
+# imports numpy
+import numpy as np
+
+# imports the mapping representations we select from
+from mapping import Mapping
+from mapping.table import MappingTable
+
+# a Mapping attribute name, or a function scoring a Mapping. Lower is better.
+Key = Union[str, Callable[[Mapping], float]]
+
+
+def _key_function(key: Key) -> Callable[[Mapping], float]:
+    """Turns an attribute name into a scoring function"""
+    if callable(key):
+        return key
+
+    return lambda mapping: getattr(mapping, key)
+
+
+class TopK:
+    """Keeps the k lowest scoring mappings seen so far.
+
+    Attributes:
+        k: The number of mappings kept.
+    """
+
+    def __init__(self, k: int, key: Key = "energy") -> None:
+        """Inits TopK with the number of mappings to keep and how to score them"""
+        if k < 1:
+            raise ValueError(f"k must be positive, not {k}")
+
+        self.k: int = k
+        self._score: Callable[[Mapping], float] = _key_function(key)
+
+        # a max heap of (-score, -arrival, mapping), so the worst kept mapping
+        # is on top and ties keep the earliest arrival
+        self._heap: list[tuple[float, int, Mapping]] = []
+        self._arrivals: count = count()
+
+    def push(self, mapping: Mapping) -> bool:
+        """Offers a mapping, returning whether it was kept"""
+        entry: tuple = (-self._score(mapping), -next(self._arrivals), mapping)
+
+        # still filling up
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+
+        # only replaces the worst kept mapping if strictly better
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+
+        return False
+
+    def extend(self, mappings: Iterable[Mapping]) -> TopK:
+        """Offers every mapping in order"""
+        for mapping in mappings:
+            self.push(mapping)
+
+        return self
+
+    def best(self) -> list[Mapping]:
+        """The kept mappings, best first"""
+        return [entry[2] for entry in sorted(self._heap, reverse=True)]
+
+    def __len__(self) -> int:
+        """The number of mappings kept"""
+        return len(self._heap)
+
+
+class ParetoFront:
+    """Keeps the mappings not dominated in (cycles, energy) seen so far.
+
+    A mapping is dropped if a kept mapping is no worse in both cycles and
+    energy, so of several identical points only the first is kept.
+    """
+
+    def __init__(self) -> None:
+        """Inits an empty front"""
+        # the front sorted by increasing cycles, hence decreasing energy
+        self._cycles: list[float] = []
+        self._energy: list[float] = []
+        self._mappings: list[Mapping] = []
+
+    def push(self, mapping: Mapping) -> bool:
+        """Offers a mapping, returning whether it joined the front"""
+        cycles: float = mapping.cycles
+        energy: float = mapping.energy
+
+        # the best energy among the kept mappings with no more cycles
+        below: int = bisect_right(self._cycles, cycles)
+        if below and self._energy[below - 1] <= energy:
+            return False
+
+        # drops the kept mappings this one dominates; they follow it in order
+        # and are contiguous, as energy decreases along the front
+        start: int = bisect_left(self._cycles, cycles)
+        end: int = start
+        while end < len(self._energy) and self._energy[end] >= energy:
+            end += 1
+
+        self._cycles[start:end] = [cycles]
+        self._energy[start:end] = [energy]
+        self._mappings[start:end] = [mapping]
+
+        return True
+
+    def extend(self, mappings: Iterable[Mapping]) -> ParetoFront:
+        """Offers every mapping in order"""
+        for mapping in mappings:
+            self.push(mapping)
+
+        return self
+
+    def best(self) -> list[Mapping]:
+        """The front, by increasing cycles"""
+        return list(self._mappings)
+
+    def __len__(self) -> int:
+        """The number of mappings on the front"""
+        return len(self._mappings)
+
+
+def top_k(mappings: Iterable[Mapping], k: int, key: Key = "energy") -> list[Mapping]:
+    """
+    mappings:Iterable[Mapping]
+        The mappings to select from, e.g. parsing.iter_parse(file).
+    k:int
+        How many mappings to select.
+    key:Key
+        The attribute name or function to rank by, lower is better.
+
+    returns:
+        The k best mappings, best first.
+    """
+    return TopK(k, key).extend(mappings).best()
+
+
+def pareto_front(mappings: Iterable[Mapping]) -> list[Mapping]:
+    """
+    mappings:Iterable[Mapping]
+        The mappings to select from, e.g. parsing.iter_parse(file).
+
+    returns:
+        The mappings on the cycles/energy Pareto front, by increasing cycles.
+    """
+    return ParetoFront().extend(mappings).best()
+
+
+def table_top_k(table: MappingTable, k: int, key: str = "energy") -> np.ndarray:
+    """
+    table:MappingTable
+        The population to select from.
+    k:int
+        How many mappings to select.
+    key:str
+        The column to rank by, "energy" or "cycles", lower is better.
+
+    returns:
+        The indices of the k best mappings, best first, ties by index.
+        Mappings of unknown performance come last.
+    """
+    scores: np.ndarray = getattr(table, key)
+    k = min(k, len(scores))
+
+    # unknown scores are NaN, which compares false to every cutoff
+    unknown: np.ndarray = np.isnan(scores)
+    if unknown.any():
+        scores = np.where(unknown, np.inf, scores)
+    if not k:
+        return np.zeros(0, dtype=np.int64)
+
+    # finds the k best in linear time, then only sorts those
+    candidates: np.ndarray = np.argpartition(scores, k - 1)[:k]
+    # ties at the cutoff may have picked any index, so settles them by index
+    cutoff: float = scores[candidates].max()
+    candidates = np.concatenate(
+        (np.flatnonzero(scores < cutoff), np.flatnonzero(scores == cutoff))
+    )[:k]
+
+    return candidates[np.lexsort((candidates, scores[candidates]))]
+
+
+def table_pareto_front(table: MappingTable) -> np.ndarray:
+    """
+    table:MappingTable
+        The population to select from.
+
+    returns:
+        The indices of the mappings on the cycles/energy Pareto front, by
+        increasing cycles, matching ParetoFront.
+    """
+    # sorts by cycles, then energy, then arrival
+    order: np.ndarray = np.lexsort(
+        (np.arange(len(table)), table.energy, table.cycles)
+    )
+    energy: np.ndarray = table.energy[order]
+
+    # a mapping is on the front if it beats every mapping sorted before it
+    best_before: np.ndarray = np.concatenate(
+        ([np.inf], np.minimum.accumulate(energy)[:-1])
+    )
+
+    return order[energy < best_before]
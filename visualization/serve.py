@@ -2,11 +2,48 @@
 mapping visualization library.
 
 Typical use cases:
-    Running this file to create the server.
+    Running this file to create the development server.
+    python serve.py --production --workers 4
+        Serves with a multi-threaded server, diffing in 4 worker processes.
+    python serve.py --trace --server-timing
+        Times the hot paths into /metrics, and each response's stages into
+        its Server-Timing header.
+    gunicorn -w 4 "serve:app"
+        Serves from 4 processes, sharing the memory-mapped parse cache.
 """
 
+# for locating the printout
+import os
+
+# for keying cached views
+import glob
+import hashlib
+
+# for the live event streams
+import json
+from typing import Callable, Iterable, Iterator, Union
+
+# for the production server and its diff workers
+import argparse
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
 # visualization libraries
-from flask import Flask, render_template
+from flask import (
+    Flask,
+    Response,
+    abort,
+    g,
+    jsonify,
+    make_response,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
+from jinja2 import Template
 import plotly.express as px
 import pandas as pd
 import numpy as np
@@ -16,11 +53,41 @@ from flask_misaka import Misaka
 
 # imports custom mapping class
 from mapping import Mapping
+from mapping.changes import MappingDiff
+from mapping.diffing import BatchDiff, diff_many
+from mapping.table import MappingTable
 from mapping.elements.loops import For, ParFor
 from mapping.elements.stores import Store
 
+# imports the printout parser and mapping selectors
+from parsing import iter_parse
+from selection import top_k, pareto_front
+from caching import cached_parse, LRUCache
+from dedup import DedupIndex
+from similarity import SimilarityIndex
+from following import Follower
+
+# times the hot paths, see /metrics
+import tracing
+
 # creates server
 app: Flask = Flask(__name__)
+# the printout the population views read, overridable through the environment
+app.config["PRINTOUT"] = os.environ.get(
+    "PRINTOUT", os.path.join(os.path.dirname(__file__), "testdata.txt")
+)
+# the memory the rendered views may take, overridable through the environment
+app.config["VIEW_CACHE_BYTES"] = int(os.environ.get("VIEW_CACHE_BYTES", 64 << 20))
+# the processes /api/diff runs in, 0 to diff in the request thread
+app.config["DIFF_WORKERS"] = int(os.environ.get("DIFF_WORKERS", 0))
+# whether traced responses carry a Server-Timing header; tracing itself is
+# enabled by TRACING=1, see tracing.py
+app.config["SERVER_TIMING"] = os.environ.get("SERVER_TIMING", "") not in ("", "0")
+# how often /events/best checks the printout for new records, in seconds
+app.config["FOLLOW_INTERVAL"] = float(os.environ.get("FOLLOW_INTERVAL", 1))
+# how long an event stream lasts before the browser reconnects, in seconds,
+# so streams never hold a request thread for good
+app.config["FOLLOW_SECONDS"] = float(os.environ.get("FOLLOW_SECONDS", 300))
 # makes it markdown compliant
 Misaka(
     app,  # converts app to markdown
@@ -28,11 +95,20 @@ Misaka(
     highlight=True,  # allows highlight notation
     no_indented_code=True,  # disables tabs = code notation
 )
+# the markdown filter Misaka registered, timed by the one replacing it
+_markdown: Callable[[str], str] = app.jinja_env.filters["markdown"]
+
+
+@app.template_filter("markdown")
+def _traced_markdown(text: str) -> str:
+    """Converts markdown as Misaka does, timing the conversion"""
+    with tracing.span("markdown"):
+        return _markdown(text)
 
 
 # landing page, serves as example graphical page for now
 @app.route("/basic")
-def basic() -> str:
+def basic() -> Response:
     """Serves a webapp on the root address that directly compares 2 mappings
     written in code. No justification occuring,
     """
@@ -88,19 +164,12 @@ def basic() -> str:
         ]
     )
 
-    return render_template(
-        "mapping.html",
-        diffs=(
-            mapping.diff(other_mapping),
-            other_mapping.diff(mapping),
-        ),
-        mappings=(mapping, other_mapping),
-    )
+    return _comparison_view("basic", mapping, other_mapping)
 
 
 @app.route("/justify")
-def justify() -> str:
-    """Very crude visual test for the justification function."""
+def justify() -> Response:
+    """Very crude visual test for the alignment function."""
     mapping = Mapping(
         [
             Store(2, ("A", "B", "Z")),
@@ -127,27 +196,12 @@ def justify() -> str:
             ParFor("k", 0, 1),
         ]
     )
-    # justifies the mappings against each other
-    mapping = mapping.justify(other_mapping)
-    other_mapping = other_mapping.justify(mapping)
-
-    print(mapping)
-    print("#######")
-    print(other_mapping)
-
-    return render_template(
-        "mapping.html",
-        diffs=(
-            mapping.diff(other_mapping),
-            other_mapping.diff(mapping),
-        ),
-        mappings=(mapping, other_mapping),
-    )
+    return _comparison_view("justify", mapping, other_mapping, align=True)
 
 
 @app.route("/just_complex")
-def justify_complex():
-    """Crude complex justify test"""
+def justify_complex() -> Response:
+    """Crude complex alignment test"""
     mapping = Mapping(
         [
             Store(2, ("A", "B", "Z")),
@@ -175,23 +229,817 @@ def justify_complex():
         ]
     )
 
-    # justifies the mappings against each other
-    mapping = mapping.justify(other_mapping)
-    other_mapping = other_mapping.justify(mapping)
+    return _comparison_view("just_complex", mapping, other_mapping, align=True)
+
+
+# the most mappings /best and /similar can show
+MAX_SHOWN: int = 1000
+
+
+@app.route("/best/<metric>")
+def best(metric: str) -> Response:
+    """Streams the printout through a selector and compares the best mappings
+    by metric ("energy", "cycles" or "pareto") against the best one. The
+    number of mappings shown is set by the k query parameter."""
+    if metric not in ("energy", "cycles", "pareto"):
+        abort(404)
+
+    # the number of mappings to show
+    k: int = request.args.get("k", 5, type=int)
+    if not 0 < k <= MAX_SHOWN:
+        abort(400)
+
+    path: str = app.config["PRINTOUT"]
+
+    def select() -> tuple:
+        with open(path) as printout:
+            if metric == "pareto":
+                mappings: list[Mapping] = pareto_front(iter_parse(printout))[:k]
+            else:
+                mappings = top_k(iter_parse(printout), k, metric)
+
+        # an empty printout has no best mapping, as it has no mapping 0
+        if not mappings:
+            abort(404)
+
+        # compares every mapping against the best
+        return mappings[0], mappings
+
+    return _leader_view(("best", metric, k, _printout_version(path)), k, select)
+
+
+@app.route("/similar/<int:index>")
+def similar(index: int) -> Response:
+    """Compares the mappings most similar to the index-th mapping of the
+    printout against it, nearest first. The number of mappings shown is set
+    by the k query parameter."""
+    # the number of mappings to show, counting the mapping itself
+    k: int = request.args.get("k", 20, type=int)
+    if not 0 < k <= MAX_SHOWN:
+        abort(400)
+
+    path: str = app.config["PRINTOUT"]
 
-    print(mapping)
-    print("#######")
-    print(other_mapping)
+    def select() -> tuple:
+        index_: SimilarityIndex = _similarity_index(path)
+        if not 0 <= index < len(index_):
+            abort(404)
+
+        query: Mapping = index_.table[index]
+
+        return query, index_.neighbours(query, k)
+
+    return _leader_view(("similar", index, k, _printout_version(path)), k, select)
+
+
+@app.route("/browse")
+def browse() -> str:
+    """Lists the printout's mappings, loading more as the page is scrolled.
+    The order is set by the sort query parameter, as in /api/mappings."""
+    sort: str = request.args.get("sort", "index")
+    if sort not in SORTS:
+        abort(400)
 
     return render_template(
-        "mapping.html",
-        diffs=(
-            mapping.diff(other_mapping),
-            other_mapping.diff(mapping),
-        ),
-        mappings=(mapping, other_mapping),
+        "browse.html", sort=sort, sorts=SORTS, page=url_for("api_mappings", sort=sort)
+    )
+
+
+#######################
+# POPULATION API FXNS #
+#######################
+
+# the orders /api/mappings can list the printout in
+SORTS: tuple[str] = ("index", "energy", "cycles")
+# the most mappings a page can hold
+MAX_PAGE: int = 1000
+
+
+@app.route("/api/mappings")
+def api_mappings() -> Response:
+    """A page of the printout's mappings as JSON summaries, set by the offset,
+    limit and sort query parameters. Only the page is ever read."""
+    offset, limit, sort = _page_args()
+    path: str = app.config["PRINTOUT"]
+
+    def build() -> Response:
+        table: MappingTable = _printout_table(path)
+        total: int = len(table)
+        ids: np.ndarray = _page_ids(path, offset, limit, sort)
+
+        # the summaries come straight from the columns
+        level_offsets: np.ndarray = table.level_offsets
+        loop_offsets: np.ndarray = table.loop_offsets
+        rows: list[dict] = [
+            {
+                "id": id_,
+                "cycles": _json_number(table.cycles[id_], int),
+                "energy": _json_number(table.energy[id_], float),
+                "levels": int(level_offsets[id_ + 1] - level_offsets[id_]),
+                "loops": int(
+                    loop_offsets[level_offsets[id_ + 1]]
+                    - loop_offsets[level_offsets[id_]]
+                ),
+            }
+            for id_ in ids.tolist()
+        ]
+
+        following: int = offset + len(rows)
+        return jsonify(
+            total=total,
+            offset=offset,
+            limit=limit,
+            sort=sort,
+            mappings=rows,
+            next=url_for("api_mappings", offset=following, limit=limit, sort=sort)
+            if following < total and rows
+            else None,
+        )
+
+    return _conditional(("api_mappings", offset, limit, sort), path, build)
+
+
+def _page_args() -> tuple[int, int, str]:
+    """The offset, limit and sort query parameters of a page, checked"""
+    offset: int = max(request.args.get("offset", 0, type=int), 0)
+    limit: int = min(max(request.args.get("limit", 50, type=int), 0), MAX_PAGE)
+    sort: str = request.args.get("sort", "index")
+    if sort not in SORTS:
+        abort(400)
+
+    return offset, limit, sort
+
+
+def _page_ids(path: str, offset: int, limit: int, sort: str) -> np.ndarray:
+    """The ids of the printout's mappings on a page, in order"""
+    total: int = len(_printout_table(path))
+
+    if sort == "index":
+        return np.arange(min(offset, total), min(offset + limit, total))
+
+    return _sort_order(path, sort)[offset : offset + limit]
+
+
+@app.route("/api/mappings/<int:id_>")
+def api_mapping(id_: int) -> Response:
+    """One mapping of the printout as JSON, see Mapping.to_dict"""
+    path: str = app.config["PRINTOUT"]
+    table: MappingTable = _printout_table(path)
+    if not 0 <= id_ < len(table):
+        abort(404)
+
+    return _conditional(
+        ("api_mapping", id_), path, lambda: jsonify(id=id_, **table[id_].to_dict())
+    )
+
+
+@app.route("/api/diff/<int:a>/<int:b>")
+def api_diff(a: int, b: int) -> Response:
+    """Mapping a of the printout aligned and compared against mapping b. The
+    format query parameter picks JSON (the default), html, text or markdown."""
+    path: str = app.config["PRINTOUT"]
+    table: MappingTable = _printout_table(path)
+    if not (0 <= a < len(table) and 0 <= b < len(table)):
+        abort(404)
+
+    render_format: str = request.args.get("format", "json")
+    if render_format not in DIFF_FORMATS:
+        abort(400)
+
+    def build() -> Response:
+        # the alignment and comparison run off the request thread if possible
+        pool: Executor = _diff_pool()
+        if pool is None:
+            rendered: Union[dict, str] = _diff_job(path, a, b, render_format)
+        else:
+            rendered = pool.submit(_diff_job, path, a, b, render_format).result()
+
+        if render_format == "json":
+            return jsonify(rendered)
+
+        response: Response = make_response(rendered)
+        response.mimetype = "text/html" if render_format == "html" else "text/plain"
+
+        return response
+
+    return _conditional(("api_diff", a, b, render_format), path, build)
+
+
+@app.route("/api/diff/<int:reference>")
+def api_diff_many(reference: int) -> Response:
+    """A page of the printout's mappings compared against mapping reference
+    position by position, as Mapping.diff compares them, without aligning.
+    The page is set by the offset, limit and sort query parameters, as in
+    /api/mappings. Mappings of one structure share a diff, listing all their
+    ids, and the structures are diffed in one vectorized pass."""
+    offset, limit, sort = _page_args()
+
+    path: str = app.config["PRINTOUT"]
+    table: MappingTable = _printout_table(path)
+    if not 0 <= reference < len(table):
+        abort(404)
+
+    def build() -> Response:
+        ids: np.ndarray = _page_ids(path, offset, limit, sort)
+
+        # groups the page by structure, in order of first appearance
+        structures: DedupIndex = DedupIndex(
+            max_representatives=0, max_groups=MAX_PAGE
+        )
+        members: dict[int, list[int]] = {}
+        for id_ in ids.tolist():
+            fingerprint, _ = structures.add(table[id_])
+            members.setdefault(fingerprint, []).append(id_)
+
+        # only the first mapping of each structure is diffed and rendered
+        firsts: list[int] = [group[0] for group in members.values()]
+        diffs: BatchDiff = diff_many(table[reference], table.take(firsts))
+        changed: np.ndarray = diffs.changed_loops
+
+        following: int = offset + len(ids)
+        return jsonify(
+            reference=reference,
+            total=len(table),
+            offset=offset,
+            limit=limit,
+            sort=sort,
+            diffs=[
+                dict(ids=group, changed=int(changed[row]), **diffs.diff(row).to_dict())
+                for row, group in enumerate(members.values())
+            ],
+            next=url_for(
+                "api_diff_many",
+                reference=reference,
+                offset=following,
+                limit=limit,
+                sort=sort,
+            )
+            if following < len(table) and len(ids)
+            else None,
+        )
+
+    return _conditional(("api_diff_many", reference, offset, limit, sort), path, build)
+
+
+# the MappingDiff method behind each diff format
+DIFF_FORMATS: dict[str, str] = {
+    "json": "to_dict",
+    "html": "to_html",
+    "text": "to_text",
+    "markdown": "to_markdown",
+}
+
+
+def _diff_job(path: str, a: int, b: int, render_format: str) -> Union[dict, str]:
+    """Aligns and compares mapping a of the printout against mapping b,
+    returning the rendered diff. Runs in the diff workers, which read the
+    printout through the shared, memory-mapped parse cache."""
+    table: MappingTable = _printout_table(path)
+
+    mapping, other_mapping = table[a].align(table[b])
+    diff: MappingDiff = mapping.compare(other_mapping)
+
+    if render_format == "json":
+        return dict(a=a, b=b, changed=diff.changed, **diff.to_dict())
+
+    return getattr(diff, DIFF_FORMATS[render_format])()
+
+
+def _json_number(value: float, kind: type) -> Union[int, float, None]:
+    """A table value as JSON can carry it, None if unknown"""
+    return None if np.isnan(value) else kind(value)
+
+
+##################
+# FOLLOWING FXNS #
+##################
+
+# the most mappings a live view can keep
+MAX_FOLLOW: int = 100
+# how long an idle event stream waits before sending a comment, so proxies
+# don't close it, in seconds
+KEEPALIVE: float = 15
+
+# the followers of printouts, shared by every stream of the same view
+_followers: dict[tuple, Follower] = {}
+_followers_lock: threading.Lock = threading.Lock()
+
+
+@app.route("/follow")
+def follow() -> str:
+    """Shows the best mappings of a printout the mapper is still writing,
+    updated live as better ones are found. The metric and k query parameters
+    are as in /events/best."""
+    metric, k = _follow_args()
+
+    return render_template(
+        "follow.html",
+        metric=metric,
+        k=k,
+        events=url_for("best_events", metric=metric, k=k),
+    )
+
+
+@app.route("/events/best")
+def best_events() -> Response:
+    """Streams the best k mappings by metric ("energy" or "cycles") and the
+    running statistics as server-sent "best" events, one whenever new records
+    complete. Each event lists the ids of the mappings that joined the best
+    since the last, and the representation of any mapping not sent before.
+
+    The printout is followed incrementally, so an update costs time in
+    proportion to the new records rather than the printout."""
+    metric, k = _follow_args()
+    follower: Follower = _follower(app.config["PRINTOUT"], k, metric)
+
+    interval: float = app.config["FOLLOW_INTERVAL"]
+    duration: float = app.config["FOLLOW_SECONDS"]
+
+    def events() -> Iterator[str]:
+        # asks the browser to reconnect at the polling rate once this ends
+        yield f"retry: {int(interval * 1e3)}\n\n"
+
+        # the version and ids last sent, None before the first event
+        version: int = None
+        sent: set[int] = None
+
+        start: float = time.monotonic()
+        last: float = start
+        while True:
+            follower.poll()
+            stats, best = follower.snapshot()
+
+            if stats["version"] != version:
+                version = stats["version"]
+                ids: list[int] = [id_ for id_, _ in best]
+                joined: list[int] = [
+                    id_ for id_ in ids if sent is not None and id_ not in sent
+                ]
+
+                payload: dict = {
+                    "stats": stats,
+                    "joined": joined,
+                    "best": [
+                        {
+                            "id": id_,
+                            "cycles": mapping.cycles,
+                            "energy": mapping.energy,
+                            # the representation never changes, so is sent once
+                            "text": None if sent and id_ in sent else str(mapping),
+                        }
+                        for id_, mapping in best
+                    ],
+                }
+                sent = (sent or set()) | set(ids)
+
+                yield f"event: best\ndata: {json.dumps(payload)}\n\n"
+                last = time.monotonic()
+            elif time.monotonic() - last > KEEPALIVE:
+                yield ": keepalive\n\n"
+                last = time.monotonic()
+
+            if time.monotonic() - start > duration:
+                return
+            time.sleep(interval)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        # neither caches nor proxies may hold events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _follow_args() -> tuple[str, int]:
+    """The metric and k query parameters of a live view, checked"""
+    metric: str = request.args.get("metric", "energy")
+    if metric not in ("energy", "cycles"):
+        abort(400)
+
+    k: int = request.args.get("k", 10, type=int)
+    if not 0 < k <= MAX_FOLLOW:
+        abort(400)
+
+    return metric, k
+
+
+def _follower(path: str, k: int, metric: str) -> Follower:
+    """The shared follower of a live view, made on first use"""
+    key: tuple = (path, k, metric)
+
+    with _followers_lock:
+        if key not in _followers:
+            _followers[key] = Follower(path, k, metric)
+
+        return _followers[key]
+
+
+@app.route("/stats/cache")
+def cache_stats() -> Response:
+    """The view cache's counters, as JSON"""
+    return jsonify(views=_view_cache.stats(), not_modified=_not_modified)
+
+
+@app.route("/metrics")
+def metrics() -> Response:
+    """The per stage and per request timings, in the Prometheus text format.
+    Empty unless tracing is enabled."""
+    return Response(
+        tracing.exposition(), content_type="text/plain; version=0.0.4; charset=utf-8"
     )
 
 
+################
+# TRACING FXNS #
+################
+
+
+@app.before_request
+def _start_trace() -> None:
+    """Starts timing the request and collecting its spans, if tracing"""
+    if not tracing.enabled():
+        return
+
+    g.trace_start = time.perf_counter()
+    g.trace_stages = tracing.start_collecting()
+
+
+@app.after_request
+def _finish_trace(response: Response) -> Response:
+    """Records how long the request took, and reports its stages in a
+    Server-Timing header if configured to. A streamed body is still to be
+    sent, so isn't counted."""
+    start: float = g.pop("trace_start", None)
+    if start is None:
+        return response
+
+    elapsed: float = time.perf_counter() - start
+    tracing.observe(
+        "request_seconds", elapsed, endpoint=request.endpoint or "unmatched"
+    )
+    tracing.count("requests_total", status=str(response.status_code))
+
+    if app.config["SERVER_TIMING"]:
+        response.headers["Server-Timing"] = tracing.server_timing(
+            g.trace_stages, elapsed
+        )
+
+    return response
+
+
+@app.teardown_request
+def _stop_trace(error: BaseException = None) -> None:
+    """Stops collecting the request's spans"""
+    if g.pop("trace_stages", None) is not None:
+        tracing.stop_collecting()
+
+
+################
+# CACHING FXNS #
+################
+
+# views of more mappings than this are streamed rather than cached
+STREAM_MAPPINGS: int = 20
+
+# the rendered views, with the diffs they were rendered from
+_view_cache: LRUCache = LRUCache(app.config["VIEW_CACHE_BYTES"])
+# the number of requests answered with 304 Not Modified, and its lock
+_not_modified: int = 0
+_not_modified_lock: threading.Lock = threading.Lock()
+
+
+def _source_version() -> str:
+    """Identifies the templates, static files and code every view is rendered
+    with, so that changing any of them changes every ETag. Only the files on
+    disk count, never which modules happen to be loaded, so every worker of
+    the same build agrees."""
+    patterns: tuple[str] = (
+        os.path.join(app.template_folder, "**", "*"),
+        os.path.join(app.static_folder, "**", "*"),
+        os.path.join("**", "*.py"),
+    )
+    paths: list[str] = sorted(
+        {
+            path
+            for pattern in patterns
+            for path in glob.glob(
+                os.path.join(app.root_path, pattern), recursive=True
+            )
+            if os.path.isfile(path)
+        }
+    )
+
+    digest: hashlib.blake2b = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        # a renamed file changes the version as well
+        digest.update(os.path.relpath(path, app.root_path).encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+# part of every ETag
+_SOURCE_VERSION: str = _source_version()
+
+
+def _cached_view(key: tuple, render: Callable[[], tuple]) -> Response:
+    """Serves the view identified by key, rendering it on a cache miss.
+
+    The ETag is derived from the key alone, so a client holding the view
+    revalidates without the view being looked up or rendered at all.
+
+    Args:
+        key: Everything the view's content depends on.
+        render: Renders the view, returning its diffs and HTML.
+
+    Returns:
+        The view, or 304 Not Modified if the client already has it.
+    """
+    etag: str = _etag(key)
+    if etag in request.if_none_match:
+        return _not_modified_response(etag)
+
+    cached: tuple = _view_cache.get(key)
+    if cached is None:
+        cached = render()
+        # the rendered HTML dominates the entry's size
+        _view_cache.put(key, cached, len(cached[1].encode()))
+
+    response: Response = make_response(cached[1])
+    response.set_etag(etag)
+
+    return response
+
+
+def _streamed_view(key: tuple, entries: Callable[[], Iterable]) -> Response:
+    """Serves the view identified by key as it is rendered, bypassing the
+    view cache.
+
+    The page is rendered with Jinja's generate(), so its head is sent before
+    the first diff is computed, and every diff is sent and dropped before the
+    next is computed. Neither the time to first byte nor the memory held
+    grows with the number of mappings shown.
+
+    Args:
+        key: Everything the view's content depends on.
+        entries: Gives the (diff, mapping) pairs to show, lazily computed.
+
+    Returns:
+        The streamed view, or 304 Not Modified if the client already has it.
+    """
+    etag: str = _etag(key)
+    if etag in request.if_none_match:
+        return _not_modified_response(etag)
+
+    # the context render_template would build, around the lazy entries
+    context: dict = {"entries": entries()}
+    app.update_template_context(context)
+
+    template: Template = app.jinja_env.get_template("mapping.html")
+    response: Response = Response(stream_with_context(template.generate(context)))
+    response.set_etag(etag)
+
+    return response
+
+
+def _not_modified_response(etag: str) -> Response:
+    """Tells the client its copy of the view tagged etag is current"""
+    global _not_modified
+    with _not_modified_lock:
+        _not_modified += 1
+
+    response: Response = Response(status=304)
+    response.set_etag(etag)
+
+    return response
+
+
+def _etag(key: tuple) -> str:
+    """The ETag of the content identified by key, as rendered by the current
+    templates and code"""
+    return hashlib.blake2b(
+        repr((_SOURCE_VERSION, key)).encode(), digest_size=16
+    ).hexdigest()
+
+
+def _conditional(key: tuple, path: str, build: Callable[[], Response]) -> Response:
+    """Serves the response identified by key, built from the printout at path.
+
+    The client's ETag is checked before anything is built, so a client that
+    already has the response revalidates without it being built at all.
+
+    Args:
+        key: Everything the response depends on, besides the printout.
+        path: The printout the response is built from.
+        build: Builds the response.
+
+    Returns:
+        The response, or 304 Not Modified if the client already has it.
+    """
+    etag: str = _etag(key + (_printout_version(path),))
+    if etag in request.if_none_match:
+        return _not_modified_response(etag)
+
+    response: Response = build()
+    response.set_etag(etag)
+
+    return response.make_conditional(request)
+
+
+def _comparison_view(
+    view: str, mapping: Mapping, other_mapping: Mapping, align: bool = False
+) -> Response:
+    """Serves two mappings compared against each other, aligning them first
+    if asked, keyed by the view and both mappings' structure"""
+    key: tuple = (view, mapping.fingerprint(), other_mapping.fingerprint())
+
+    def render() -> tuple:
+        # only the aligned copies are compared
+        aligned, other_aligned = (
+            mapping.align(other_mapping) if align else (mapping, other_mapping)
+        )
+
+        diffs: tuple = (aligned.compare(other_aligned), other_aligned.compare(aligned))
+
+        with tracing.span("render"):
+            html: str = render_template(
+                "mapping.html", entries=zip(diffs, (aligned, other_aligned))
+            )
+
+        return diffs, html
+
+    return _cached_view(key, render)
+
+
+def _leader_view(key: tuple, k: int, select: Callable[[], tuple]) -> Response:
+    """Serves mappings compared against a leader, both given by select. Up to
+    STREAM_MAPPINGS mappings are rendered whole and cached, more are
+    streamed."""
+    if k <= STREAM_MAPPINGS:
+        return _cached_view(key, lambda: _render_against(*select()))
+
+    return _streamed_view(key, lambda: _compare_against(*select()))
+
+
+def _compare_against(leader: Mapping, mappings: list[Mapping]) -> Iterator[tuple]:
+    """Lazily compares every mapping against leader, yielding (diff, mapping)
+    pairs"""
+    # aligns every mapping against the leader before comparing
+    for mapping in mappings:
+        aligned, aligned_leader = mapping.align(leader)
+        yield aligned.compare(aligned_leader), mapping
+
+
+def _render_against(leader: Mapping, mappings: list[Mapping]) -> tuple:
+    """Renders every mapping compared against leader, returning the diffs and
+    the HTML"""
+    entries: list[tuple] = list(_compare_against(leader, mappings))
+    diffs: list[MappingDiff] = [diff for diff, _ in entries]
+
+    with tracing.span("render"):
+        html: str = render_template("mapping.html", entries=entries)
+
+    return diffs, html
+
+
+def _printout_version(path: str) -> tuple:
+    """Identifies the current contents of a printout"""
+    stat: os.stat_result = os.stat(path)
+
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+# what has been built from each printout, by printout version
+_tables: dict[tuple, MappingTable] = {}
+_sort_orders: dict[tuple, np.ndarray] = {}
+_similarity_indices: dict[tuple, SimilarityIndex] = {}
+# guards them, so concurrent first requests build each value once; reentrant,
+# as building a value may look up another
+_latest_lock: threading.RLock = threading.RLock()
+
+
+def _latest(cache: dict, path: str, build: Callable[[], object], *key) -> object:
+    """The value cache holds for the printout's current version, building it
+    and dropping the older versions' if the printout changed"""
+    version: tuple = _printout_version(path)
+
+    with _latest_lock:
+        if version + key not in cache:
+            for old in [old for old in cache if old[0] == path and old[3:] == key]:
+                del cache[old]
+
+            cache[version + key] = build()
+
+        return cache[version + key]
+
+
+def _printout_table(path: str) -> MappingTable:
+    """The printout's mappings, memory-mapped from the parse cache"""
+    return _latest(_tables, path, lambda: cached_parse(path))
+
+
+def _sort_order(path: str, sort: str) -> np.ndarray:
+    """The ids of the printout's mappings sorted by a column, unknown values
+    last and ties by id"""
+    column: np.ndarray = getattr(_printout_table(path), sort)
+
+    return _latest(
+        _sort_orders, path, lambda: np.argsort(column, kind="stable"), sort
+    )
+
+
+def _similarity_index(path: str) -> SimilarityIndex:
+    """The similarity index of a printout, rebuilt if the printout changed"""
+    return _latest(
+        _similarity_indices, path, lambda: SimilarityIndex(_printout_table(path))
+    )
+
+
+#####################
+# PRODUCTION SERVER #
+#####################
+
+# the diff workers, started on first use
+_diff_executor: ProcessPoolExecutor = None
+_diff_executor_lock: threading.Lock = threading.Lock()
+
+
+def _diff_pool() -> Executor:
+    """The diff worker pool, None if diffs run in the request thread"""
+    global _diff_executor
+
+    workers: int = app.config["DIFF_WORKERS"]
+    if not workers:
+        return None
+
+    with _diff_executor_lock:
+        if _diff_executor is None:
+            # spawned rather than forked, as the server already runs threads
+            _diff_executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    return _diff_executor
+
+
+def serve_production(host: str, port: int, workers: int, threads: int) -> None:
+    """Serves the app for many concurrent clients.
+
+    Requests are handled by a pool of threads, with waitress if it is
+    installed and the threaded werkzeug server otherwise, while diffs run in
+    a pool of worker processes. The printout is parsed into the parse cache
+    before serving, so every worker maps the same pages.
+
+    Args:
+        host: The interface to listen on.
+        port: The port to listen on.
+        workers: The number of diff worker processes, 0 to diff in the
+            request threads.
+        threads: The number of request threads, if served by waitress.
+    """
+    app.config["DIFF_WORKERS"] = workers
+    _printout_table(app.config["PRINTOUT"])
+
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host=host, port=port, debug=False, threaded=True)
+    else:
+        serve(app, host=host, port=port, threads=threads)
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=5000, help="port to listen on")
+    parser.add_argument(
+        "--production", action="store_true", help="serve without the debugger"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="diff worker processes"
+    )
+    parser.add_argument("--threads", type=int, default=8, help="request threads")
+    parser.add_argument(
+        "--trace", action="store_true", help="time the hot paths, see /metrics"
+    )
+    parser.add_argument(
+        "--server-timing",
+        action="store_true",
+        help="report each traced request's stages in a Server-Timing header",
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.trace or args.server_timing:
+        tracing.enable()
+    if args.server_timing:
+        app.config["SERVER_TIMING"] = True
+
+    if args.production:
+        serve_production(args.host, args.port, args.workers, args.threads)
+    else:
+        app.run(host=args.host, port=args.port, debug=True)
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    main()
@@ -0,0 +1,338 @@
+"""Finds the mappings most similar to a given one in a large population.
+
+Every mapping is encoded as a fixed width feature vector. For each storage
+level and dim it holds the log2 of the dim's total loop bound at that level
+and whether any of those loops is a par-for; for each storage level and
+dataspace, whether the dataspace is bypassed. Similarity is the euclidean
+distance between vectors, so a factor of two in a bound costs as much as a
+flipped flag.
+
+The search is an exact, vectorized brute-force scan by default. An optional
+random projection LSH narrows the scan to the mappings sharing a bucket with
+the query in any of its tables, trading exactness for speed on very large
+populations.
+
+Typical use case:
+index = SimilarityIndex(cached_parse(path))
+for neighbour in index.neighbours(mapping, 20):
+    print(neighbour.diff(mapping))
+"""
+# imports type hinting tools
+from __future__ import annotations
+from typing import Union
+
+# imports numpy
+import numpy as np
+
+# imports the mapping representations being encoded
+from mapping import Mapping
+from mapping.table import MappingTable, LOOP_TYPES
+from mapping.elements.loops import ParFor
+
+# the loop type code of par-for loops in a MappingTable
+PAR_FOR: int = LOOP_TYPES.index(ParFor)
+
+# how many candidates are scored at once, bounding the scan's scratch memory
+SCAN_ROWS: int = 1 << 16
+
+
+class FeatureLayout:
+    """Where each feature of a mapping lives in its vector.
+
+    Attributes:
+        dims: The dims encoded, in vector order.
+        levels: The number of storage levels encoded.
+        dataspaces: The dataspaces encoded, in vector order.
+    """
+
+    def __init__(
+        self, dims: tuple[str], levels: int, dataspaces: tuple[str]
+    ) -> None:
+        """Inits the layout of the features"""
+        self.dims: tuple[str] = tuple(dims)
+        self.levels: int = levels
+        self.dataspaces: tuple[str] = tuple(dataspaces)
+
+    @classmethod
+    def of(cls, table: MappingTable) -> FeatureLayout:
+        """The layout fitting every mapping of a table"""
+        levels: int = int(table.levels.max()) + 1 if len(table.levels) else 0
+
+        return cls(table.dims, levels, table.dataspaces)
+
+    @property
+    def width(self) -> int:
+        """The length of a feature vector"""
+        return self.levels * (2 * len(self.dims) + len(self.dataspaces))
+
+    @property
+    def _bypass_offset(self) -> int:
+        """Where the bypass bits start, after every bound and par-for flag"""
+        return self.levels * 2 * len(self.dims)
+
+    def encode(self, table: MappingTable) -> np.ndarray:
+        """Encodes every mapping of a table.
+
+        Args:
+            table: The mappings to encode. Dims and levels outside the layout
+                are left out of the vectors.
+
+        Returns:
+            A (mappings, width) float32 array of feature vectors.
+        """
+        features: np.ndarray = np.zeros((len(table), self.width), dtype=np.float32)
+        dims: int = len(self.dims)
+
+        ## the bounds and par-for flags, one column pair per (level, dim) ##
+
+        # the table's dim codes in terms of the layout's, -1 if not encoded
+        codes: dict[str, int] = {dim: code for code, dim in enumerate(self.dims)}
+        dim_codes: np.ndarray = np.array(
+            [codes.get(dim, -1) for dim in table.dims] + [-1], dtype=np.int64
+        )
+
+        loop_levels: np.ndarray = table.loop_levels
+        loop_mappings: np.ndarray = table.level_mappings[loop_levels]
+        loop_dims: np.ndarray = dim_codes[table.loop_dims]
+        loop_level_numbers: np.ndarray = table.levels[loop_levels].astype(np.int64)
+
+        # drops the loops the layout has no column for
+        kept: np.ndarray = (loop_dims >= 0) & (loop_level_numbers < self.levels)
+        columns: np.ndarray = 2 * (loop_level_numbers[kept] * dims + loop_dims[kept])
+        rows: np.ndarray = loop_mappings[kept]
+
+        # the log2 bound of a dim at a level is the sum over its loops
+        extents: np.ndarray = np.maximum(
+            table.loop_ends[kept] - table.loop_starts[kept], 1
+        )
+        np.add.at(features, (rows, columns), np.log2(extents).astype(np.float32))
+
+        par_for: np.ndarray = table.loop_types[kept] == PAR_FOR
+        features[rows[par_for], columns[par_for] + 1] = 1
+
+        ## the bypass bits, one column per (level, dataspace) ##
+
+        level_numbers: np.ndarray = table.levels.astype(np.int64)
+        encoded: np.ndarray = level_numbers < self.levels
+        level_rows: np.ndarray = table.level_mappings[encoded]
+        level_columns: np.ndarray = (
+            self._bypass_offset + level_numbers[encoded] * len(self.dataspaces)
+        )
+        bypass: np.ndarray = table.bypass[encoded].astype(np.int64)
+
+        # only the dataspaces both the table and the layout know of
+        for index, dataspace in enumerate(self.dataspaces):
+            if dataspace in table.dataspaces:
+                bit: int = table.dataspaces.index(dataspace)
+                features[level_rows, level_columns + index] = (bypass >> bit) & 1
+
+        return features
+
+
+class SimilarityIndex:
+    """Answers nearest neighbour queries over a population of mappings.
+
+    Attributes:
+        table: The population searched.
+        layout: How its mappings are encoded.
+        features: The feature vector of every mapping in table.
+    """
+
+    def __init__(
+        self,
+        candidates: Union[MappingTable, list[Mapping]],
+        lsh_tables: int = 0,
+        lsh_bits: int = 16,
+        seed: int = 0,
+    ) -> None:
+        """Inits the index, encoding every candidate.
+
+        Args:
+            candidates: The population to search.
+            lsh_tables: How many LSH tables narrow the scan, 0 for an exact
+                brute-force scan.
+            lsh_bits: The number of random hyperplanes hashed per table.
+            seed: Seeds the LSH hyperplanes.
+        """
+        self.table: MappingTable = (
+            candidates
+            if isinstance(candidates, MappingTable)
+            else MappingTable.from_mappings(candidates)
+        )
+        self.layout: FeatureLayout = FeatureLayout.of(self.table)
+        self.features: np.ndarray = self.layout.encode(self.table)
+
+        # the squared norms, reused by every scan
+        self._norms: np.ndarray = np.einsum("ij,ij->i", self.features, self.features)
+
+        # the LSH tables: the hyperplanes, and every mapping sorted by bucket
+        self._lsh: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        if lsh_tables:
+            self._build_lsh(lsh_tables, lsh_bits, seed)
+
+    def __len__(self) -> int:
+        """The number of mappings indexed"""
+        return len(self.table)
+
+    ##############
+    # QUERY FXNS #
+    ##############
+
+    def encode(self, mapping: Mapping) -> np.ndarray:
+        """The feature vector of a mapping, in the index's layout"""
+        query: MappingTable = MappingTable.from_mappings(
+            [mapping], self.table.dataspaces
+        )
+
+        return self.layout.encode(query)[0]
+
+    def nearest(self, mapping: Mapping, k: int = 20) -> tuple[np.ndarray]:
+        """Finds the mappings most similar to mapping.
+
+        Args:
+            mapping: The mapping to search around. It need not be indexed; if
+                it is, it is its own nearest neighbour.
+            k: How many mappings to find; none are for a k below one.
+
+        Returns:
+            The indices of the k nearest mappings in table, nearest first and
+            ties by index, and their distances.
+        """
+        query: np.ndarray = self.encode(mapping)
+
+        candidates: np.ndarray = self._lsh_candidates(query)
+        # too few shared a bucket, so falls back to scanning everything
+        if candidates is not None and len(candidates) < k:
+            candidates = None
+
+        return self._scan(query, k, candidates)
+
+    def neighbours(self, mapping: Mapping, k: int = 20) -> list[Mapping]:
+        """The k mappings most similar to mapping, nearest first, ready to
+        be compared or diffed against it"""
+        return list(self.table.take(self.nearest(mapping, k)[0]))
+
+    def _scan(
+        self, query: np.ndarray, k: int, candidates: np.ndarray = None
+    ) -> tuple[np.ndarray]:
+        """The k nearest of candidates, or of every mapping, by brute force"""
+        total: int = len(self) if candidates is None else len(candidates)
+        k = min(k, total)
+
+        # nothing to find, and argpartition needs k to be at least one
+        if k < 1:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        best_rows: list[np.ndarray] = []
+        best_distances: list[np.ndarray] = []
+
+        # scores a slab at a time, keeping only its k best
+        for start in range(0, total, SCAN_ROWS):
+            rows: np.ndarray = (
+                np.arange(start, min(start + SCAN_ROWS, total))
+                if candidates is None
+                else candidates[start : start + SCAN_ROWS]
+            )
+
+            # |x - q|^2 = |x|^2 - 2 x.q + |q|^2, the |q|^2 added at the end
+            distances: np.ndarray = self._norms[rows] - 2 * (
+                self.features[rows] @ query
+            )
+
+            if len(rows) > k:
+                kept: np.ndarray = np.argpartition(distances, k - 1)[:k]
+                # ties at the cutoff may have picked any row, so keeps the first
+                cutoff: np.float32 = distances[kept].max()
+                kept = np.concatenate(
+                    (
+                        np.flatnonzero(distances < cutoff),
+                        np.flatnonzero(distances == cutoff),
+                    )
+                )[:k]
+                rows, distances = rows[kept], distances[kept]
+
+            best_rows.append(rows)
+            best_distances.append(distances)
+
+        rows = np.concatenate(best_rows) if best_rows else np.zeros(0, np.int64)
+        distances = (
+            np.concatenate(best_distances) if best_distances else np.zeros(0)
+        ) + query @ query
+
+        # rounding can leave identical vectors slightly apart, or below zero
+        distances = np.sqrt(np.maximum(distances.astype(np.float64), 0))
+        order: np.ndarray = np.lexsort((rows, distances))[:k]
+
+        return rows[order].astype(np.int64), distances[order]
+
+    ############
+    # LSH FXNS #
+    ############
+
+    def _hash(self, planes: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        """The bucket of each vector: which side of each hyperplane it is on"""
+        sides: np.ndarray = (vectors @ planes[:-1]) > planes[-1]
+
+        return np.packbits(sides, axis=-1, bitorder="little").view(np.uint8)
+
+    def _build_lsh(self, tables: int, bits: int, seed: int) -> None:
+        """Hashes every mapping into each LSH table"""
+        generator: np.random.Generator = np.random.default_rng(seed)
+        # hyperplanes through the population's centre, so buckets are balanced
+        centre: np.ndarray = self.features.mean(axis=0) if len(self) else 0
+
+        for _ in range(tables):
+            normals: np.ndarray = generator.standard_normal(
+                (self.layout.width, bits)
+            ).astype(np.float32)
+            # the last row holds each hyperplane's offset from the origin
+            planes: np.ndarray = np.vstack((normals, centre @ normals))
+
+            keys: np.ndarray = self._bucket_keys(planes, self.features)
+            order: np.ndarray = np.argsort(keys, kind="stable")
+
+            self._lsh.append((planes, keys[order], order))
+
+    def _bucket_keys(self, planes: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        """The buckets of vectors as sortable integers"""
+        packed: np.ndarray = self._hash(planes, np.atleast_2d(vectors))
+
+        # folds the packed bytes into one integer per vector
+        keys: np.ndarray = np.zeros(len(packed), dtype=np.uint64)
+        for column in range(packed.shape[1]):
+            keys |= packed[:, column].astype(np.uint64) << np.uint64(8 * column)
+
+        return keys
+
+    def _lsh_candidates(self, query: np.ndarray) -> np.ndarray:
+        """The mappings sharing a bucket with query in any table, None when
+        the index scans everything"""
+        if not self._lsh:
+            return None
+
+        found: list[np.ndarray] = []
+        for planes, keys, order in self._lsh:
+            key: np.uint64 = self._bucket_keys(planes, query)[0]
+            # the bucket is a run of the sorted keys
+            start: int = np.searchsorted(keys, key, side="left")
+            end: int = np.searchsorted(keys, key, side="right")
+            found.append(order[start:end])
+
+        return np.unique(np.concatenate(found))
+
+
+def nearest(
+    mapping: Mapping, candidates: Union[MappingTable, list[Mapping]], k: int = 20
+) -> list[Mapping]:
+    """
+    mapping:Mapping
+        The mapping to search around.
+    candidates:Union[MappingTable, list[Mapping]]
+        The population to search.
+    k:int
+        How many mappings to find.
+
+    returns:
+        The k mappings most similar to mapping, nearest first.
+    """
+    return SimilarityIndex(candidates).neighbours(mapping, k)
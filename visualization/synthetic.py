@@ -0,0 +1,313 @@
+"""Generates synthetic data at any scale for benchmarking: metric datasets
+for graphing.py, and timeloop printouts for parsing.py.
+
+Everything is drawn from a numpy.random.Generator, so the same seed and
+options always give the same data. Printouts are written in batches of
+records, each batch drawn as a handful of arrays and gathered into bytes in
+one pass, so no Python code runs per record or per token.
+
+The printouts are syntactically valid, and parse into mappings with the
+configured dims, levels and bypass density, but loop bounds are drawn
+independently: they are not tilings of any particular workload.
+
+Typical use case:
+data = metric_data(100000, seed=0)
+write_dump("timeloop-mapper.map.txt", 1000000, seed=0)
+
+Running this file writes a printout, see --help.
+"""
+# imports type hinting tools
+from __future__ import annotations
+from typing import Iterator
+
+# for the command line
+import argparse
+import time
+
+# imports numpy
+import numpy as np
+
+# the containers the data is generated into
+from graphing import MetricData, categories as DEFAULT_CATEGORIES
+from mapping.table import DEFAULT_DATASPACES, MASK_BITS
+
+# the components metric datasets describe by default
+DEFAULT_COMPONENTS: tuple[str] = ("A", "B", "C")
+# the dims printouts loop over by default, as in testdata.txt
+DEFAULT_DIMS: tuple[str] = ("P", "R", "K")
+
+# how many records are drawn and written at a time; fixed, so the records a
+# seed gives never depend on how they were batched
+BATCH_RECORDS: int = 16384
+
+
+def metric_data(
+    datapoints: int,
+    components: tuple[str] = DEFAULT_COMPONENTS,
+    categories: dict[str, tuple[str]] = None,
+    low: int = 50,
+    high: int = 100,
+    seed: int = None,
+) -> MetricData:
+    """
+    datapoints:int
+        The number of datapoints to generate.
+    components:tuple[str]
+        The components each datapoint describes.
+    categories:dict[str, tuple[str]]
+        The labels of each category, graphing.categories if None.
+    low, high:int
+        The range values are drawn from, high exclusive.
+    seed:int
+        Seeds the generator, fresh entropy if None.
+
+    returns:
+        The dataset, every value drawn uniformly in one shot.
+    """
+    if categories is None:
+        categories = DEFAULT_CATEGORIES
+
+    metrics: int = sum(len(labels) for labels in categories.values())
+    values: np.ndarray = np.random.default_rng(seed).integers(
+        low, high, (datapoints, len(components), metrics)
+    )
+
+    return MetricData(values, components, categories)
+
+
+def dump_records(
+    records: int,
+    dims: tuple[str] = DEFAULT_DIMS,
+    levels: int = 3,
+    loops_per_level: tuple[int] = (1, 3),
+    max_bound: int = 64,
+    bypass_density: float = 0.25,
+    dataspaces: int = len(DEFAULT_DATASPACES),
+    seed: int = None,
+) -> Iterator[bytes]:
+    """
+    records:int
+        The number of records to generate.
+    dims:tuple[str]
+        The dims loops iterate over.
+    levels:int
+        The number of storage levels of every mapping.
+    loops_per_level:tuple[int]
+        The least and most loops a level holds, at least 1.
+    max_bound:int
+        The largest loop bound. Bounds are powers of two up to it.
+    bypass_density:float
+        The chance each dataspace is bypassed at each level.
+    dataspaces:int
+        The number of dataspaces the bypass masks describe.
+    seed:int
+        Seeds the generator, fresh entropy if None.
+
+    returns:
+        The printout, as chunks of whole records.
+    """
+    if not 1 <= loops_per_level[0] <= loops_per_level[1]:
+        raise ValueError(f"Every level needs at least one loop, not {loops_per_level}")
+    if not 0 < dataspaces <= MASK_BITS:
+        raise ValueError(f"Masks hold 1 to {MASK_BITS} dataspaces, not {dataspaces}")
+
+    generator: np.random.Generator = np.random.default_rng(seed)
+
+    ## every token a record can hold but its performance, in one table ##
+
+    # a loop over each dim with each power of two bound
+    bounds: np.ndarray = 1 << np.arange(int(max_bound).bit_length())
+    loop_tokens: list[bytes] = [
+        f"{dim},0,{bound};".encode() for dim in dims for bound in bounds.tolist()
+    ]
+    # the boundary of a level, up to the most loops a mapping can hold
+    boundary_tokens: list[bytes] = [
+        f"{boundary};".encode() for boundary in range(levels * loops_per_level[1])
+    ]
+    # the mask of every combination of stored dataspaces
+    mask_tokens: list[bytes] = [
+        f"{stored:0{MASK_BITS}b};".encode() for stored in range(1 << dataspaces)
+    ]
+
+    table: list[bytes] = loop_tokens + boundary_tokens + mask_tokens
+    table += [b"\n", b";", b"."]
+    boundary_base: int = len(loop_tokens)
+    mask_base: int = boundary_base + len(boundary_tokens)
+    newline, semicolon, point = range(len(table) - 3, len(table))
+
+    # the table's characters back to back, and where each token starts
+    table_chars: np.ndarray = np.frombuffer(b"".join(table), dtype=np.uint8)
+    table_lengths: np.ndarray = np.array(
+        [len(token) for token in table], dtype=np.int32
+    )
+    table_starts: np.ndarray = np.cumsum(table_lengths, dtype=np.int32) - table_lengths
+
+    # the bit of each dataspace in a mask
+    weights: np.ndarray = 1 << np.arange(dataspaces)
+    # the tokens of each record after its loops: the boundaries, masks and
+    # the cycles and energy, the numbers filled in per batch, and a newline
+    # ending each of the four lines
+    tail: int = 2 * levels + 10
+    numbers: list[int] = [2 * levels + 3, 2 * levels + 5, 2 * levels + 7]
+
+    for first in range(0, records, BATCH_RECORDS):
+        batch: int = min(BATCH_RECORDS, records - first)
+
+        ## draws the batch ##
+
+        # the loops of each level, innermost level first
+        counts: np.ndarray = generator.integers(
+            loops_per_level[0], loops_per_level[1] + 1, (batch, levels)
+        )
+        loops: np.ndarray = counts.sum(axis=1)
+        loop_codes: np.ndarray = generator.integers(0, len(loop_tokens), loops.sum())
+
+        # the inclusive index of each level's outermost loop
+        boundaries: np.ndarray = np.cumsum(counts, axis=1) - 1
+        # the dataspaces each level stores, a set bit per stored dataspace
+        stored: np.ndarray = (
+            generator.random((batch, levels, dataspaces)) >= bypass_density
+        ) @ weights
+
+        cycles: np.ndarray = generator.lognormal(8, 1.5, batch).astype(np.int64) + 1
+        energy: np.ndarray = cycles * generator.lognormal(5, 1, batch)
+        # the energy in millionths, so "%f" is whole part, point, six digits;
+        # capped so even the far tail fits an int64
+        millionths: np.ndarray = np.rint(np.minimum(energy, 1e12) * 1e6).astype(
+            np.int64
+        )
+
+        ## lays every record's tokens out in one array ##
+
+        sizes: np.ndarray = loops + tail
+        starts: np.ndarray = np.zeros(batch, dtype=np.int64)
+        np.cumsum(sizes[:-1], out=starts[1:])
+
+        codes: np.ndarray = np.empty(sizes.sum(), dtype=np.int64)
+
+        # the loops, each record's run starting at its start
+        loop_starts: np.ndarray = np.zeros(batch, dtype=np.int64)
+        np.cumsum(loops[:-1], out=loop_starts[1:])
+        codes[
+            np.arange(len(loop_codes)) + np.repeat(starts - loop_starts, loops)
+        ] = loop_codes
+
+        # the fixed number of tokens after the loops, one row per record
+        after: np.ndarray = np.empty((batch, tail), dtype=np.int64)
+        after[:, 0] = newline
+        after[:, 1 : levels + 1] = boundary_base + boundaries
+        after[:, levels + 1] = newline
+        after[:, levels + 2 : 2 * levels + 2] = mask_base + stored
+        after[:, 2 * levels + 2] = newline
+        after[:, numbers] = newline  # placeholders, overwritten below
+        after[:, 2 * levels + 4] = semicolon
+        after[:, 2 * levels + 6] = point
+        after[:, 2 * levels + 8] = semicolon
+        after[:, 2 * levels + 9] = newline
+
+        positions: np.ndarray = (starts + loops)[:, None] + np.arange(tail)
+        codes[positions] = after
+
+        ## copies each token's characters out ##
+
+        sources: np.ndarray = table_starts[codes]
+        lengths: np.ndarray = table_lengths[codes]
+
+        # the numbers aren't in the table, so their digits are appended to
+        # it, a right aligned row per number
+        chars: list[np.ndarray] = [table_chars]
+        end: int = len(table_chars)
+
+        for column, (values, minimum) in zip(
+            numbers,
+            ((cycles, 1), (millionths // 1000000, 1), (millionths % 1000000, 6)),
+        ):
+            digits, digit_counts = _digits(values, minimum)
+            row_ends: np.ndarray = end + digits.shape[1] * np.arange(1, batch + 1)
+            sources[positions[:, column]] = row_ends - digit_counts
+            lengths[positions[:, column]] = digit_counts
+
+            chars.append(digits.ravel())
+            end += digits.size
+
+        # the i-th character out is its token's source start plus how far
+        # i is past the token's own start
+        offsets: np.ndarray = np.cumsum(lengths, dtype=np.int32) - lengths
+        index: np.ndarray = np.repeat(sources - offsets, lengths)
+        index += np.arange(len(index), dtype=np.int32)
+
+        yield np.concatenate(chars).take(index).tobytes()
+
+
+def _digits(values: np.ndarray, minimum: int = 1) -> tuple[np.ndarray]:
+    """The decimal digits of non-negative integers as right aligned rows of
+    characters, and how many of each row's digits are the number's, at
+    least minimum with zero padding"""
+    # the most digits any value has
+    width: int = max(len(str(int(values.max()))), minimum)
+
+    counts: np.ndarray = np.maximum(
+        np.searchsorted(10 ** np.arange(width, dtype=np.int64), values, side="right"),
+        minimum,
+    ).astype(np.int32)
+
+    # peels the digits off from the right
+    chars: np.ndarray = np.empty((len(values), width), dtype=np.uint8)
+    for column in range(width - 1, -1, -1):
+        values, digit = np.divmod(values, 10)
+        chars[:, column] = digit
+    chars += ord("0")
+
+    return chars, counts
+
+
+def write_dump(path: str, records: int, **options) -> int:
+    """
+    path:str
+        Where to write the printout.
+    records:int
+        The number of records to write.
+    options:
+        Passed on to dump_records.
+
+    returns:
+        The number of bytes written.
+    """
+    written: int = 0
+
+    with open(path, "wb") as printout:
+        for chunk in dump_records(records, **options):
+            written += printout.write(chunk)
+
+    return written
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="where to write the printout")
+    parser.add_argument("--records", type=int, default=1000000, help="records")
+    parser.add_argument("--dims", default=",".join(DEFAULT_DIMS), help="dims")
+    parser.add_argument("--levels", type=int, default=3, help="storage levels")
+    parser.add_argument("--bypass-density", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0, help="generator seed")
+    args: argparse.Namespace = parser.parse_args()
+
+    start: float = time.perf_counter()
+    written: int = write_dump(
+        args.path,
+        args.records,
+        dims=tuple(args.dims.split(",")),
+        levels=args.levels,
+        bypass_density=args.bypass_density,
+        seed=args.seed,
+    )
+    elapsed: float = time.perf_counter() - start
+
+    print(
+        f"{args.records} records, {written / (1 << 20):.0f} MiB in {elapsed:.2f}s "
+        f"({written / (1 << 20) / elapsed:.0f} MiB/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Regression tests for the binary table format and the parse cache.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for locating and editing printouts
+import os
+import shutil
+
+# the implementation under test
+from caching import LRUCache, cache_path, cached_parse
+from mapping.table import MappingTable
+from mapping.tablefile import read_meta, read_table, write_table
+from parsing import parse_table
+
+# the printout shipped with the visualizer
+TESTDATA: str = os.path.join(os.path.dirname(__file__), "testdata.txt")
+
+
+def columns(table: MappingTable) -> dict:
+    """Every column of table as plain lists, for comparing tables"""
+    return {
+        name: value.tolist() if hasattr(value, "tolist") else value
+        for name, value in vars(table).items()
+    }
+
+
+def test_table_file_round_trips(tmp_path):
+    with open(TESTDATA) as printout:
+        table: MappingTable = parse_table(printout)
+
+    path: str = str(tmp_path / "testdata.tlmt")
+    write_table(table, path, {"source": "testdata.txt"})
+    loaded, meta = read_table(path)
+
+    assert meta == read_meta(path) == {"source": "testdata.txt"}
+    assert columns(loaded) == columns(table)
+    assert str(loaded[2]) == str(table[2])
+
+
+def test_cached_parse_reuses_and_invalidates(tmp_path):
+    path: str = str(tmp_path / "printout.txt")
+    shutil.copy(TESTDATA, path)
+    cache_dir: str = str(tmp_path / "cache")
+
+    first: MappingTable = cached_parse(path, cache_dir=cache_dir)
+    cache: str = cache_path(path, cache_dir)
+    written: int = os.stat(cache).st_mtime_ns
+
+    # an unchanged printout is read back from the cache
+    assert columns(cached_parse(path, cache_dir=cache_dir)) == columns(first)
+    assert os.stat(cache).st_mtime_ns == written
+
+    # a changed one is parsed again
+    with open(TESTDATA) as printout:
+        lines: list[str] = printout.read().splitlines()
+    with open(path, "a") as printout:
+        printout.write("\n" + "\n".join(lines[:4]) + "\n")
+
+    assert len(cached_parse(path, cache_dir=cache_dir)) == len(first) + 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache: LRUCache = LRUCache(max_bytes=10)
+    cache.put("a", "A", 4)
+    cache.put("b", "B", 4)
+    cache.get("a")
+    cache.put("c", "C", 4)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.get("b", "missing") == "missing"
+
+    # values larger than the whole cache are not kept
+    cache.put("d", "D", 11)
+    assert "d" not in cache
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 1,
+        "entries": 2,
+        "bytes": 8,
+        "max_bytes": 10,
+    }
@@ -0,0 +1,46 @@
+"""Regression tests for fingerprints and the dedup index.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# the implementation under test
+from dedup import DedupIndex, dedup
+from mapping import Mapping
+from mapping.elements.loops import For, ParFor
+from mapping.elements.stores import Store
+
+
+def mapping(bound: int, energy: float, loop_type: type = For) -> Mapping:
+    """A one loop mapping, its structure set by bound and loop_type"""
+    return Mapping([Store(0, ("A", "B")), loop_type("m", 0, bound)], 10, energy)
+
+
+def test_fingerprint_is_structural():
+    assert mapping(4, 1.0).fingerprint() == mapping(4, 2.0).fingerprint()
+    assert mapping(4, 1.0).fingerprint() != mapping(8, 1.0).fingerprint()
+    assert mapping(4, 1.0).fingerprint() != mapping(4, 1.0, ParFor).fingerprint()
+
+
+def test_groups_keep_statistics():
+    index: DedupIndex = dedup(
+        [mapping(4, 1.0), mapping(8, 5.0), mapping(4, 3.0)], max_representatives=1
+    )
+
+    assert len(index) == 2
+    assert mapping(8, 0.0) in index
+    stats = index.stats(mapping(4, 0.0).fingerprint())
+    assert (stats.first, stats.count, stats.energy_mean) == (0, 2, 2.0)
+    assert [kept.energy for kept in index.unique()] == [1.0]
+
+
+def test_groups_are_capped():
+    index: DedupIndex = DedupIndex(max_groups=2)
+    added: list[bool] = [
+        index.add(mapping(bound, 1.0))[1] for bound in (2, 4, 2, 8, 2, 4)
+    ]
+
+    # 8 evicts 4, the group seen least recently, so 4 starts over
+    assert added == [True, True, False, True, False, True]
+    assert len(index) == 2 and index.evicted == 2
+    assert [stats.first for _, stats in index.groups()] == [0, 5]
@@ -0,0 +1,87 @@
+"""Regression tests for the structured and batched diffs.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for locating the printout
+import os
+
+# the test runner
+import pytest
+
+# the implementation under test
+from mapping import Mapping
+from mapping.diffing import BatchDiff, diff_many
+from mapping.changes import MappingDiff
+from mapping.elements.loops import DIM, END_DOWN, LOOP_TYPE, MISSING, For, ParFor
+from mapping.elements.stores import Store
+from mapping.table import MappingTable
+from parsing import parse
+
+# the printout shipped with the visualizer
+TESTDATA: str = os.path.join(os.path.dirname(__file__), "testdata.txt")
+
+
+@pytest.fixture
+def parsed() -> list[Mapping]:
+    with open(TESTDATA) as printout:
+        return parse(printout)
+
+
+def test_mapping_diff_renderers():
+    ours: Mapping = Mapping(
+        [Store(1, ("A", "<B>"), 0b10), For("m", 0, 4), ParFor("k", 0, 2)]
+    )
+    theirs: Mapping = Mapping([Store(1, ("A", "<B>")), For("m", 0, 8), For("n", 0, 2)])
+    diff: MappingDiff = ours.compare(theirs)
+
+    assert diff.changed == 2
+    assert [loop["code"] for loop in diff.to_dict()["blocks"][0]["loops"]] == [
+        END_DOWN,
+        LOOP_TYPE | DIM,
+    ]
+    assert ours.diff(theirs) == diff.to_markdown() == (
+        "buffer 1 stores (A, ==~~<B>~~==)\n"
+        "\tfor m in [0, 4 v)\n"
+        "\t*par-for* **k** in [0, 2)\n\n"
+    )
+    assert diff.to_text() == (
+        "buffer 1 stores (A) bypasses (<B>)\n"
+        "\tfor m in [0, 4 v)\n"
+        "\tpar-for k in [0, 2)\n\n"
+    )
+    assert diff.to_html() == (
+        "<p>buffer 1 stores (A, <mark><del>&lt;B&gt;</del></mark>)"
+        "\n\tfor m in [0, 4 v)"
+        "\n\t<em>par-for</em> <strong>k</strong> in [0, 2)</p>\n"
+    )
+
+
+def test_diff_many_matches_mapping_diff(parsed):
+    for reference in parsed:
+        diffs: BatchDiff = diff_many(reference, parsed)
+
+        for index, mapping in enumerate(parsed):
+            assert diffs.markdown(index) == mapping.diff(reference)
+            assert diffs.changed_loops[index] == mapping.compare(reference).changed
+
+
+def test_diff_many_marks_loops_and_blocks_past_the_reference():
+    reference: Mapping = Mapping([Store(1, ("A",)), For("m", 0, 4)])
+    candidate: Mapping = Mapping(
+        [
+            Store(1, ("A",)),
+            ParFor("m", 0, 4),
+            For("k", 0, 2),
+            Store(0, ("A",)),
+            For("n", 0, 2),
+        ]
+    )
+    diffs: BatchDiff = diff_many(
+        reference, MappingTable.from_mappings([candidate], ("A",))
+    )
+
+    assert diffs.markdown(0) == candidate.diff(reference)
+    assert diffs.codes.tolist()[1:] == [MISSING, MISSING]
+    assert diffs.has_change(MISSING).tolist() == [True]
@@ -0,0 +1,58 @@
+"""Regression tests for the mapping elements and their interning.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# the test runner
+import pytest
+
+# the implementation under test
+from mapping import Block
+from mapping.elements.loops import For, ParFor
+from mapping.elements.stores import Store
+
+
+def test_identical_elements_are_shared():
+    assert For("m", 0, 4) is For("m", 0, 4)
+    assert For("m", 0, 4) is not ParFor("m", 0, 4)
+    assert Store(1, ["A", "B"], 0b01) is Store(1, ("A", "B"), 0b01)
+    # the default bypass is the same as an explicit one
+    assert Store(0, ("A",)) is Store(0, ("A",), 0)
+
+
+def test_interning_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr("mapping.elements.INTERN", False)
+
+    assert For("m", 0, 4) is not For("m", 0, 4)
+    assert For("m", 0, 4) == For("m", 0, 4)
+
+
+def test_equal_elements_hash_equally():
+    ours: For = For("k", 0, 8)
+    theirs: For = For("k", 0, 8)
+
+    assert ours == theirs and hash(ours) == hash(theirs)
+    assert For("k", 0, 8) != For("k", 0, 4)
+    assert len({For("k", 0, 8), For("k", 0, 8), ParFor("k", 0, 8)}) == 2
+
+    with pytest.raises(TypeError):
+        For("k", 0, 8) == "for k in [0, 8)"
+
+
+def test_elements_and_blocks_have_no_dict():
+    for element in (For("m", 0, 4), ParFor("m", 0, 4), Store(0, ("A",))):
+        assert not hasattr(element, "__dict__")
+    assert not hasattr(Block(Store(0, ("A",))), "__dict__")
+
+
+def test_store_equality_ignores_bits_past_its_dataspaces(monkeypatch):
+    # only the bit of B is a dataspace's
+    assert Store(1, ("A", "B"), 0b110) is Store(1, ("A", "B"), 0b010)
+
+    monkeypatch.setattr("mapping.elements.INTERN", False)
+    ours: Store = Store(1, ("A", "B"), 0b110)
+
+    assert ours == Store(1, ("A", "B"), 0b010) and int(ours.bypass) == 0b010
+    assert hash(ours) == hash(Store(1, ("A", "B"), 0b010))
+    assert ours != Store(1, ("A", "B"), 0b011)
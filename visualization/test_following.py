@@ -0,0 +1,154 @@
+"""Regression tests for following growing printouts, and the live view.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for writing printouts and reading event streams
+import json
+import os
+import shutil
+
+# the test runner
+import pytest
+
+# the implementation under test
+import serve
+import synthetic
+from following import Follower
+from parsing import iter_parse
+from selection import pareto_front, top_k
+
+# the printout shipped with the visualizer
+TESTDATA: str = os.path.join(os.path.dirname(__file__), "testdata.txt")
+
+
+def summaries(mappings) -> list[tuple]:
+    """What equally built mappings share: their text and performance"""
+    return [(str(mapping), mapping.cycles, mapping.energy) for mapping in mappings]
+
+
+def test_polls_match_parsing_everything(tmp_path):
+    printout: bytes = b"".join(synthetic.dump_records(300, seed=0))
+    path: str = str(tmp_path / "printout.txt")
+    open(path, "wb").close()
+
+    follower: Follower = Follower(path, k=7)
+
+    # appends the printout in uneven pieces, most ending inside a record
+    joined: list[tuple] = []
+    for start in range(0, len(printout), 997):
+        with open(path, "ab") as appended:
+            appended.write(printout[start : start + 997])
+        joined.extend(follower.poll())
+
+    with open(path) as file:
+        mappings: list = list(iter_parse(file))
+
+    assert follower.records == 300 and follower.offset == len(printout)
+    assert summaries(mapping for _, mapping in follower.best()) == summaries(
+        top_k(mappings, 7)
+    )
+    assert summaries(follower.front()) == summaries(pareto_front(mappings))
+
+    # every best mapping joined when it was parsed, at its index
+    assert {index for index, _ in follower.best()} <= {index for index, _ in joined}
+    assert all(
+        str(mapping) == str(mappings[index]) for index, mapping in follower.best()
+    )
+
+
+def test_partial_records_are_held_back(tmp_path):
+    with open(TESTDATA, "rb") as file:
+        lines: list[bytes] = file.read().splitlines(keepends=True)
+    path: str = str(tmp_path / "printout.txt")
+
+    # a record and a half
+    with open(path, "wb") as printout:
+        printout.writelines(lines[:6])
+
+    follower: Follower = Follower(path, k=2)
+    assert len(follower.poll()) == 1
+    assert (follower.records, follower.offset) == (1, len(b"".join(lines[:4])))
+    assert follower.poll() == []
+
+    with open(path, "ab") as printout:
+        printout.writelines(lines[6:8])
+
+    assert [index for index, _ in follower.poll()] == [1]
+    assert follower.stats()["records"] == 2
+
+
+def test_truncated_printouts_start_over(tmp_path):
+    path: str = str(tmp_path / "printout.txt")
+    follower: Follower = Follower(path)
+
+    # the mapper hasn't written anything yet
+    assert follower.poll() == []
+
+    # the shipped printout's last line is unended, so is held back until it is
+    shutil.copy(TESTDATA, path)
+    follower.poll()
+    assert follower.records == 4
+
+    with open(path, "ab") as printout:
+        printout.write(b"\n")
+    follower.poll()
+    version: int = follower.version
+    assert follower.records == 5
+
+    with open(TESTDATA, "rb") as file:
+        lines: list[bytes] = file.read().splitlines(keepends=True)
+    with open(path, "wb") as printout:
+        printout.writelines(lines[:8])
+
+    follower.poll()
+    assert follower.records == 2 and follower.version > version
+    assert follower.stats()["mean_cycles"] == pytest.approx(
+        sum(mapping.cycles for _, mapping in follower.best()) / 2
+    )
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client following a copy of testdata.txt, whose event streams
+    end after their first poll"""
+    path: str = str(tmp_path / "printout.txt")
+    with open(TESTDATA, "rb") as file, open(path, "wb") as printout:
+        printout.write(file.read() + b"\n")
+
+    monkeypatch.setitem(serve.app.config, "PRINTOUT", path)
+    monkeypatch.setitem(serve.app.config, "FOLLOW_INTERVAL", 0.01)
+    monkeypatch.setitem(serve.app.config, "FOLLOW_SECONDS", 0)
+    monkeypatch.setattr("serve._followers", {})
+
+    return serve.app.test_client()
+
+
+def test_best_events(client):
+    response = client.get("/events/best?metric=cycles&k=2")
+    assert response.mimetype == "text/event-stream"
+
+    retry, event = response.get_data(as_text=True).strip().split("\n\n")
+    assert retry == "retry: 10"
+
+    name, data = event.split("\n")
+    payload: dict = json.loads(data.removeprefix("data: "))
+    assert name == "event: best"
+
+    with open(TESTDATA) as file:
+        best: list = top_k(iter_parse(file), 2, "cycles")
+
+    assert payload["stats"]["records"] == 5
+    assert payload["joined"] == []
+    assert [entry["cycles"] for entry in payload["best"]] == [
+        mapping.cycles for mapping in best
+    ]
+    assert [entry["text"] for entry in payload["best"]] == [
+        str(mapping) for mapping in best
+    ]
+
+
+@pytest.mark.parametrize("query", ["k=0", f"k={serve.MAX_FOLLOW + 1}", "metric=area"])
+def test_best_events_rejects_bad_arguments(client, query):
+    assert client.get(f"/events/best?{query}").status_code == 400
@@ -0,0 +1,153 @@
+"""Regression tests for the metric datasets graphing.py normalizes and draws.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for importing graphing in a fresh interpreter
+import os
+import subprocess
+import sys
+
+# for comparing values
+import numpy as np
+
+# the test runner
+import pytest
+
+# the implementation under test
+import graphing
+from benchmarks.bench_import import BUDGET, import_time
+from graphing import LabeledView, MetricData, make_data_percentage
+
+
+def datapoint(scale: int) -> dict:
+    """A datapoint of two components, shaped like generate_random_data's"""
+    return {
+        component: {
+            "Capacity": {"L1": scale * offset, "L2": 2 * scale * offset},
+            "Access Count": {"Read": 1 + offset, "Write": 2, "Fill": 3},
+        }
+        for offset, component in enumerate(("A", "B"), start=1)
+    }
+
+
+# checks what importing graphing, then asking for off screen drawing, does
+IMPORT_CHECK: str = """
+import sys
+import graphing
+
+assert "generated_data" not in vars(graphing)
+assert "normalized_data" not in vars(graphing)
+graphing.use_agg()
+for name in ("matplotlib", "pandas"):
+    assert name not in sys.modules, name
+
+# the example data is still built on first access
+assert len(graphing.normalized_data) == 5
+assert "matplotlib" not in sys.modules
+"""
+
+
+def test_import_has_no_side_effects():
+    result: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_import_is_within_budget():
+    # the fastest of a few fresh imports, so a busy machine doesn't fail it
+    cumulative: float = min(import_time("graphing")[0] for _ in range(3))
+
+    assert cumulative < BUDGET, f"importing graphing took {cumulative:.0f}ms"
+
+
+def test_generate_random_data_gives_dicts():
+    data: tuple = graphing.generate_random_data(3, seed=0)
+
+    assert isinstance(data, tuple) and len(data) == 3
+    assert all(type(point) is dict for point in data)
+    assert data == graphing.generate_random_data(3, seed=0)
+
+
+def test_make_data_percentage_gives_metric_data():
+    data: tuple = (datapoint(1), datapoint(3))
+    normalized: MetricData = make_data_percentage(data)
+
+    # one (datapoints, components, metrics) array, category by category
+    assert isinstance(normalized, MetricData)
+    assert normalized.values.shape == (2, 2, 5)
+    assert normalized.components == ("A", "B")
+    assert normalized.categories == {
+        "Capacity": ("L1", "L2"),
+        "Access Count": ("Read", "Write", "Fill"),
+    }
+    assert normalized.flat_labels[:3] == (
+        "Capacity L1",
+        "Capacity L2",
+        "Access Count Read",
+    )
+
+    # each metric's largest total over the components is 100
+    assert np.allclose(normalized.values.sum(axis=1).max(axis=0), 100)
+    assert normalized.category("Capacity").shape == (2, 2, 2)
+
+    # the input is left as it was
+    assert data == (datapoint(1), datapoint(3))
+
+
+def test_datapoints_read_like_dicts():
+    normalized: MetricData = make_data_percentage([datapoint(1), datapoint(3)])
+
+    point = normalized[1]
+    assert isinstance(point, LabeledView)
+    assert list(point) == ["A", "B"]
+    assert point["B"]["Capacity"]["L2"] == 2 * 3 * 2 * 100 / (2 * 3 * 3)
+    assert point["A"]["Access Count"].to_dict() == {
+        "Read": 2 * 100 / 5,
+        "Write": 50.0,
+        "Fill": 50.0,
+    }
+
+    # copying out gives plain dicts, which pack back into the same array
+    assert all(type(point) is dict for point in normalized.to_dicts())
+    copied: MetricData = MetricData.from_dicts(normalized.to_dicts())
+    assert np.array_equal(copied.values, normalized.values)
+
+
+def test_make_data_percentage_accepts_metric_data():
+    packed: MetricData = MetricData.from_dicts([datapoint(1), datapoint(3)])
+
+    assert np.array_equal(
+        make_data_percentage(packed).values,
+        make_data_percentage(packed.to_dicts()).values,
+    )
+
+
+def test_graphs_are_bounded(monkeypatch):
+    graphing.use_agg()
+    monkeypatch.setattr("graphing.heatmap_rows", 4)
+    data: MetricData = make_data_percentage(graphing.generate_random_data(30, seed=0))
+
+    # 30 mappings averaged eight at a time into four rows
+    heatmap = graphing.graph_heatmap(data)
+    assert heatmap.axes[0].images[0].get_array().shape == (4, 5)
+
+    # a page holds per_page mappings, and pages past the end do not exist
+    page = graphing.graph_unified_mapping(data, page=1)
+    assert sum(subplot.get_visible() for subplot in page.axes) == 30 - graphing.per_page
+    with pytest.raises(IndexError):
+        graphing.graph_category("Capacity", data, page=2)
+
+    # every mapping lands in one histogram bin
+    cycles: np.ndarray = np.array([1.0, 10.0, 100.0, 100.0])
+    histogram = graphing.graph_cycles_energy(cycles, cycles * 2, bins=8)
+    assert histogram.axes[0].collections[0].get_array().sum() == 4
+
+    for figure in (heatmap, page, histogram):
+        graphing._pyplot().close(figure)
@@ -0,0 +1,78 @@
+"""Regression tests for Mapping and Block alignment.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for checking what the alignment cache keeps alive
+import gc
+import weakref
+
+# the implementation under test
+from mapping import Block, Mapping, align_loops
+from mapping.elements.loops import For, ParFor
+from mapping.elements.stores import Store
+
+
+def dims(loops: tuple) -> list[str]:
+    """The dims of loops, in order"""
+    return [loop.dim for loop in loops]
+
+
+def test_align_loops_pairs_every_shared_dim_it_can():
+    ours: tuple = (For("m", 0, 4), For("k", 0, 2), For("n", 0, 4))
+    theirs: tuple = (For("k", 0, 2), For("n", 0, 4), For("m", 0, 4))
+    aligned_ours, aligned_theirs = align_loops(ours, theirs)
+
+    # both sides line up dim for dim, k and n paired as-is, m once on each
+    assert dims(aligned_ours) == dims(aligned_theirs) == ["m", "k", "n", "m"]
+    assert aligned_ours[1:3] == ours[1:] and aligned_theirs[1:3] == theirs[:2]
+    assert aligned_ours[3] == For("m", 0, 1) and aligned_theirs[0] == For("m", 0, 1)
+
+
+def test_align_loops_prefers_identical_loops():
+    ours: tuple = (For("k", 0, 2),)
+    theirs: tuple = (ParFor("k", 0, 2), For("k", 0, 2))
+    aligned_ours, aligned_theirs = align_loops(ours, theirs)
+
+    # the unpaired loop faces a blank of itself
+    assert aligned_theirs == theirs
+    assert aligned_ours == (ParFor("k", 0, 1), For("k", 0, 2))
+
+
+def test_align_loops_pairs_as_many_dims_either_way():
+    ours: tuple = (For("m", 0, 4), ParFor("k", 0, 8), For("n", 0, 2))
+    theirs: tuple = (For("n", 0, 4), For("m", 0, 8))
+
+    # one of m and n can be paired, whichever side is ours
+    for first, second in ((ours, theirs), (theirs, ours)):
+        aligned_first, aligned_second = align_loops(first, second)
+        assert len(aligned_first) == len(aligned_second) == 4
+        assert dims(aligned_first) == dims(aligned_second)
+
+
+def test_align_loops_does_not_keep_loops_alive():
+    ours: tuple = (For("aligned_once", 0, 3), For("k", 0, 2))
+    theirs: tuple = (For("k", 0, 2), ParFor("aligned_once", 0, 5))
+    align_loops(ours, theirs)
+    alive: list = [weakref.ref(loop) for loop in ours + theirs]
+
+    # an identical alignment is remembered, without the loops themselves
+    assert dims(align_loops(ours, theirs)[0]) == ["aligned_once", "k", "aligned_once"]
+    del ours, theirs
+    gc.collect()
+
+    assert alive[0]() is None and alive[3]() is None
+
+
+def test_mapping_align_keeps_unmatched_blocks():
+    ours: Mapping = Mapping(
+        [Store(1, ("A",)), For("m", 0, 4), Store(0, ("A",)), For("k", 0, 2)], 5, 1.0
+    )
+    theirs: Mapping = Mapping([Store(1, ("A",)), For("n", 0, 4)])
+    aligned, other_aligned = ours.align(theirs)
+
+    assert [dims(block.children) for block in aligned.blocks] == [["m", "n"], ["k"]]
+    assert [dims(block.children) for block in other_aligned.blocks] == [["m", "n"]]
+    assert (aligned.cycles, aligned.energy) == (5, 1.0)
+    assert isinstance(aligned.blocks[0], Block)
@@ -0,0 +1,133 @@
+"""Regression tests for the timeloop printout parser.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for reading printouts from memory and locating the shipped one
+import io
+import os
+
+# the implementation under test
+from parsing import (
+    _parse_chunk,
+    iter_parse,
+    iter_records,
+    parse,
+    parse_many,
+    split_records,
+    workload_dataspaces,
+)
+
+# the printout shipped with the visualizer
+TESTDATA: str = os.path.join(os.path.dirname(__file__), "testdata.txt")
+
+
+def summary(mapping) -> tuple:
+    """What two equally parsed mappings share: their text and performance"""
+    return str(mapping), mapping.cycles, mapping.energy
+
+
+def test_iter_parse_matches_parse():
+    with open(TESTDATA) as printout:
+        parsed: list = parse(printout)
+    with open(TESTDATA) as printout:
+        streamed: list = list(iter_parse(printout))
+
+    assert len(parsed) == 5
+    assert [summary(mapping) for mapping in streamed] == [
+        summary(mapping) for mapping in parsed
+    ]
+
+
+def test_iter_parse_places_loops_under_their_level():
+    with open(TESTDATA) as printout:
+        mapping = next(iter_parse(printout))
+
+    # boundaries 2;3;4 give level 0 the three innermost loops
+    assert [block.level for block in mapping.blocks] == [2, 1, 0]
+    assert [len(block.children) for block in mapping.blocks] == [1, 1, 3]
+    assert mapping.blocks[0].children[0].dim == "P"
+    assert mapping.blocks[2].loop_dims == ("P", "R", "K")
+    assert mapping.cycles == 1536
+
+
+def test_iter_records_skips_blank_lines_and_partial_records():
+    with open(TESTDATA) as printout:
+        lines: list[str] = printout.read().splitlines()
+
+    # blank lines between and inside records, and a trailing partial record
+    padded: str = "\n".join(["", *lines[:2], "", *lines[2:8], "", *lines[:3]])
+    records: list[tuple] = list(iter_records(io.StringIO(padded)))
+
+    assert len(records) == 2
+    assert records[0] == tuple(line.rstrip(";") for line in lines[:4])
+
+
+def test_bypass_and_performance_are_decoded():
+    with open(TESTDATA) as printout:
+        mapping = next(iter_parse(printout, ("X", "Y", "W")))
+
+    # masks are innermost level first, 1 marking a stored dataspace
+    bypass: list[int] = [int(block.buffer.bypass) for block in mapping.blocks]
+    assert bypass == [0b011, 0b010, 0b011]
+    assert mapping.blocks[1].buffer.names == ("X", "Y", "W")
+    assert mapping.blocks[1].buffer.is_bypassed(1)
+    assert (mapping.cycles, mapping.energy) == (1536, 413943.917714)
+
+
+def test_workload_dataspaces():
+    spec: dict = {"shape": {"data-spaces": [{"name": "Weights"}, {"name": "Inputs"}]}}
+
+    assert workload_dataspaces({"problem": spec}) == ("Weights", "Inputs")
+    assert workload_dataspaces(spec) == ("Weights", "Inputs")
+    assert workload_dataspaces(["A", "B"]) == ("A", "B")
+
+
+def blank_padded(path: str, copies: int) -> list[str]:
+    """Writes copies of testdata.txt to path with blank lines between and
+    inside its records, returning the record lines written"""
+    with open(TESTDATA) as printout:
+        lines: list[str] = printout.read().splitlines() * copies
+
+    with open(path, "w") as padded:
+        for number, line in enumerate(lines):
+            padded.write(f"{line}\n" + "\n" * (number % 3 == 1))
+
+    return lines
+
+
+def test_split_records_tolerates_blank_lines(tmp_path):
+    path: str = str(tmp_path / "padded.txt")
+    lines: list[str] = blank_padded(path, 10)
+
+    chunks: list[tuple[int, int]] = split_records(path, 200)
+    assert len(chunks) > 5
+
+    # every chunk holds whole records, and together they hold them all
+    records: list[tuple] = []
+    for start, end in chunks:
+        records.extend(
+            (str(mapping), mapping.cycles)
+            for mapping in _parse_chunk(path, start, end, ("A", "B", "Z"))
+        )
+
+    with open(path) as printout:
+        assert records == [
+            (str(mapping), mapping.cycles) for mapping in iter_parse(printout)
+        ]
+    assert len(records) == len(lines) // 4
+
+
+def test_parse_many_matches_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr("parsing.MIN_CHUNK_BYTES", 512)
+    paths: list[str] = [str(tmp_path / f"shard{shard}.txt") for shard in range(2)]
+    for path in paths:
+        blank_padded(path, 4)
+
+    expected: list[tuple] = []
+    for path in paths:
+        with open(path) as printout:
+            expected.extend(summary(mapping) for mapping in parse(printout))
+
+    assert [summary(mapping) for mapping in parse_many(paths, workers=2)] == expected
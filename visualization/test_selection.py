@@ -0,0 +1,89 @@
+"""Regression tests for the top-K and Pareto-front selectors.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# imports numpy and the test runner
+import numpy as np
+import pytest
+
+# the implementation under test
+from mapping import Mapping
+from mapping.elements.stores import Store
+from mapping.table import MappingTable
+from selection import TopK, pareto_front, table_pareto_front, table_top_k, top_k
+
+
+@pytest.fixture
+def population() -> list[Mapping]:
+    """Mappings with few distinct cycles and energies, so there are ties"""
+    scores: np.ndarray = np.random.default_rng(0).integers(0, 20, (300, 2))
+
+    return [
+        Mapping([Store(0, ("A", "B", "Z"))], int(cycles), float(energy))
+        for cycles, energy in scores.tolist()
+    ]
+
+
+def dominated(mapping: Mapping, population: list[Mapping]) -> bool:
+    """Whether another mapping is no worse than mapping in both metrics and
+    either better or earlier"""
+    return any(
+        other.cycles <= mapping.cycles
+        and other.energy <= mapping.energy
+        and (
+            other.cycles < mapping.cycles
+            or other.energy < mapping.energy
+            or index < population.index(mapping)
+        )
+        for index, other in enumerate(population)
+        if other is not mapping
+    )
+
+
+def test_top_k_keeps_the_earliest_of_ties(population):
+    expected: list[Mapping] = sorted(population, key=lambda mapping: mapping.energy)
+
+    assert top_k(population, 10, "energy") == expected[:10]
+    assert top_k(population, 1000, "cycles") == sorted(
+        population, key=lambda mapping: mapping.cycles
+    )
+
+
+def test_top_k_rejects_non_positive_k():
+    for k in (0, -1):
+        with pytest.raises(ValueError):
+            TopK(k)
+
+
+def test_pareto_front(population):
+    expected: list[Mapping] = [
+        mapping for mapping in population if not dominated(mapping, population)
+    ]
+
+    assert pareto_front(population) == sorted(
+        expected, key=lambda mapping: mapping.cycles
+    )
+
+
+def test_table_selectors_match_streaming(population):
+    table: MappingTable = MappingTable.from_mappings(population)
+
+    assert table_top_k(table, 10).tolist() == [
+        population.index(mapping) for mapping in top_k(population, 10)
+    ]
+    assert table_pareto_front(table).tolist() == [
+        population.index(mapping) for mapping in pareto_front(population)
+    ]
+    assert len(table_top_k(table, 0)) == 0
+
+
+def test_table_top_k_puts_unknown_scores_last():
+    mappings: list[Mapping] = [
+        Mapping([Store(0, ("A", "B", "Z"))], 1, energy) for energy in (1.0, None, 2.0)
+    ]
+    table: MappingTable = MappingTable.from_mappings(mappings)
+
+    assert table_top_k(table, 3).tolist() == [0, 2, 1]
+    assert table_top_k(table, 2).tolist() == [0, 2]
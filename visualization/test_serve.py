@@ -0,0 +1,220 @@
+"""Regression tests for the server's views and API.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for importing the server in fresh interpreters
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# the test runner
+import pytest
+
+# the implementation under test
+import serve
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client whose parse cache lives in a temporary directory"""
+    monkeypatch.setattr("caching.CACHE_DIR", str(tmp_path))
+    serve._view_cache.clear()
+
+    return serve.app.test_client()
+
+
+def test_best(client):
+    response = client.get("/best/energy?k=2")
+
+    assert response.status_code == 200
+    assert 'id="mapping1"' in response.get_data(as_text=True)
+    assert 'id="mapping2"' not in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize("k", [0, -1, serve.MAX_SHOWN + 1])
+def test_best_rejects_out_of_range_k(client, k):
+    for metric in ("energy", "cycles", "pareto"):
+        assert client.get(f"/best/{metric}?k={k}").status_code == 400
+
+
+def test_empty_printouts_have_no_best(client, tmp_path, monkeypatch):
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+    monkeypatch.setitem(serve.app.config, "PRINTOUT", str(path))
+
+    for metric in ("energy", "cycles", "pareto"):
+        assert client.get(f"/best/{metric}").status_code == 404
+    assert client.get("/similar/0").status_code == 404
+
+
+def test_api_diff_many_matches_compare(client):
+    table = serve._printout_table(serve.app.config["PRINTOUT"])
+    page: dict = client.get("/api/diff/1?offset=1&limit=3").get_json()
+
+    assert [diff["ids"] for diff in page["diffs"]] == [[1], [2], [3]]
+    for diff in page["diffs"]:
+        expected = table[diff["ids"][0]].compare(table[1])
+        assert diff["blocks"] == expected.to_dict()["blocks"]
+        assert diff["changed"] == expected.changed
+
+    assert page["next"] is not None
+    assert client.get("/api/diff/99").status_code == 404
+
+
+def test_api_diff_many_groups_identical_structures(client, tmp_path, monkeypatch):
+    with open(serve.app.config["PRINTOUT"]) as printout:
+        lines: list[str] = printout.read().splitlines()
+
+    # the first record twice, then the second
+    path = tmp_path / "printout.txt"
+    path.write_text("\n".join(lines[:4] + lines[:4] + lines[4:8]) + "\n")
+    monkeypatch.setitem(serve.app.config, "PRINTOUT", str(path))
+
+    page: dict = client.get("/api/diff/0").get_json()
+    assert [diff["ids"] for diff in page["diffs"]] == [[0, 1], [2]]
+    assert page["diffs"][0]["changed"] == 0
+
+
+def test_similar(client):
+    assert client.get("/similar/2?k=3").status_code == 200
+    assert client.get("/similar/99").status_code == 404
+
+
+@pytest.mark.parametrize("k", [0, -1, serve.MAX_SHOWN + 1])
+def test_similar_rejects_out_of_range_k(client, k):
+    assert client.get(f"/similar/0?k={k}").status_code == 400
+
+
+def test_views_are_cached_and_revalidated(client):
+    first = client.get("/basic")
+    again = client.get("/basic")
+
+    assert first.status_code == again.status_code == 200
+    assert first.get_data() == again.get_data() and first.get_etag() == again.get_etag()
+    assert serve._view_cache.stats()["hits"] >= 1
+
+    before: int = client.get("/stats/cache").get_json()["not_modified"]
+    revalidated = client.get("/basic", headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert client.get("/stats/cache").get_json()["not_modified"] == before + 1
+
+
+def test_api_diff_revalidates_before_diffing(client, monkeypatch):
+    first = client.get("/api/diff/0/1?format=markdown")
+    assert first.status_code == 200
+
+    def fail(*args):
+        raise AssertionError("diffed a response the client already has")
+
+    monkeypatch.setattr(serve, "_diff_job", fail)
+    revalidated = client.get(
+        "/api/diff/0/1?format=markdown",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+    assert revalidated.status_code == 304
+
+
+def test_etags_change_with_the_source(client, monkeypatch):
+    etag: str = client.get("/api/mappings/0").headers["ETag"]
+
+    monkeypatch.setattr(serve, "_SOURCE_VERSION", "another release")
+    assert client.get("/api/mappings/0").headers["ETag"] != etag
+
+
+def test_source_version_only_depends_on_the_files():
+    # read from stdin, so __main__ has no file, with other modules loaded
+    versions: set[str] = {
+        subprocess.run(
+            [sys.executable, "-"],
+            input=f"{imports}\nimport serve\nprint(serve._SOURCE_VERSION)",
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        for imports in ("", "import graphing, synthetic")
+    }
+
+    assert versions == {serve._source_version()}
+
+
+def test_tables_are_built_once_under_concurrent_requests(client, monkeypatch):
+    monkeypatch.setattr("serve._tables", {})
+    parse = serve.cached_parse
+    built: list[str] = []
+
+    def slow_parse(path: str):
+        built.append(path)
+        time.sleep(0.05)
+        return parse(path)
+
+    monkeypatch.setattr("serve.cached_parse", slow_parse)
+
+    tables: list = []
+    threads: list[threading.Thread] = [
+        threading.Thread(
+            target=lambda: tables.append(
+                serve._printout_table(serve.app.config["PRINTOUT"])
+            )
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert len(tables) == 8 and all(table is tables[0] for table in tables)
+
+
+def test_api_mappings_pages(client):
+    first: dict = client.get("/api/mappings?limit=2&sort=energy").get_json()
+    second: dict = client.get(first["next"]).get_json()
+    last: dict = client.get(second["next"]).get_json()
+
+    energies: list[float] = [
+        mapping["energy"]
+        for page in (first, second, last)
+        for mapping in page["mappings"]
+    ]
+    assert first["total"] == len(energies) == 5
+    assert energies == sorted(energies)
+    assert last["next"] is None
+
+    assert client.get("/api/mappings/4").get_json()["id"] == 4
+    assert client.get("/api/mappings?sort=size").status_code == 400
+    assert client.get("/api/mappings/5").status_code == 404
+
+
+def test_api_diff_in_worker_processes(client, tmp_path, monkeypatch):
+    expected: bytes = client.get("/api/diff/3/0?format=text").get_data()
+
+    # the workers find their parse cache through the environment
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setitem(serve.app.config, "DIFF_WORKERS", 1)
+    try:
+        response = client.get("/api/diff/3/0?format=text")
+    finally:
+        if serve._diff_executor is not None:
+            serve._diff_executor.shutdown()
+        serve._diff_executor = None
+
+    assert response.status_code == 200
+    assert response.get_data() == expected
+
+
+def test_many_mappings_are_streamed(client):
+    streamed = client.get(f"/best/cycles?k={serve.STREAM_MAPPINGS + 1}")
+    cached = client.get("/best/cycles?k=5")
+
+    # only a page rendered whole knows its length up front
+    assert "Content-Length" not in streamed.headers
+    assert "Content-Length" in cached.headers
+    # the printout holds 5 mappings, so both pages show the same
+    assert streamed.get_data() == cached.get_data()
+    assert len(serve._view_cache) == 1
@@ -0,0 +1,61 @@
+"""Regression tests for the similarity index.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# imports numpy and the test runner
+import numpy as np
+import pytest
+
+# the implementation under test
+import synthetic
+from mapping.table import MappingTable
+from parsing import iter_records
+from similarity import SimilarityIndex
+
+
+@pytest.fixture(scope="module")
+def table() -> MappingTable:
+    """A synthetic population large enough to have near neighbours"""
+    lines: list[str] = (
+        b"".join(synthetic.dump_records(2000, seed=0)).decode("ascii").splitlines()
+    )
+
+    return MappingTable.from_records(iter_records(lines))
+
+
+def test_nearest_matches_brute_force(table):
+    index: SimilarityIndex = SimilarityIndex(table)
+
+    for query in (0, 17, 1999):
+        rows, distances = index.nearest(table[query], 10)
+
+        expected: np.ndarray = np.linalg.norm(
+            index.features.astype(np.float64) - index.features[query], axis=1
+        )
+        order: np.ndarray = np.lexsort((np.arange(len(expected)), expected))
+
+        # the query is its own nearest neighbour
+        assert distances[0] == 0
+        assert np.allclose(distances, expected[order[:10]], atol=1e-3)
+        assert rows[0] == query or expected[rows[0]] == 0
+
+
+def test_lsh_narrows_to_a_subset(table):
+    exact: SimilarityIndex = SimilarityIndex(table)
+    hashed: SimilarityIndex = SimilarityIndex(table, lsh_tables=4, lsh_bits=8)
+
+    rows, distances = hashed.nearest(table[5], 10)
+    assert len(rows) == 10 and distances[0] == 0
+    # an approximate neighbour is never nearer than the exact ones
+    assert np.all(distances >= exact.nearest(table[5], 10)[1] - 1e-3)
+
+
+def test_non_positive_k_finds_nothing(table):
+    index: SimilarityIndex = SimilarityIndex(table)
+
+    for k in (0, -1):
+        rows, distances = index.nearest(table[0], k)
+        assert len(rows) == len(distances) == 0
+        assert index.neighbours(table[0], k) == []
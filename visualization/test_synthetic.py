@@ -0,0 +1,56 @@
+"""Regression tests for the synthetic data and printout generator.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for reading printouts from memory
+import io
+
+# the test runner
+import pytest
+
+# the implementation under test
+import synthetic
+from mapping.table import MappingTable
+from parsing import iter_parse, iter_records
+
+
+def test_same_seed_gives_same_data():
+    assert b"".join(synthetic.dump_records(50, seed=3)) == b"".join(
+        synthetic.dump_records(50, seed=3)
+    )
+    assert b"".join(synthetic.dump_records(50, seed=3)) != b"".join(
+        synthetic.dump_records(50, seed=4)
+    )
+    assert (
+        synthetic.metric_data(4, seed=3).values.tolist()
+        == synthetic.metric_data(4, seed=3).values.tolist()
+    )
+
+
+def test_printouts_parse_as_configured():
+    printout: str = b"".join(
+        synthetic.dump_records(
+            300, dims=("X", "Y"), levels=4, bypass_density=0, seed=0
+        )
+    ).decode()
+
+    mappings: list = list(iter_parse(io.StringIO(printout)))
+    assert len(mappings) == 300
+    for mapping in mappings:
+        assert len(mapping.blocks) == 4
+        for block in mapping.blocks:
+            assert block.children and set(block.loop_dims) <= {"X", "Y"}
+
+    # nothing is bypassed, and the table agrees with the mappings
+    table: MappingTable = MappingTable.from_records(
+        iter_records(io.StringIO(printout))
+    )
+    assert not table.bypass.any()
+    assert table.cycles.tolist() == [mapping.cycles for mapping in mappings]
+
+
+def test_printouts_need_a_loop_per_level():
+    with pytest.raises(ValueError):
+        next(synthetic.dump_records(1, loops_per_level=(0, 2)))
@@ -0,0 +1,95 @@
+"""Regression tests for the columnar MappingTable.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for locating the printout
+import os
+
+# the test runner
+import pytest
+
+# the implementation under test
+from mapping.elements.loops import ParFor
+from mapping.table import MASK_BITS, MappingTable, _TableBuilder, decode_masks
+from parsing import iter_records, parse, parse_table
+
+# the printout shipped with the visualizer
+TESTDATA: str = os.path.join(os.path.dirname(__file__), "testdata.txt")
+
+
+def summaries(mappings) -> list[tuple]:
+    """What equally built mappings share: their text and performance"""
+    return [(str(mapping), mapping.cycles, mapping.energy) for mapping in mappings]
+
+
+@pytest.fixture
+def parsed() -> list:
+    with open(TESTDATA) as printout:
+        return parse(printout)
+
+
+@pytest.fixture
+def table() -> MappingTable:
+    with open(TESTDATA) as printout:
+        return parse_table(printout)
+
+
+def test_parse_table_matches_parse(parsed, table):
+    assert len(table) == len(parsed)
+    assert summaries(table) == summaries(parsed)
+
+
+def test_from_mappings_round_trips(parsed):
+    assert summaries(MappingTable.from_mappings(parsed)) == summaries(parsed)
+
+
+def test_take_and_concatenate(parsed, table):
+    assert summaries(table.take([3, 0])) == summaries([parsed[3], parsed[0]])
+
+    joined: MappingTable = MappingTable.concatenate([table.take([4]), table])
+    assert summaries(joined) == summaries(parsed[4:] + parsed)
+
+
+def test_has_loop(parsed, table):
+    assert not table.has_loop("K", loop_type=ParFor).any()
+    assert table.has_loop("K", level=0).tolist() == [
+        "K" in mapping.blocks[-1].loop_dims for mapping in parsed
+    ]
+
+
+def test_masks_are_decoded_in_batches(monkeypatch):
+    monkeypatch.setattr("mapping.table.MASK_BATCH", 4)
+
+    builder: _TableBuilder = _TableBuilder(("A", "B", "Z"))
+    with open(TESTDATA) as printout:
+        for record in iter_records(printout):
+            builder.append_record(*record)
+            # three levels a record, flushed once four are pending
+            assert len(builder._masks) < 4
+
+    with open(TESTDATA) as printout:
+        assert builder.build().bypass.tolist() == parse_table(printout).bypass.tolist()
+
+
+def test_decode_masks():
+    full: list[str] = ["0" * (MASK_BITS - 3) + "101", "0" * MASK_BITS]
+    ragged: list[str] = ["101", "0"]
+
+    # 1 marks a stored dataspace, a set bypass bit a bypassed one
+    assert decode_masks(full, ("A", "B", "Z")).tolist() == [0b010, 0b111]
+    assert decode_masks(ragged, ("A", "B", "Z")).tolist() == [0b010, 0b111]
+
+    # ragged masks as long as full width ones together
+    summed: list[str] = ["0" * (MASK_BITS - 2) + "1", "0" * (MASK_BITS + 1)]
+    assert decode_masks(summed, ("A", "B", "Z")).tolist() == [0b110, 0b111]
+
+
+def test_decode_masks_rejects_too_many_dataspaces():
+    dataspaces: tuple[str] = tuple(f"D{index}" for index in range(MASK_BITS + 1))
+
+    with pytest.raises(ValueError):
+        decode_masks(["0" * MASK_BITS], dataspaces)
+
+    assert decode_masks(["1" * MASK_BITS], dataspaces[:MASK_BITS]).tolist() == [0]
@@ -0,0 +1,117 @@
+"""Regression tests for the tracing layer and the server's use of it.
+
+Run from this directory with:
+python -m pytest
+"""
+
+# for locating the printout
+import os
+
+# the test runner
+import pytest
+
+# the implementation under test
+import parsing
+import serve
+import tracing
+from mapping import Mapping
+
+# the printout shipped with the visualizer
+TESTDATA: str = os.path.join(os.path.dirname(__file__), "testdata.txt")
+
+
+@pytest.fixture
+def traced():
+    """Tracing enabled with no observations, disabled again afterwards"""
+    tracing.reset()
+    tracing.enable()
+    yield
+    tracing.enable(False)
+    tracing.reset()
+
+
+def test_enable_swaps_the_timed_functions_in_and_out():
+    undecorated = Mapping.diff
+    assert not tracing.enabled()
+
+    tracing.enable()
+    try:
+        assert Mapping.diff is not undecorated
+        assert Mapping.diff.__wrapped__ is undecorated
+    finally:
+        tracing.enable(False)
+
+    assert Mapping.diff is undecorated
+
+
+def test_span_is_shared_while_off():
+    assert tracing.span("render") is tracing.span("parse")
+
+
+def test_exposition_format(traced):
+    with tracing.span("render"):
+        pass
+    with pytest.raises(KeyError):
+        with tracing.span("render"):
+            raise KeyError
+    tracing.count("requests_total", status='"quoted"\n')
+
+    lines: list[str] = tracing.exposition().splitlines()
+
+    assert "# TYPE timeloop_stage_seconds histogram" in lines
+    assert 'timeloop_stage_seconds_bucket{stage="render",le="+Inf"} 2' in lines
+    assert 'timeloop_stage_seconds_count{stage="render"} 2' in lines
+    assert "# TYPE timeloop_requests_total counter" in lines
+    assert 'timeloop_requests_total{status="\\"quoted\\"\\n"} 1' in lines
+
+    # one bucket per bound, then +Inf, each counting every smaller one
+    buckets: list[int] = [
+        int(line.rsplit(" ", 1)[1]) for line in lines if "_bucket{" in line
+    ]
+    assert len(buckets) == len(tracing.BUCKETS) + 1
+    assert buckets == sorted(buckets)
+
+
+def test_collect_gathers_server_timing(traced):
+    with tracing.collect() as collected:
+        with tracing.span("parse"):
+            pass
+        with tracing.collect() as inner:
+            with tracing.span("render"):
+                pass
+        with tracing.span("parse"):
+            pass
+
+    # inner spans count towards the innermost block only
+    assert list(collected) == ["parse"] and collected["parse"][1] == 2
+    assert list(inner) == ["render"]
+
+    header: str = tracing.server_timing({"parse": [0.0015, 2]}, 0.004)
+    assert header == 'parse;dur=1.500;desc="2 calls", total;dur=4.000'
+
+
+def test_records_are_built_in_batch_spans(traced, monkeypatch):
+    monkeypatch.setattr("parsing.BATCH_RECORDS", 2)
+
+    with open(TESTDATA) as printout:
+        assert len(parsing.parse(printout)) == 5
+
+    # one span per batch of two records, rather than one per record
+    lines: list[str] = tracing.exposition().splitlines()
+    assert 'timeloop_stage_seconds_count{stage="build"} 3' in lines
+    assert 'timeloop_stage_seconds_count{stage="parse"} 1' in lines
+
+
+def test_metrics_and_server_timing(traced, tmp_path, monkeypatch):
+    monkeypatch.setattr("caching.CACHE_DIR", str(tmp_path))
+    monkeypatch.setitem(serve.app.config, "SERVER_TIMING", True)
+    serve._view_cache.clear()
+    client = serve.app.test_client()
+
+    response = client.get("/best/energy?k=2")
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["Server-Timing"]
+
+    metrics: str = client.get("/metrics").get_data(as_text=True)
+    assert 'timeloop_requests_total{status="200"} 1' in metrics
+    assert 'timeloop_request_seconds_count{endpoint="best"} 1' in metrics
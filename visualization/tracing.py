@@ -0,0 +1,375 @@
+"""A lightweight tracing layer: spans time the hot paths, counters count
+events, and both are exposed in the Prometheus text format.
+
+Tracing is off unless enabled, by enable() or by setting TRACING=1 in the
+environment. While off, span() hands back a shared no-op context, and the
+functions decorated with traced() are the undecorated functions themselves:
+enable() swaps the timed versions in on their modules and classes, and
+disabling swaps them back out. So the hot paths cost nothing extra to keep
+instrumented, but a traced function imported by name before tracing was
+enabled stays untimed; call it through its module.
+
+Every span feeds the stage_seconds histogram of its stage. Spans inside a
+collect() block are also summed per stage, for Server-Timing headers.
+
+Typical use case:
+@traced("justify")
+def justify(self, other): ...
+
+with span("render"):
+    html = template.render()
+
+enable()
+print(exposition())
+"""
+
+# for timing and thread safety
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# for typehinting
+from typing import Callable, ContextManager, Iterator
+
+# prefixes every metric exposed
+NAMESPACE: str = "timeloop"
+
+# the upper bounds of the histogram buckets, in seconds; the stages range
+# from microseconds (one block justified) to seconds (a printout parsed)
+BUCKETS: tuple[float] = tuple(
+    float(f"{mantissa}e{exponent}")
+    for exponent in range(-6, 1)
+    for mantissa in (1, 2.5, 5)
+) + (10.0,)
+
+# what each metric measures, as HELP lines
+DESCRIPTIONS: dict[str, str] = {
+    "stage_seconds": "Time spent in each instrumented stage.",
+    "request_seconds": "Time to handle each request, until its body is sent.",
+    "requests_total": "Requests handled, by status.",
+}
+
+# whether spans are recorded; read on every call, so kept a plain global
+_enabled: bool = os.environ.get("TRACING", "") not in ("", "0")
+
+# guards the metrics, as spans finish on many threads
+_lock: threading.Lock = threading.Lock()
+# histograms and counters, by (metric, labels) with labels sorted pairs
+_histograms: dict[tuple[str, tuple], "Histogram"] = {}
+_counters: dict[tuple[str, tuple], float] = {}
+
+# the per stage [seconds, calls] of the surrounding collect() block, if any
+_collector: ContextVar = ContextVar("collector", default=None)
+
+# what span() hands back while tracing is off
+_NULL_SPAN: ContextManager = nullcontext()
+
+# every traced function, undecorated, with the stage it belongs to
+_traced: list[tuple[Callable, str]] = []
+
+
+class Histogram:
+    """Counts observations into BUCKETS, as a Prometheus histogram does"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        # the last count is of observations past every bound
+        self.counts: list[int] = [0] * (len(BUCKETS) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        """Counts value into the first bucket whose bound it doesn't exceed"""
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def enable(on: bool = True) -> None:
+    """
+    on:bool
+        Whether spans should be recorded from now on. Swaps the timed
+        versions of the traced functions in, or back out.
+    """
+    global _enabled
+    if on == _enabled:
+        return
+    _enabled = on
+
+    function: Callable
+    stage: str
+    for function, stage in _traced:
+        owner, name = _owner(function)
+        if owner is not None:
+            setattr(owner, name, _timed(function, stage) if on else function)
+
+
+def enabled() -> bool:
+    """Whether spans are being recorded"""
+    return _enabled
+
+
+def reset() -> None:
+    """Forgets every observation and count"""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def observe(metric: str, value: float, **labels: str) -> None:
+    """
+    metric:str
+        The histogram to observe into, without the namespace.
+    value:float
+        The observation, in seconds.
+    labels:
+        The labels telling this histogram apart from others of the metric.
+    """
+    _observe((metric, tuple(sorted(labels.items()))), value)
+
+
+def _observe(key: tuple, value: float) -> None:
+    """Observes value into the histogram keyed by (metric, labels)"""
+    with _lock:
+        histogram: Histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def count(metric: str, amount: float = 1, **labels: str) -> None:
+    """
+    metric:str
+        The counter to add to, without the namespace; by convention its name
+        ends in _total.
+    amount:float
+        How much to add.
+    labels:
+        The labels telling this counter apart from others of the metric.
+    """
+    key: tuple = (metric, tuple(sorted(labels.items())))
+
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def span(stage: str) -> ContextManager:
+    """
+    stage:str
+        The stage the enclosed code belongs to.
+
+    returns:
+        A context timing the enclosed code into the stage's histogram, or a
+        shared no-op context while tracing is off.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+
+    return _Span(stage)
+
+
+class _Span:
+    """Times the enclosed code into its stage, even if it raises"""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str) -> None:
+        self.stage: str = stage
+
+    def __enter__(self) -> None:
+        self.start: float = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        _record(self.stage, time.perf_counter() - self.start)
+
+
+def _record(stage: str, elapsed: float) -> None:
+    """Records a span of stage that took elapsed seconds"""
+    _observe(("stage_seconds", (("stage", stage),)), elapsed)
+
+    # notes the time against the current request, if one is collecting
+    collected: dict = _collector.get()
+    if collected is not None:
+        totals: list = collected.setdefault(stage, [0.0, 0])
+        totals[0] += elapsed
+        totals[1] += 1
+
+
+def traced(stage: str) -> Callable[[Callable], Callable]:
+    """
+    stage:str
+        The stage the decorated function's calls belong to.
+
+    returns:
+        A decorator timing every call of a module level function or method
+        as a span of stage, while tracing is enabled.
+    """
+
+    def decorate(function: Callable) -> Callable:
+        _traced.append((function, stage))
+
+        return _timed(function, stage) if _enabled else function
+
+    return decorate
+
+
+def _timed(function: Callable, stage: str) -> Callable:
+    """function, timing every call as a span of stage"""
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start: float = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _record(stage, time.perf_counter() - start)
+
+    return timed
+
+
+def _owner(function: Callable) -> tuple[object, str]:
+    """The module or class holding function, None if it can't be reached,
+    and the name it is held under"""
+    owner: object = sys.modules.get(function.__module__)
+    *path, name = function.__qualname__.split(".")
+
+    # functions defined inside others are reached through "<locals>"
+    for part in path:
+        owner = getattr(owner, part, None)
+
+    return owner, name
+
+
+@contextmanager
+def collect() -> Iterator[dict[str, list]]:
+    """
+    returns:
+        A context in which every span's time is also summed per stage, into
+        the dict it yields as stage: [seconds, calls]. Contexts nest, inner
+        spans counting towards the innermost block only.
+    """
+    collected: dict[str, list] = {}
+    token = _collector.set(collected)
+    try:
+        yield collected
+    finally:
+        _collector.reset(token)
+
+
+def start_collecting() -> dict[str, list]:
+    """
+    returns:
+        The dict the current context's spans are summed into from now on, as
+        collect() yields, for when the start and end aren't in one block.
+        Doesn't nest; end with stop_collecting().
+    """
+    collected: dict[str, list] = {}
+    _collector.set(collected)
+
+    return collected
+
+
+def stop_collecting() -> None:
+    """Stops summing the current context's spans"""
+    _collector.set(None)
+
+
+def server_timing(collected: dict[str, list], total: float = None) -> str:
+    """
+    collected:dict[str, list]
+        The per stage times a collect() block gathered.
+    total:float
+        The time the whole request took, in seconds, left out if None.
+
+    returns:
+        The value of a Server-Timing header reporting the times.
+    """
+    metrics: list[str] = [
+        f'{stage};dur={seconds * 1e3:.3f};desc="{calls} calls"'
+        for stage, (seconds, calls) in collected.items()
+    ]
+    if total is not None:
+        metrics.append(f"total;dur={total * 1e3:.3f}")
+
+    return ", ".join(metrics)
+
+
+def exposition() -> str:
+    """
+    returns:
+        Every metric in the Prometheus text exposition format, version 0.0.4.
+    """
+    # copies the metrics, so the lock isn't held while formatting
+    with _lock:
+        histograms: dict = {
+            key: (list(histogram.counts), histogram.sum, histogram.count)
+            for key, histogram in _histograms.items()
+        }
+        counters: dict = dict(_counters)
+
+    lines: list[str] = []
+    bounds: list[str] = [_number(bound) for bound in BUCKETS] + ["+Inf"]
+
+    for metric in sorted({metric for metric, _ in histograms}):
+        name: str = f"{NAMESPACE}_{metric}"
+        lines += _header(name, metric, "histogram")
+
+        for (key_metric, labels), values in sorted(histograms.items()):
+            if key_metric != metric:
+                continue
+            counts, total, observed = values
+
+            # bucket counts are cumulative
+            cumulative: int = 0
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                lines.append(
+                    f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {observed}")
+
+    for metric in sorted({metric for metric, _ in counters}):
+        name: str = f"{NAMESPACE}_{metric}"
+        lines += _header(name, metric, "counter")
+
+        for (key_metric, labels), value in sorted(counters.items()):
+            if key_metric == metric:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    return "".join(f"{line}\n" for line in lines)
+
+
+def _header(name: str, metric: str, kind: str) -> list[str]:
+    """The HELP and TYPE lines of a metric"""
+    return [
+        f"# HELP {name} {DESCRIPTIONS.get(metric, metric)}",
+        f"# TYPE {name} {kind}",
+    ]
+
+
+def _labels(labels: tuple) -> str:
+    """Formats label pairs as a Prometheus label set"""
+    if not labels:
+        return ""
+
+    # backslashes, newlines and quotes are escaped in label values
+    escaped: list[str] = [
+        label
+        + '="'
+        + str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        + '"'
+        for label, value in labels
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value: float) -> str:
+    """Formats a sample value the way Prometheus reads it back"""
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))